@@ -0,0 +1,47 @@
+"""
+Benchmark of fetching one credential: a full unlock and load of the vault per call, as a script without the agent pays,
+against a request to a running agent.
+
+Run with: python -m benchmarks.benchAgent [entries] [calls]
+"""
+import os
+import sys
+import time
+from source.passwordManager import PasswordManager
+from source.keyDerivation import KEY_CACHE
+from source.agent import VaultAgent, AgentClient
+from benchmarks.workspace import temporaryWorkingDirectory
+
+
+def main() -> None:
+    """
+    Fetch the same credential repeatedly with and without the agent in a temporary directory.
+    """
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with temporaryWorkingDirectory() as tempDir:
+        pm = PasswordManager("BenchmarkMasterPassword")
+        pm.data = {f'site{index}.example.com': {'username': f'user{index}', 'password': f'Password!{index}'} for index in range(entries)}
+        pm.saveData()
+
+        start = time.perf_counter()
+        for _ in range(calls):
+            KEY_CACHE.clear()  # A new process starts without cached keys
+            fresh = PasswordManager("BenchmarkMasterPassword")
+            fresh.loadData()
+            fresh.getPassword('site1.example.com')
+        unlockTime = (time.perf_counter() - start) / calls
+
+        agent = VaultAgent(fresh, os.path.join(tempDir, 'agent.sock'))
+        agent.start()
+        client = AgentClient(agent.socketPath)
+        start = time.perf_counter()
+        for _ in range(calls):
+            client.get('site1.example.com')
+        agentTime = (time.perf_counter() - start) / calls
+        agent.stop()
+    print(f"{entries} entries: unlock per call {unlockTime * 1000:.1f} ms, agent request {agentTime * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark of serving concurrent requests from asyncio: the longest stall of the event loop and the total time for a mix of
+lookups and updates, calling the PasswordManager directly from coroutines and through the AsyncPasswordManager.
+
+Run with: python -m benchmarks.benchAsync [entries] [requests]
+"""
+import sys
+import time
+import asyncio
+from typing import Awaitable, Callable, List, Tuple
+from source.asyncPasswordManager import AsyncPasswordManager
+from source.passwordManager import PasswordManager
+from benchmarks.workspace import temporaryWorkingDirectory
+
+MASTER_PASSWORD = "BenchmarkMasterPassword"
+
+
+async def measure(requests: List[Callable[[], Awaitable[None]]]) -> Tuple[float, float]:
+    """
+    Run the requests concurrently while a heartbeat records the longest gap between its ticks. Returns the time and the gap.
+    """
+    longest = 0.0
+    done = False
+
+    async def heartbeat() -> None:
+        nonlocal longest
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+
+    beat = asyncio.ensure_future(heartbeat())
+    start = time.perf_counter()
+    await asyncio.gather(*(request() for request in requests))
+    seconds = time.perf_counter() - start
+    done = True
+    await beat
+    return seconds, longest
+
+
+async def run(entries: int, count: int) -> None:
+    """
+    Answer the same requests both ways.
+    """
+    pm = PasswordManager(MASTER_PASSWORD)
+    pm.loadData()
+
+    def directRequest(number: int) -> Callable[[], Awaitable[None]]:
+        async def request() -> None:
+            if number % 10 == 0:
+                pm.updatePassword(f'site{number}.example.com', password=f'Changed!{number}')
+            else:
+                pm.getPassword(f'site{number}.example.com')
+        return request
+
+    seconds, longest = await measure([directRequest(number) for number in range(count)])
+    print(f"direct calls: {count} requests in {seconds:6.3f}s, longest loop stall {longest * 1000:7.1f} ms")
+
+    manager = AsyncPasswordManager(PasswordManager(MASTER_PASSWORD))
+    await manager.loadData()
+
+    def facadeRequest(number: int) -> Callable[[], Awaitable[None]]:
+        async def request() -> None:
+            if number % 10 == 0:
+                await manager.updatePassword(f'site{number}.example.com', password=f'Changed!{number}')
+            else:
+                await manager.getPassword(f'site{number}.example.com')
+        return request
+
+    seconds, longest = await measure([facadeRequest(number) for number in range(count)])
+    print(f"async facade: {count} requests in {seconds:6.3f}s, longest loop stall {longest * 1000:7.1f} ms ({entries} entries)")
+
+
+def main() -> None:
+    """
+    Create a vault in a temporary directory and run the requests against it.
+    """
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with temporaryWorkingDirectory():
+        pm = PasswordManager(MASTER_PASSWORD)
+        pm.loadData()
+        with pm.transaction():
+            for number in range(entries):
+                pm.addPassword(f'site{number}.example.com', 'user', f'Password!{number}')
+        asyncio.run(run(entries, count))
+
+
+if __name__ == '__main__':
+    main()
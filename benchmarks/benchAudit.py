@@ -0,0 +1,70 @@
+"""
+Benchmark of the incremental vault audit: a full first audit, a repeated audit without changes and an audit after a few
+entries were modified, with the number of evaluated entries, decryptions and passwords sent to the breach check.
+A local stand-in replaces the Pwned Passwords API.
+
+Run with: python -m benchmarks.benchAudit [entries] [modified]
+"""
+import sys
+import time
+from typing import Dict, Iterable
+from source.passwordManager import PasswordManager
+from source.passwordGenerator import generateStrongPasswords
+from benchmarks.workspace import temporaryWorkingDirectory
+
+
+class CountingBackend:
+    """
+    A breach check that knows no breached passwords and counts the passwords it is asked about.
+    """
+
+    def __init__(self) -> None:
+        self.checked: int = 0
+
+    def checkPasswords(self, passwords: Iterable[str]) -> Dict[str, bool]:
+        """
+        Report every password as not breached.
+        """
+        unique = set(passwords)
+        self.checked += len(unique)
+        return dict.fromkeys(unique, False)
+
+
+def timedAudit(pm: PasswordManager, backend: CountingBackend, name: str) -> None:
+    """
+    Run one audit and print what it cost.
+    """
+    decryptions, checked = pm.secrets.decryptions, backend.checked
+    start = time.perf_counter()
+    report = pm.audit()
+    seconds = time.perf_counter() - start
+    print(f"{name:<22}: {seconds:6.3f}s, {report.evaluated} evaluated, {report.cached} cached, "
+          f"{pm.secrets.decryptions - decryptions} decryptions, {backend.checked - checked} breach checks")
+
+
+def main() -> None:
+    """
+    Audit a generated vault in a temporary directory.
+    """
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    modified = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    with temporaryWorkingDirectory():
+        pm = PasswordManager("BenchmarkMasterPassword")
+        pm.loadData()
+        with pm.transaction():
+            for number, password in enumerate(generateStrongPasswords(entries, 16)):
+                pm.addPassword(f'site{number}.example.com', 'user', password)
+        pm = PasswordManager("BenchmarkMasterPassword")
+        pm.loadData()
+        backend = CountingBackend()
+        pm.pwnedBackend = backend  # type: ignore[assignment]
+        timedAudit(pm, backend, "first audit")
+        timedAudit(pm, backend, "unchanged vault")
+        with pm.transaction():
+            for number, password in enumerate(generateStrongPasswords(modified, 16)):
+                pm.updatePassword(f'site{number}.example.com', password=password)
+        timedAudit(pm, backend, f"{modified} entries modified")
+
+
+if __name__ == '__main__':
+    main()
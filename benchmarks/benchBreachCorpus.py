@@ -0,0 +1,58 @@
+"""
+Benchmark of the offline breach corpus: conversion time, lookup latency and resident memory.
+
+Run with: python -m benchmarks.benchBreachCorpus [records]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from source.breachCorpus import BreachCorpus, convertCorpus
+
+
+def anonymousMemory() -> int:
+    """
+    Return the anonymous resident memory of this process in bytes (Linux only). Pages of the mapped corpus are
+    file-backed and reclaimable by the kernel, so they are not included.
+    """
+    with open('/proc/self/status', encoding='utf-8') as file:
+        for line in file:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def main() -> None:
+    """
+    Convert a synthetic corpus and time random lookups against it.
+    """
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    with tempfile.TemporaryDirectory() as tempDir:
+        sourcePath = os.path.join(tempDir, 'corpus.txt')
+        targetPath = os.path.join(tempDir, 'corpus.bin')
+        randomGenerator = random.Random(42)
+        with open(sourcePath, 'w', encoding='utf-8') as file:
+            for _ in range(records):
+                file.write(f'{randomGenerator.getrandbits(160):040X}:{randomGenerator.randint(1, 1000)}\n')
+
+        start = time.perf_counter()
+        convertCorpus(sourcePath, targetPath)
+        print(f"convert: {time.perf_counter() - start:.2f}s for {records} records, {os.path.getsize(targetPath) / 2 ** 20:.1f} MiB")
+
+        lookups = 100000
+        passwords = [f'password{index}' for index in range(lookups)]
+        rssBefore = anonymousMemory()
+        corpus = BreachCorpus(targetPath)
+        start = time.perf_counter()
+        for password in passwords:
+            corpus.count(password)
+        elapsed = time.perf_counter() - start
+        rssAfter = anonymousMemory()
+        print(f"lookup: {elapsed / lookups * 1e6:.1f}us per password over {corpus.recordCount} records")
+        print(f"anonymous RSS growth while querying: {(rssAfter - rssBefore) / 2 ** 20:.1f} MiB")
+        corpus.close()
+
+
+if __name__ == '__main__':
+    main()
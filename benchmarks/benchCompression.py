@@ -0,0 +1,53 @@
+"""
+Benchmark of the compression stage: bytes written per saveData, save time and load time at several vault sizes
+for every compression method and a few levels.
+
+Run with: python -m benchmarks.benchCompression [entries ...]
+"""
+import os
+import sys
+import time
+from typing import Optional
+from source.passwordManager import PasswordManager
+from benchmarks.workspace import temporaryWorkingDirectory
+
+SETTINGS = [(None, 0), ('zlib', 1), ('zlib', 6), ('zlib', 9), ('lzma', 0), ('lzma', 6)]
+
+
+def benchmark(entries: int, compression: Optional[str], level: int) -> None:
+    """
+    Save and load a vault of the given size with one compression setting and print the results.
+    """
+    pm = PasswordManager("BenchmarkMasterPassword", compression=compression, compressionLevel=level)
+    pm.data = {f'site{index}.example.com': {'username': f'user{index % 50}@example.com', 'password': f'Password!{index}',
+                                            'createdAt': '2024-01-01T12:00:00', 'notes': 'Some notes about this account',
+                                            'category': ('Work', 'Private', 'Mail')[index % 3]} for index in range(entries)}
+    pm.saveData()  # Seals the secrets once, so the measured saves write the same data
+    pm.loadData()
+
+    start = time.perf_counter()
+    pm.saveData()
+    saveTime = time.perf_counter() - start
+    written = os.path.getsize('passwords.json')
+
+    reloaded = PasswordManager("BenchmarkMasterPassword")
+    start = time.perf_counter()
+    reloaded.loadData()
+    loadTime = time.perf_counter() - start
+    label = f"{compression} {level}" if compression else "none"
+    print(f"{entries:>7} entries, {label:<7}: {written / 1024:9.1f} KiB written, save {saveTime * 1000:7.1f} ms, load {loadTime * 1000:7.1f} ms")
+
+
+def main() -> None:
+    """
+    Run every setting for every vault size in a temporary directory.
+    """
+    sizes = [int(argument) for argument in sys.argv[1:]] or [1000, 10000, 100000]
+    with temporaryWorkingDirectory():
+        for entries in sizes:
+            for compression, level in SETTINGS:
+                benchmark(entries, compression, level)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark of several processes writing one vault at the same time: every process loads the vault once and then adds its
+own entries, merging the changes the others saved meanwhile. Reports the time taken, how many saves had to merge and
+whether any entry was lost.
+
+Run with: python -m benchmarks.benchConcurrentWriters [processes] [entries]
+"""
+import sys
+import time
+import multiprocessing
+from source.passwordManager import PasswordManager
+from benchmarks.workspace import temporaryWorkingDirectory
+
+MASTER_PASSWORD = "BenchmarkMasterPassword"
+
+
+def writer(number: int, entries: int) -> int:
+    """
+    Add entries from one process and return the number of saves that merged changes of other processes.
+    """
+    pm = PasswordManager(MASTER_PASSWORD)
+    pm.loadData()
+    merges = 0
+    originalSave = pm.storage.save
+
+    def countingSave(data):  # type: ignore[no-untyped-def]
+        nonlocal merges
+        merged = originalSave(data)
+        merges += merged
+        return merged
+
+    pm.storage.save = countingSave  # type: ignore[method-assign]
+    for entry in range(entries):
+        pm.addPassword(f'writer{number}-site{entry}.example.com', 'user', f'Password!{entry}')
+    return merges
+
+
+def main() -> None:
+    """
+    Run the writers against a vault in a temporary directory.
+    """
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    entries = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    with temporaryWorkingDirectory():
+        pm = PasswordManager(MASTER_PASSWORD)
+        pm.loadData()
+        with pm.transaction():
+            for number in range(1000):
+                pm.addPassword(f'site{number}.example.com', 'user', f'Password!{number}')
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            merges = pool.starmap(writer, [(number, entries) for number in range(processes)])
+        seconds = time.perf_counter() - start
+
+        reloaded = PasswordManager(MASTER_PASSWORD)
+        reloaded.loadData()
+        expected = 1000 + processes * entries
+        print(f"{processes} processes x {entries} saves: {seconds:6.3f}s, {sum(merges)} merged saves, "
+              f"{len(reloaded.data)} of {expected} entries in the vault")
+
+
+if __name__ == '__main__':
+    main()
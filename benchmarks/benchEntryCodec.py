@@ -0,0 +1,62 @@
+"""
+Benchmark of the entry codecs: encode and decode time and encoded size of the JSON and the binary codec,
+on their own and as part of saving and loading a vault.
+
+Run with: python -m benchmarks.benchEntryCodec [entries]
+"""
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from source.passwordManager import PasswordManager
+from source.sealedSecrets import SecretSealer
+from source.entryCodec import CODECS
+from benchmarks.workspace import temporaryWorkingDirectory
+
+
+def timed(action: Callable[[], Any]) -> Tuple[float, Any]:
+    """
+    Run an action and return its duration and result.
+    """
+    start = time.perf_counter()
+    result = action()
+    return time.perf_counter() - start, result
+
+
+def buildEntries(count: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Create sealed entries the way a saved vault holds them.
+    """
+    sealer = SecretSealer(b'benchmark')
+    categories = ['Work', 'Private', 'Mail', 'Finance', 'Shopping']
+    return [(f'site{index}.example.com', {'username': f'user{index}', 'password': sealer.seal(f'Password!{index}', f'{index:064x}'),
+                                          'createdAt': f'2024-01-01T12:{index % 60:02d}:00.{index % 1000000:06d}',
+                                          'notes': sealer.seal('Some notes about this account'), 'category': categories[index % 5]})
+            for index in range(count)]
+
+
+def main() -> None:
+    """
+    Measure every codec on the same entries, then save and load a vault with each of them.
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    entries = buildEntries(count)
+    print(f"{count} entries")
+    for codec in CODECS.values():
+        encodeTime, chunks = timed(lambda codec=codec: list(codec.encodeEntries(entries)))
+        decodeTime, _ = timed(lambda codec=codec, chunks=chunks: list(codec.decodeEntries(chunks)))
+        size = sum(len(chunk) for chunk in chunks)
+        print(f"{codec.name}: encode {encodeTime:.2f}s, decode {decodeTime:.2f}s, {size / 2 ** 20:.1f} MiB")
+
+    with temporaryWorkingDirectory():
+        for name in CODECS:
+            pm = PasswordManager("BenchmarkMasterPassword", codec=name)
+            pm.data = dict(entries)
+            saveTime, _ = timed(pm.saveData)
+            reloaded = PasswordManager("BenchmarkMasterPassword", codec=name)
+            loadTime, _ = timed(reloaded.loadData)
+            print(f"{name} vault: save {saveTime:.2f}s, load {loadTime:.2f}s, {os.path.getsize('passwords.json') / 2 ** 20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
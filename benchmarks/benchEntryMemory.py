@@ -0,0 +1,50 @@
+"""
+Benchmark of the memory used per vault entry: loaded as the dicts the JSON codec produces compared with Entry objects
+as the binary codec loads them.
+
+Run with: python -m benchmarks.benchEntryMemory [entries]
+"""
+import gc
+import sys
+import tracemalloc
+from typing import Any, Callable
+from source.entryCodec import BinaryCodec, JsonCodec
+from source.sealedSecrets import SecretSealer
+
+
+def retained(label: str, count: int, build: Callable[[], Any]) -> None:
+    """
+    Print how many bytes per entry the result of build keeps alive.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}: {current / count:.0f} bytes per entry, {current / 2 ** 20:.1f} MiB")
+    del result
+
+
+def main() -> None:
+    """
+    Encode the same sealed entries once with each codec and measure what loading them retains.
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    sealer = SecretSealer(b'benchmark')
+    entries = [(f'site{index}.example.com', {'username': f'user{index % 100}@example.com', 'password': sealer.seal(f'Password!{index}', f'{index:064x}'),
+                                             'createdAt': f'2024-01-01T12:{index % 60:02d}:00.{index:06d}', 'notes': None,
+                                             'category': ('Work', 'Private', 'Mail')[index % 3]}) for index in range(count)]
+    jsonChunks = list(JsonCodec().encodeEntries(entries))
+    binaryChunks = list(BinaryCodec().encodeEntries(entries))
+    del entries
+
+    print(f"{count} entries")
+    retained("dict entries", count, lambda: {site: dict(entry) for site, entry in JsonCodec().decodeEntries(jsonChunks)})
+    retained("Entry objects", count, lambda: dict(BinaryCodec().decodeEntries(binaryChunks)))
+    site, entry = next(BinaryCodec().decodeEntries(binaryChunks))
+    print(f"container of one entry: dict {sys.getsizeof(dict(entry))} bytes, Entry {sys.getsizeof(entry)} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark of bulk import and export: time, number of vault writes and peak traced memory of importing a CSV file into
+an empty vault and exporting it again, at several sizes.
+
+Run with: python -m benchmarks.benchImport [rows ...]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from source.passwordManager import PasswordManager
+from benchmarks.workspace import temporaryWorkingDirectory
+
+
+def writeCsv(path: str, rows: int) -> None:
+    """
+    Write a CSV file in our format row by row.
+    """
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        file.write('site,username,password,notes,category,url\n')
+        for index in range(rows):
+            file.write(f'site{index}.example.com,user{index}@example.com,Password!{index},Some notes,Work,https://site{index}.example.com/login\n')
+
+
+def benchmark(rows: int) -> None:
+    """
+    Import a generated file into an empty vault and export it again.
+    """
+    writeCsv('import.csv', rows)
+    pm = PasswordManager("BenchmarkMasterPassword")
+    pm.loadData()
+    saves = 0
+    originalSave = pm.storage.save
+
+    def countingSave(data: object) -> None:
+        nonlocal saves
+        saves += 1
+        originalSave(data)  # type: ignore[arg-type]
+
+    pm.storage.save = countingSave  # type: ignore[method-assign]
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open('import.csv', newline='', encoding='utf-8') as file:
+        pm.importEntries(file)
+    importTime = time.perf_counter() - start
+    _, importPeak = tracemalloc.get_traced_memory()
+
+    reloaded = PasswordManager("BenchmarkMasterPassword")
+    reloaded.loadData()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with open('export.csv', 'w', newline='', encoding='utf-8') as file:
+        reloaded.exportEntries(file)
+    exportTime = time.perf_counter() - start
+    _, exportPeak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{rows:>7} rows: import {importTime:6.2f}s with {saves} write(s), peak {importPeak / 2 ** 20:7.1f} MiB; "
+          f"export {exportTime:6.2f}s, peak above the loaded vault {(exportPeak - baseline) / 2 ** 20:6.2f} MiB")
+
+
+def main() -> None:
+    """
+    Run every size in a temporary directory.
+    """
+    sizes = [int(argument) for argument in sys.argv[1:]] or [10000, 100000]
+    with temporaryWorkingDirectory():
+        for rows in sizes:
+            benchmark(rows)
+            os.remove('passwords.json')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark of bulk password generation: the batch generator against drawing characters one by one with rejection of
+passwords that miss a character class, as the password manager used to do.
+
+Run with: python -m benchmarks.benchPasswordGenerator [count] [length]
+"""
+import sys
+import time
+import string
+import random
+from typing import List
+from source.passwordGenerator import generateStrongPasswords
+
+
+def rejectionPasswords(count: int, length: int) -> List[str]:
+    """
+    Generate passwords by drawing every character separately and starting over until all classes are present.
+    """
+    characters = string.ascii_letters + string.digits + string.punctuation
+    generator = random.SystemRandom()
+    passwords: List[str] = []
+    while len(passwords) < count:
+        password = ''.join(generator.choice(characters) for _ in range(length))
+        if (any(c.islower() for c in password) and any(c.isupper() for c in password)
+                and any(c.isdigit() for c in password) and any(c in string.punctuation for c in password)):
+            passwords.append(password)
+    return passwords
+
+
+def main() -> None:
+    """
+    Time both generators.
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    for name, function in (('batch', generateStrongPasswords), ('rejection', rejectionPasswords)):
+        start = time.perf_counter()
+        passwords = function(count, length)
+        seconds = time.perf_counter() - start
+        print(f"{name:<10}: {count} passwords of {length} characters in {seconds:6.2f}s ({count / seconds:,.0f} per second), "
+              f"{len(set(passwords))} distinct")
+
+
+if __name__ == '__main__':
+    main()
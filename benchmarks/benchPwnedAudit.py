@@ -0,0 +1,76 @@
+"""
+Benchmark of a vault-wide Pwned Passwords audit against a local stand-in for the range API.
+The stand-in runs in its own process and delays each response to simulate the round trip to the real service.
+
+Run with: python -m benchmarks.benchPwnedAudit [entries] [latencySeconds]
+"""
+import sys
+import time
+import multiprocessing
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+from source.pwnedClient import PwnedPasswordsClient
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """
+    Serves an empty, padded range for every prefix.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Answer a range request.
+        """
+        time.sleep(getattr(self.server, 'latency'))
+        body = b'0000000000000000000000000000000000A:0'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # pylint: disable=redefined-builtin
+        """
+        Keep the benchmark output quiet.
+        """
+
+
+def serve(latency: float, ready: "multiprocessing.Queue[int]") -> None:
+    """
+    Run the stand-in server and report its port.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    setattr(server, 'latency', latency)
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def main() -> None:
+    """
+    Compare the serial per-password check with the batched client.
+    """
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    ready: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(latency, ready), daemon=True)
+    process.start()
+    url = f'http://127.0.0.1:{ready.get()}/range/'
+    passwords = [f'password{index}' for index in range(entries)]
+
+    sample = passwords[:200]
+    start = time.perf_counter()
+    for password in sample:
+        prefix, _ = PwnedPasswordsClient.splitHash(password)
+        requests.get(f'{url}{prefix}', timeout=5)
+    serial = (time.perf_counter() - start) / len(sample) * entries
+    print(f"serial requests.get (extrapolated): {serial:.2f}s for {entries} entries")
+
+    start = time.perf_counter()
+    PwnedPasswordsClient(baseUrl=url, maxWorkers=16).checkPasswords(passwords)
+    print(f"batched client: {time.perf_counter() - start:.2f}s for {entries} entries")
+    process.terminate()
+
+
+if __name__ == '__main__':
+    main()
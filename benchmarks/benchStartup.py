@@ -0,0 +1,64 @@
+"""
+Benchmark of the cold start of the command line interface: the import time of its modules as reported by
+python -X importtime against the budget, and the wall time of whole commands with and without a running agent.
+
+Run with: python -m benchmarks.benchStartup [runs]
+"""
+import os
+import sys
+import time
+import subprocess
+from typing import Dict, List
+from source.cli import IMPORT_TIME_BUDGET, MASTER_PASSWORD_VARIABLE
+from source.agent import VaultAgent, AGENT_SOCKET_VARIABLE
+from source.passwordManager import PasswordManager
+from benchmarks.workspace import temporaryWorkingDirectory
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def importTime(module: str) -> float:
+    """
+    Return the cumulative import time of a module in a fresh interpreter, in seconds.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    line = next(line for line in result.stderr.splitlines() if line.rstrip().endswith(f'| {module}'))
+    return int(line.split('|')[1]) / 1e6
+
+
+def commandTime(arguments: List[str], environment: Dict[str, str], runs: int) -> float:
+    """
+    Return the average wall time of running the command line interface with the given arguments.
+    """
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run([sys.executable, '-m', 'source.cli'] + arguments, env=environment, capture_output=True, check=False)
+    return (time.perf_counter() - start) / runs
+
+
+def main() -> None:
+    """
+    Measure the import times and the commands in a temporary directory.
+    """
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for module in ('source.cli', 'source.agent', 'source.passwordManager', 'source.pwnedClient'):
+        seconds = min(importTime(module) for _ in range(runs))
+        budget = f" (budget {IMPORT_TIME_BUDGET * 1000:.0f} ms)" if module == 'source.cli' else ''
+        print(f"import {module:<25}: {seconds * 1000:6.1f} ms{budget}")
+
+    with temporaryWorkingDirectory() as tempDir:
+        pm = PasswordManager("BenchmarkMasterPassword")
+        pm.addPassword('example.com', 'alice', 'Password!1')
+        environment = dict(os.environ, PYTHONPATH=PROJECT_ROOT, **{MASTER_PASSWORD_VARIABLE: "BenchmarkMasterPassword",
+                                                                  AGENT_SOCKET_VARIABLE: os.path.join(tempDir, 'agent.sock')})
+        print(f"--help                          : {commandTime(['--help'], environment, runs) * 1000:6.1f} ms")
+        print(f"get without agent               : {commandTime(['get', 'example.com'], environment, runs) * 1000:6.1f} ms")
+        pm.loadData()
+        agent = VaultAgent(pm, environment[AGENT_SOCKET_VARIABLE])
+        agent.start()
+        print(f"get through agent               : {commandTime(['get', 'example.com'], environment, runs) * 1000:6.1f} ms")
+        agent.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark of the storage backends: time to open a vault and latency of single lookups, updates and deletes
+with the encrypted file and with the SQLite backend.
+
+Run with: python -m benchmarks.benchStorage [entries]
+"""
+import sys
+import time
+from typing import Callable
+from source.passwordManager import PasswordManager
+from benchmarks.workspace import temporaryWorkingDirectory
+
+
+def measure(label: str, action: Callable[[], object], repeat: int = 1) -> None:
+    """
+    Run an action a number of times and print its average duration.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        action()
+    print(f"{label}: {(time.perf_counter() - start) / repeat * 1000:.2f} ms")
+
+
+def benchmark(storage: str, entries: int, journaled: bool = False) -> None:
+    """
+    Fill a vault with the given backend and measure opening it and changing single entries.
+    """
+    pm = PasswordManager("BenchmarkMasterPassword", journaled=journaled, storage=storage)
+    pm.loadData()
+    with pm.transaction():
+        for index in range(entries):
+            pm.addPassword(f'site{index}.example.com', f'user{index}', f'Password!{index}', 'Some notes about this account', 'Work')
+
+    label = storage + (' journaled' if journaled else '')
+    reloaded = PasswordManager("BenchmarkMasterPassword", journaled=journaled, storage=storage)
+
+    def openVault() -> object:
+        reloaded.loadData()
+        return reloaded.data.get('site0.example.com')
+
+    measure(f"{label} open and first lookup", openVault)
+    counter = iter(range(entries))
+    measure(f"{label} lookup", lambda: reloaded.getPassword(f'site{next(counter)}.example.com'), 100)
+    counter = iter(range(entries))
+    measure(f"{label} update", lambda: reloaded.updatePassword(f'site{next(counter)}.example.com', password='Changed!1'), 20)
+    counter = iter(range(entries))
+    measure(f"{label} delete", lambda: reloaded.deletePassword(f'site{next(counter)}.example.com'), 20)
+    reloaded.storage.close()
+    pm.storage.close()
+
+
+def main() -> None:
+    """
+    Run the benchmark for every backend in a temporary directory.
+    """
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with temporaryWorkingDirectory():
+        print(f"{entries} entries")
+        benchmark('file', entries)
+        benchmark('file', entries, journaled=True)
+        benchmark('sqlite', entries)
+
+
+if __name__ == '__main__':
+    main()
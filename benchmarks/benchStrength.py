@@ -0,0 +1,71 @@
+"""
+Benchmark of the strength estimator: single estimates per second, scoring a whole vault with pm.scoreAll the first and the
+second time, and the memory and lookup time of the compiled wordlist index compared with a set of the same words.
+
+Run with: python -m benchmarks.benchStrength [entries]
+"""
+import sys
+import time
+import tracemalloc
+from source.passwordManager import PasswordManager
+from source.passwordGenerator import generateStrongPasswords
+from source.strengthEstimator import WordlistIndex, estimateStrength, WORDLIST_PATH
+from benchmarks.workspace import temporaryWorkingDirectory
+
+
+def wordlistIndex() -> None:
+    """
+    Compare the traced memory and the lookups per second of the compiled index of the bundled wordlist with a set of its words.
+    """
+    tracemalloc.start()
+    index = WordlistIndex(WORDLIST_PATH)
+    index.compile()
+    indexSize, _ = tracemalloc.get_traced_memory()
+    with open(WORDLIST_PATH, encoding='utf-8') as file:
+        words = set(line.strip() for line in file)
+    setSize = tracemalloc.get_traced_memory()[0] - indexSize
+    tracemalloc.stop()
+    print(f"wordlist of {len(words)} words: index {indexSize / 1024:.0f} KiB, set {setSize / 1024:.0f} KiB")
+    lookups = [word for word in words if len(word) >= 4] + [word[:-1] + '~' for word in words if len(word) >= 4]  # Half of them miss
+    start = time.perf_counter()
+    for word in lookups:
+        index.rank(word)
+    indexSeconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for word in lookups:
+        _ = word in words
+    setSeconds = time.perf_counter() - start
+    print(f"lookups: index {len(lookups) / indexSeconds:,.0f} per second, set {len(lookups) / setSeconds:,.0f} per second")
+
+
+def main() -> None:
+    """
+    Run the measurements in a temporary directory.
+    """
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    passwords = generateStrongPasswords(entries // 2, 16) + [f'Summer{index % 100}!' for index in range(entries - entries // 2)]
+
+    start = time.perf_counter()
+    for password in passwords[:1000]:
+        estimateStrength(password)
+    print(f"estimateStrength: {1000 / (time.perf_counter() - start):,.0f} passwords per second")
+
+    wordlistIndex()
+
+    with temporaryWorkingDirectory():
+        pm = PasswordManager("BenchmarkMasterPassword")
+        pm.loadData()
+        with pm.transaction():
+            for number, password in enumerate(passwords):
+                pm.addPassword(f'site{number}.example.com', 'user', password)
+        for run in ('first', 'second'):
+            decryptions = pm.secrets.decryptions
+            start = time.perf_counter()
+            scores = pm.scoreAll()
+            seconds = time.perf_counter() - start
+            weak = sum(not score.strong for score in scores.values())
+            print(f"scoreAll of {entries} entries, {run} run: {seconds:6.3f}s, {pm.secrets.decryptions - decryptions} decryptions, {weak} weak")
+
+
+if __name__ == '__main__':
+    main()
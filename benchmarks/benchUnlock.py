@@ -0,0 +1,61 @@
+"""
+Benchmark of the unlock-time budget: the cost calibrate picks for several target latencies, the time of a cold unlock that
+derives the key, of a warm re-unlock served from the key cache, and of rejecting a wrong master password.
+
+Run with: python -m benchmarks.benchUnlock [targetSeconds ...]
+"""
+import sys
+import time
+from typing import Any, Dict
+from cryptography.fernet import InvalidToken
+from source.passwordManager import PasswordManager
+from source.keyDerivation import KEY_CACHE, calibrate
+from benchmarks.workspace import temporaryWorkingDirectory
+
+
+def unlockTime(masterPassword: str) -> float:
+    """
+    Measure loadData of the vault in the current directory.
+    """
+    pm = PasswordManager(masterPassword)
+    start = time.perf_counter()
+    try:
+        pm.loadData()
+    except InvalidToken:
+        pass
+    return time.perf_counter() - start
+
+
+def benchmark(targetSeconds: float, name: str) -> None:
+    """
+    Calibrate for a target latency, create a vault with that cost and time unlocking it.
+    """
+    start = time.perf_counter()
+    cost: Dict[str, Any] = calibrate(targetSeconds, name)
+    calibrationTime = time.perf_counter() - start
+    pm = PasswordManager("BenchmarkMasterPassword", kdf=cost)
+    pm.data = {f'site{index}.example.com': {'username': f'user{index}', 'password': f'Password!{index}'} for index in range(1000)}
+    pm.saveData()
+
+    KEY_CACHE.clear()
+    cold = unlockTime("BenchmarkMasterPassword")
+    warm = unlockTime("BenchmarkMasterPassword")
+    wrong = unlockTime("WrongPassword")
+    costLabel = f"n=2^{cost['n'].bit_length() - 1}" if name == 'scrypt' else f"{cost['iterations']} iterations"
+    print(f"target {targetSeconds:5.2f}s, {name:<6} {costLabel:<18}: calibration {calibrationTime:5.2f}s, "
+          f"cold unlock {cold * 1000:7.1f} ms, cached unlock {warm * 1000:6.1f} ms, wrong password {wrong * 1000:7.1f} ms")
+
+
+def main() -> None:
+    """
+    Run every target latency for both key derivation functions in a temporary directory.
+    """
+    targets = [float(argument) for argument in sys.argv[1:]] or [0.1, 0.25, 0.5, 1.0]
+    with temporaryWorkingDirectory():
+        for name in ('scrypt', 'pbkdf2'):
+            for targetSeconds in targets:
+                benchmark(targetSeconds, name)
+
+
+if __name__ == '__main__':
+    main()
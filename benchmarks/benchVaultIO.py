@@ -0,0 +1,69 @@
+"""
+Benchmark of saveData and loadData: time and peak traced memory of the streaming segmented format
+compared with encrypting the whole vault as a single Fernet token.
+
+Run with: python -m benchmarks.benchVaultIO [entries]
+"""
+import os
+import sys
+import json
+import time
+import tracemalloc
+from typing import Callable
+from cryptography.fernet import Fernet
+from source.passwordManager import PasswordManager
+from source.sealedSecrets import jsonDefault
+from benchmarks.workspace import temporaryWorkingDirectory
+
+
+def measure(label: str, action: Callable[[], object]) -> None:
+    """
+    Run an action and print its duration, its peak traced memory and the part of the peak that was only
+    needed temporarily, i.e. not retained by its result.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = action()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{label}: {elapsed:.2f}s, peak {peak / 2 ** 20:.1f} MiB, transient {(peak - current) / 2 ** 20:.1f} MiB")
+
+
+def main() -> None:
+    """
+    Build a vault in a temporary directory and measure both formats.
+    """
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with temporaryWorkingDirectory():
+        pm = PasswordManager("BenchmarkMasterPassword")
+        pm.data = {f'site{index}.example.com': {'username': f'user{index}', 'password': f'Password!{index}',
+                                                'createdAt': '2024-01-01T12:00:00', 'notes': 'Some notes about this account',
+                                                'category': 'Work'} for index in range(entries)}
+        fernet = Fernet(pm.key)
+
+        def saveSingleToken() -> None:
+            with open('single.json', 'wb') as file:
+                file.write(fernet.encrypt(json.dumps(pm.data, default=jsonDefault).encode()))
+
+        def loadSingleToken() -> object:
+            with open('single.json', 'rb') as file:
+                return json.loads(fernet.decrypt(file.read()).decode())
+
+        def loadSegmented() -> object:
+            reloaded = PasswordManager("BenchmarkMasterPassword")
+            reloaded.loadData()
+            return reloaded.data
+
+        print(f"{entries} entries")
+        measure("single token save", saveSingleToken)
+        measure("single token load", loadSingleToken)
+        measure("segmented save", pm.saveData)
+        measure("segmented load", loadSegmented)
+        print(f"file size: single token {os.path.getsize('single.json') / 2 ** 20:.1f} MiB, "
+              f"segmented {os.path.getsize('passwords.json') / 2 ** 20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark of serving requests for several vaults from one process: opening the vault for every request compared with
+the pool of unlocked vaults, with the pool's hit rate and memory estimate.
+
+Run with: python -m benchmarks.benchVaultPool [vaults] [entries] [requests]
+"""
+import sys
+import time
+import random
+from source.keyDerivation import KEY_CACHE
+from source.passwordManager import PasswordManager
+from source.vaultPool import VaultPool
+from benchmarks.workspace import temporaryWorkingDirectory
+
+MASTER_PASSWORD = "BenchmarkMasterPassword"
+
+
+def main() -> None:  # pylint: disable=too-many-locals
+    """
+    Create the vaults in a temporary directory and answer the same random lookups both ways.
+    """
+    vaults = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    entries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    with temporaryWorkingDirectory():
+        paths = [f'team{number}.json' for number in range(vaults)]
+        for path in paths:
+            pm = PasswordManager(MASTER_PASSWORD, path=path)
+            pm.loadData()
+            with pm.transaction():
+                for number in range(entries):
+                    pm.addPassword(f'site{number}.example.com', 'user', f'Password!{number}')
+        lookups = [(random.choice(paths), f'site{random.randrange(entries)}.example.com') for _ in range(requests)]
+
+        derivations = KEY_CACHE.derivations
+        start = time.perf_counter()
+        for path, site in lookups:
+            pm = PasswordManager(MASTER_PASSWORD, path=path)
+            pm.loadData()
+            pm.getPassword(site)
+            pm.lock()  # Also forgets the cached key, as a service handing out vaults per request would
+        seconds = time.perf_counter() - start
+        print(f"open per request: {seconds / requests * 1000:7.2f} ms per request, {KEY_CACHE.derivations - derivations} key derivations")
+
+        pool = VaultPool(maxVaults=vaults)
+        derivations = KEY_CACHE.derivations
+        start = time.perf_counter()
+        for path, site in lookups:
+            with pool.open(path, MASTER_PASSWORD) as pm:
+                pm.getPassword(site)
+        seconds = time.perf_counter() - start
+        metrics = pool.metrics()
+        print(f"vault pool      : {seconds / requests * 1000:7.2f} ms per request, {KEY_CACHE.derivations - derivations} key derivations, "
+              f"{metrics['hits']} hits, {metrics['misses']} misses, {metrics['memory'] / 2 ** 20:.1f} MiB estimated")
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
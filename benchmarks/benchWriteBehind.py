@@ -0,0 +1,55 @@
+"""
+Benchmark of write-behind saving: the time a burst of interactive mutations blocks the calling thread and the number of
+saves it causes, with a save after every mutation and with the write-behind saver.
+
+Run with: python -m benchmarks.benchWriteBehind [entries] [mutations]
+"""
+import sys
+import time
+from source.passwordManager import PasswordManager
+from benchmarks.workspace import temporaryWorkingDirectory
+
+
+def burst(pm: PasswordManager, mutations: int) -> float:
+    """
+    Apply a burst of updates and return the longest time a single one blocked the caller.
+    """
+    longest = 0.0
+    for number in range(mutations):
+        start = time.perf_counter()
+        pm.updatePassword(f'site{number}.example.com', password=f'Changed!{number}')
+        longest = max(longest, time.perf_counter() - start)
+    return longest
+
+
+def main() -> None:
+    """
+    Run both modes on the same vault in a temporary directory.
+    """
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    mutations = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with temporaryWorkingDirectory():
+        pm = PasswordManager("BenchmarkMasterPassword")
+        pm.loadData()
+        with pm.transaction():
+            for number in range(entries):
+                pm.addPassword(f'site{number}.example.com', 'user', f'Password!{number}')
+
+        start = time.perf_counter()
+        longest = burst(pm, mutations)
+        print(f"save per mutation: {mutations} mutations block for {time.perf_counter() - start:6.3f}s, "
+              f"longest {longest * 1000:7.1f} ms, {mutations} saves")
+
+        saver = pm.enableWriteBehind()
+        start = time.perf_counter()
+        longest = burst(pm, mutations)
+        blocked = time.perf_counter() - start
+        pm.flush()
+        metrics = saver.metrics()
+        print(f"write-behind     : {mutations} mutations block for {blocked:6.3f}s, longest {longest * 1000:7.1f} ms, "
+              f"{metrics['saves']} save(s) of {metrics['lastLatency'] * 1000:.0f} ms")
+        saver.close()
+
+
+if __name__ == '__main__':
+    main()
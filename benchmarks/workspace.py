@@ -0,0 +1,22 @@
+"""
+In this file, we will implement the temporary working directory the benchmarks create their vaults in.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def temporaryWorkingDirectory() -> Iterator[str]:
+    """
+    Change into a new temporary directory and yield its path. The previous working directory is restored and the
+    directory removed afterwards, so a benchmark never touches a vault in the directory it was started from.
+    """
+    previousDirectory = os.getcwd()
+    with tempfile.TemporaryDirectory() as tempDir:
+        os.chdir(tempDir)
+        try:
+            yield tempDir
+        finally:
+            os.chdir(previousDirectory)
@@ -1,11 +1,15 @@
 """
 Main file to run the password manager interface.
 """
+import os
 import curses
 from typing import Any
 import cryptography.fernet
 from source.passwordManager import PasswordManager
 from source.interface import CursesInterface
+from source.pwnedClient import PwnedPasswordsClient
+from source.rangeCache import RangeCache, rangeCachePath
+from source.breachCorpus import BreachCorpus
 
 
 
@@ -49,9 +53,17 @@ def main(stdscr: Any) -> None:
         try:
             masterPassword = getHiddenPassword(stdscr, "Enter your master password: ")
             pm = PasswordManager(masterPassword)
-            pm.loadData()  # Try to load the data to validate the password
+            pm.loadData(background=True)  # Validate the password against the header, decrypt while the menu is drawn
+            if os.path.exists('pwnedPasswords.bin'):
+                pm.pwnedBackend = BreachCorpus('pwnedPasswords.bin')
+            else:
+                pm.pwnedBackend = PwnedPasswordsClient(cache=RangeCache(rangeCachePath(pm.storage.path)))
             interface = CursesInterface(pm)
-            interface.run(stdscr)
+            try:
+                pm.enableWriteBehind()  # Save in the background, so the menu does not stall while a large vault is encrypted
+                interface.run(stdscr)
+            finally:
+                pm.lock()  # Saves pending mutations and stops the saver, also when the password turns out to be wrong
             break  # If the password is correct, proceed to the interface
 
         except cryptography.fernet.InvalidToken:
@@ -0,0 +1,3 @@
+"""
+Source package of the password manager.
+"""
@@ -0,0 +1,323 @@
+"""
+In this file, we will implement an agent that keeps a vault unlocked in the background and serves it over a Unix domain socket.
+
+Requests and responses are single lines of JSON. A request names a command and its arguments, for example
+{"command": "get", "site": "example.com"}, and the response is {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+The socket is only accessible by its owner, and on Linux connections from other users are rejected as well. It lives in a
+directory that must belong to the current user and be closed to everyone else, so no other user can plant a socket there.
+The client only needs the standard library, so scripts that talk to the agent start without importing the manager.
+"""
+import os
+import sys
+import json
+import stat
+import time
+import socket
+import struct
+import getpass
+import tempfile
+import threading
+import socketserver
+from typing import Dict, Any, Optional, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from source.passwordManager import PasswordManager
+
+DEFAULT_IDLE_TIMEOUT = 15 * 60.0
+AGENT_SOCKET_VARIABLE = 'PASSWORD_MANAGER_AGENT'
+PEER_CREDENTIALS = struct.Struct('3i')  # pid, uid, gid
+
+
+def defaultSocketPath() -> str:
+    """
+    Return the socket path from the environment, or one in a private directory of the current user, below XDG_RUNTIME_DIR if it is set.
+    """
+    if os.environ.get(AGENT_SOCKET_VARIABLE):
+        return os.environ[AGENT_SOCKET_VARIABLE]
+    runtimeDirectory = os.environ.get('XDG_RUNTIME_DIR')
+    if runtimeDirectory:
+        return os.path.join(runtimeDirectory, 'passwordManager', 'agent.sock')
+    return os.path.join(tempfile.gettempdir(), f'passwordManager-{os.getuid()}', 'agent.sock')
+
+
+def checkPrivateDirectory(directory: str) -> None:
+    """
+    Raise PermissionError unless the directory is a real directory of the current user with mode 0700, as a directory that
+    another user created or can write to may hold a socket of theirs.
+    """
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != 0o700:
+        raise PermissionError(f"Refusing the socket directory {directory}: it must be a directory of the current user with mode 0700.")
+
+
+def commandError(error: Exception) -> Optional[str]:
+    """
+    Return the message reported to the client for an error raised by a command, or None if it is not one to report.
+    """
+    import cryptography.fernet  # pylint: disable=import-outside-toplevel
+    from source.storage import VaultConflictError  # pylint: disable=import-outside-toplevel
+    if isinstance(error, cryptography.fernet.InvalidToken):
+        return "The master password is incorrect or the data is corrupted."
+    if isinstance(error, VaultConflictError):
+        return str(error)
+    if isinstance(error, OSError):
+        return f"The vault could not be accessed: {error}"
+    if isinstance(error, (KeyError, TypeError, ValueError)):
+        return f"Invalid request: {error}"
+    return None
+
+
+class AgentError(RuntimeError):
+    """
+    An error reported by the agent, for example because the vault is locked.
+    """
+
+
+class AgentRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Answers the requests of one connection, one line at a time.
+    """
+
+    server: 'AgentServer'
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            response = self.server.agent.handleLine(line)
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+
+
+class AgentServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    The socket server of the agent. Between requests it gives the agent the chance to lock itself.
+    """
+
+    def __init__(self, path: str, agent: 'VaultAgent') -> None:
+        self.agent: 'VaultAgent' = agent
+        self.daemon_threads = True  # pylint: disable=invalid-name
+        super().__init__(path, AgentRequestHandler)
+
+    def verify_request(self, request: Any, client_address: Any) -> bool:  # pylint: disable=invalid-name
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return True
+        _, uid, _ = PEER_CREDENTIALS.unpack(request.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, PEER_CREDENTIALS.size))
+        return bool(uid == os.getuid())
+
+    def service_actions(self) -> None:
+        self.agent.lockIfIdle()
+
+
+class VaultAgent:
+    """
+    Holds an unlocked PasswordManager and answers get, search and add requests for it. After idleTimeout seconds without a
+    request the manager is locked, which drops its entries and keys, until a client unlocks it again with the master password.
+    Requests are answered one at a time, as the manager is not thread safe.
+    """
+
+    def __init__(self, pm: 'PasswordManager', socketPath: Optional[str] = None, idleTimeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+        self.pm: 'PasswordManager' = pm
+        self.vaultPath: str = os.path.realpath(pm.storage.path)  # Reported by status, so clients only use the agent for this vault
+        self.socketPath: str = socketPath or defaultSocketPath()
+        self.idleTimeout: float = idleTimeout
+        self.lastUsed: float = time.monotonic()
+        self.locked: bool = False
+        self.requestLock: threading.Lock = threading.Lock()
+        self.server: Optional[AgentServer] = None
+        self.commands: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            'get': self.get, 'search': self.search, 'add': self.add, 'lock': self.lockVault, 'unlock': self.unlock, 'status': self.status,
+        }
+
+    def handleLine(self, line: bytes) -> Dict[str, Any]:
+        """
+        Parse a request line, run its command and return the response.
+        """
+        try:
+            request = json.loads(line)
+            name = request['command']
+            command = self.commands[name]
+        except (ValueError, KeyError, TypeError):
+            return {'ok': False, 'error': "Malformed request."}
+        with self.requestLock:
+            if name != 'status':  # Asking for the status does not keep the vault unlocked
+                self.lastUsed = time.monotonic()
+            if self.locked and name not in ('unlock', 'status'):
+                return {'ok': False, 'error': "The vault is locked."}
+            try:
+                return {'ok': True, 'result': command(request)}
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                message = commandError(exc)
+                if message is None:
+                    raise
+                return {'ok': False, 'error': message}
+
+    def get(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Return the decrypted entry of a site.
+        """
+        return self.pm.getPassword(request['site'])
+
+    def search(self, request: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the entries matching a keyword, without their secrets.
+        """
+        from source.sealedSecrets import SECRET_FIELDS  # pylint: disable=import-outside-toplevel
+        return {site: {field: value for field, value in entry.items() if field not in SECRET_FIELDS}
+                for site, entry in self.pm.searchPassword(request['keyword']).items()}
+
+    def add(self, request: Dict[str, Any]) -> None:
+        """
+        Add an entry to the vault.
+        """
+        self.pm.addPassword(request['site'], request.get('username'), request.get('password'), request.get('notes'), request.get('category'))
+
+    def lockVault(self, _request: Dict[str, Any]) -> None:
+        """
+        Lock the vault right away.
+        """
+        if not self.locked:
+            self.pm.lock()
+            self.locked = True
+
+    def unlock(self, request: Dict[str, Any]) -> None:
+        """
+        Unlock the vault with the master password sent by the client. Does nothing if it is not locked.
+        """
+        if not self.locked:
+            return
+        self.pm.masterPassword = request['masterPassword']
+        try:
+            self.pm.loadData()
+        except BaseException:
+            self.pm.lock()
+            raise
+        self.locked = False
+
+    def status(self, _request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Report the absolute path of the vault, whether it is locked and how long until it locks itself.
+        """
+        return {'vault': self.vaultPath, 'locked': self.locked,
+                'lockIn': None if self.locked else max(0.0, self.lastUsed + self.idleTimeout - time.monotonic())}
+
+    def lockIfIdle(self) -> None:
+        """
+        Lock the vault if no request arrived within the idle timeout.
+        """
+        with self.requestLock:
+            if not self.locked and time.monotonic() - self.lastUsed >= self.idleTimeout:
+                self.lockVault({})
+
+    def start(self) -> None:
+        """
+        Create the socket, readable only by the current user, and serve requests in a background thread.
+        """
+        directory = os.path.dirname(self.socketPath) or '.'
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        checkPrivateDirectory(directory)
+        if os.path.exists(self.socketPath):
+            os.unlink(self.socketPath)  # Left behind by an agent that did not shut down
+        previousMask = os.umask(0o177)
+        try:
+            self.server = AgentServer(self.socketPath, self)
+        finally:
+            os.umask(previousMask)
+        self.lastUsed = time.monotonic()
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': min(1.0, self.idleTimeout / 2)}, daemon=True).start()
+
+    def stop(self) -> None:
+        """
+        Stop serving, remove the socket and lock the vault.
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            if os.path.exists(self.socketPath):
+                os.unlink(self.socketPath)
+        with self.requestLock:
+            self.lockVault({})
+
+
+class AgentClient:
+    """
+    Sends requests to a running agent. Each request uses its own short connection.
+    """
+
+    def __init__(self, socketPath: Optional[str] = None, timeout: float = 5.0) -> None:
+        self.socketPath: str = socketPath or defaultSocketPath()
+        self.timeout: float = timeout
+
+    def request(self, command: str, **arguments: Any) -> Any:
+        """
+        Send a single request and return its result, raising AgentError if the agent reports an error.
+        """
+        checkPrivateDirectory(os.path.dirname(self.socketPath) or '.')  # Never send a master password to a planted socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self.timeout)
+            connection.connect(self.socketPath)
+            connection.sendall(json.dumps(dict(arguments, command=command)).encode() + b'\n')
+            with connection.makefile('rb') as responses:
+                response = json.loads(responses.readline())
+        if not response['ok']:
+            raise AgentError(response['error'])
+        return response['result']
+
+    def get(self, site: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve the decrypted entry of a site.
+        """
+        result: Optional[Dict[str, Any]] = self.request('get', site=site)
+        return result
+
+    def search(self, keyword: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Search the entries by keyword, without their secrets.
+        """
+        result: Dict[str, Dict[str, Any]] = self.request('search', keyword=keyword)
+        return result
+
+    def add(self, site: str, username: Optional[str] = None, password: Optional[str] = None, notes: Optional[str] = None, category: Optional[str] = None) -> None:  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Add an entry to the vault.
+        """
+        self.request('add', site=site, username=username, password=password, notes=notes, category=category)
+
+    def lock(self) -> None:
+        """
+        Lock the vault held by the agent.
+        """
+        self.request('lock')
+
+    def unlock(self, masterPassword: str) -> None:
+        """
+        Unlock the vault held by the agent.
+        """
+        self.request('unlock', masterPassword=masterPassword)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Return the absolute path of the vault, whether it is locked and the seconds until it locks itself.
+        """
+        result: Dict[str, Any] = self.request('status')
+        return result
+
+
+def main() -> None:
+    """
+    Unlock the vault in the current directory and serve it until interrupted.
+    """
+    from source.passwordManager import PasswordManager  # pylint: disable=import-outside-toplevel
+    idleTimeout = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_IDLE_TIMEOUT
+    pm = PasswordManager(getpass.getpass("Enter your master password: "))
+    pm.loadData()
+    agent = VaultAgent(pm, idleTimeout=idleTimeout)
+    agent.start()
+    print(f"{AGENT_SOCKET_VARIABLE}={agent.socketPath}; export {AGENT_SOCKET_VARIABLE}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        agent.stop()
+
+
+if __name__ == '__main__':
+    main()
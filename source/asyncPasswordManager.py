@@ -0,0 +1,168 @@
+"""
+In this file, we will implement the AsyncPasswordManager class that makes the PasswordManager usable from asyncio code.
+
+Loading, saving, decrypting and the breach check all block, so every call runs the wrapped manager on an executor and the
+event loop keeps serving other requests meanwhile. Writers wait for each other on an asyncio lock instead of occupying an
+executor thread each. Range queries of the Pwned Passwords API are fetched one task per hash prefix, and concurrent checks
+that need the same prefix share a single request.
+"""
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, TextIO, Tuple, TypeVar
+from source.entry import Entry
+from source.passwordManager import PasswordManager
+from source.vaultAudit import AuditReport
+
+Result = TypeVar('Result')
+
+
+class AsyncPasswordManager:
+    """
+    An asyncio facade of a PasswordManager. Its coroutines run the methods of the same name on the executor, the default
+    executor of the loop if none is given. The manager itself stays available as pm for anything that does not block.
+    """
+
+    def __init__(self, pm: PasswordManager, executor: Optional[Executor] = None) -> None:
+        self.pm: PasswordManager = pm
+        self.executor: Optional[Executor] = executor
+        self.writeLock: asyncio.Lock = asyncio.Lock()
+        self.rangeFetches: Dict[str, 'asyncio.Future[Optional[Set[str]]]'] = {}
+        self.rangeLimit: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    async def open(cls, masterPassword: str, executor: Optional[Executor] = None, **options: Any) -> 'AsyncPasswordManager':
+        """
+        Create a PasswordManager with the given options and load its vault without blocking the loop.
+        """
+        manager = cls(PasswordManager(masterPassword, **options), executor)
+        await manager.loadData()
+        return manager
+
+    async def run(self, function: Callable[..., Result], *arguments: Any, **keywordArguments: Any) -> Result:
+        """
+        Run a blocking function on the executor and wait for its result.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(function, *arguments, **keywordArguments))
+
+    async def write(self, function: Callable[..., Result], *arguments: Any, **keywordArguments: Any) -> Result:
+        """
+        Run a mutation on the executor once no other mutation of this facade is running.
+        """
+        async with self.writeLock:
+            return await self.run(function, *arguments, **keywordArguments)
+
+    async def loadData(self) -> None:
+        """
+        Derive the key and load the vault.
+        """
+        await self.write(self.pm.loadData)
+
+    async def saveData(self) -> None:
+        """
+        Save all entries.
+        """
+        await self.write(self.pm.saveData)
+
+    async def flush(self) -> None:
+        """
+        Save the mutations the write-behind saver has not saved yet.
+        """
+        await self.write(self.pm.flush)
+
+    async def lock(self) -> None:
+        """
+        Lock the vault, saving pending mutations first.
+        """
+        await self.write(self.pm.lock)
+
+    async def addPassword(self, site: str, username: Optional[str] = None, password: Optional[str] = None, notes: Optional[str] = None,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                          category: Optional[str] = None) -> None:
+        """
+        Add a new password entry and save it.
+        """
+        await self.write(self.pm.addPassword, site, username, password, notes, category)
+
+    async def updatePassword(self, site: str, username: Optional[str] = None, password: Optional[str] = None, notes: Optional[str] = None,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                             category: Optional[str] = None) -> None:
+        """
+        Update an existing password entry and save it.
+        """
+        await self.write(self.pm.updatePassword, site, username, password, notes, category)
+
+    async def deletePassword(self, site: str) -> None:
+        """
+        Delete a password entry and save the vault.
+        """
+        await self.write(self.pm.deletePassword, site)
+
+    async def importEntries(self, stream: TextIO, format: str = 'csv', conflict: str = 'skip') -> Dict[str, int]:  # pylint: disable=redefined-builtin
+        """
+        Import the rows of a CSV file and save once at the end.
+        """
+        return await self.write(self.pm.importEntries, stream, format, conflict)
+
+    async def getPassword(self, site: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a password entry with its password and notes decrypted.
+        """
+        return await self.run(self.pm.getPassword, site)
+
+    async def searchPassword(self, keyword: str) -> Dict[str, Entry]:
+        """
+        Search for password entries whose site, username or category contain a keyword.
+        """
+        return await self.run(self.pm.searchPassword, keyword)
+
+    async def checkPasswordStrength(self, password: str) -> Tuple[bool, List[str]]:
+        """
+        Check the strength of a password, returning the reasons if it is weak.
+        """
+        return await self.run(self.pm.checkPasswordStrength, password)
+
+    async def audit(self, pwned: bool = True) -> AuditReport:
+        """
+        Check every password for strength, reuse and, unless pwned is False, breaches. Runs as a mutation, since it fills the
+        result cache and walks the entries that mutations change.
+        """
+        return await self.write(self.pm.audit, pwned)
+
+    async def checkPwnedPassword(self, password: str) -> bool:
+        """
+        Check if a password has been compromised.
+        """
+        return (await self.checkPwnedPasswords([password]))[password]
+
+    async def checkPwnedPasswords(self, passwords: Iterable[str]) -> Dict[str, bool]:
+        """
+        Check many passwords at once. With the Pwned Passwords API every hash prefix is fetched by its own task, at most as many
+        at a time as the client has connections, and a prefix another check is fetching already is not requested again.
+        A local breach corpus is searched on the executor.
+        """
+        client: Any = self.pm.breachBackend()
+        if not hasattr(client, 'fetchRange'):  # Only the API client fetches ranges
+            return await self.run(self.pm.checkPwnedPasswords, list(passwords))
+        suffixesByPrefix = client.groupByPrefix(passwords)
+        prefixes = list(suffixesByPrefix)
+        ranges = await asyncio.gather(*(self.fetchRange(client, prefix) for prefix in prefixes))
+        results: Dict[str, bool] = client.matchRanges(suffixesByPrefix, dict(zip(prefixes, ranges)))
+        return results
+
+    async def fetchRange(self, client: Any, prefix: str) -> Optional[Set[str]]:
+        """
+        Fetch the range of a prefix on the executor, or wait for the fetch of it that is already running.
+        """
+        fetch = self.rangeFetches.get(prefix)
+        if fetch is None:
+            if self.rangeLimit is None:
+                self.rangeLimit = asyncio.Semaphore(client.maxWorkers)
+            fetch = self.rangeFetches[prefix] = asyncio.ensure_future(self.fetchLimited(client, prefix, self.rangeLimit))
+            fetch.add_done_callback(lambda _: self.rangeFetches.pop(prefix, None))
+        return await asyncio.shield(fetch)
+
+    async def fetchLimited(self, client: Any, prefix: str, limit: asyncio.Semaphore) -> Optional[Set[str]]:
+        """
+        Fetch one range once fewer than the limit of fetches are running.
+        """
+        async with limit:
+            return await self.run(client.fetchRange, prefix)
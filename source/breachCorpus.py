@@ -0,0 +1,159 @@
+"""
+In this file, we will implement the BreachCorpus class that checks passwords against a local copy of the Pwned Passwords corpus.
+
+Convert a downloaded corpus of "SHA1:count" lines once with:
+    python -m source.breachCorpus pwnedPasswords.txt pwnedPasswords.bin
+"""
+import os
+import sys
+import mmap
+import heapq
+import struct
+import hashlib
+import tempfile
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+CORPUS_MAGIC = b'PMBREACH'
+CORPUS_VERSION = 1
+HEADER = struct.Struct('>8sII')  # magic, version, record size
+RECORD = struct.Struct('>20sI')  # SHA-1 digest, breach count
+DIGEST_SIZE = 20
+
+
+def parseCorpusLines(lines: Iterable[bytes]) -> Iterator[Tuple[bytes, int]]:
+    """
+    Parse "SHA1HEX:count" lines into digest and count pairs. Lines without a count are counted once.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        hexDigest, _, count = line.partition(b':')
+        yield bytes.fromhex(hexDigest.decode()), int(count) if count else 1
+
+
+def writeRun(records: List[Tuple[bytes, int]], directory: str) -> str:
+    """
+    Sort a run of records and write it to a temporary file, returning its path.
+    """
+    records.sort()
+    descriptor, path = tempfile.mkstemp(dir=directory, suffix='.run')
+    with os.fdopen(descriptor, 'wb') as file:
+        for digest, count in records:
+            file.write(RECORD.pack(digest, count))
+    return path
+
+
+def readRun(path: str) -> Iterator[Tuple[bytes, int]]:
+    """
+    Read back the records of a sorted run.
+    """
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(RECORD.size * 4096)
+            if not chunk:
+                return
+            yield from RECORD.iter_unpack(chunk)
+
+
+def writeMerged(runs: List[str], target: BinaryIO) -> int:
+    """
+    Merge sorted runs into the target file, adding up the counts of duplicate hashes. Returns the number of records written.
+    """
+    written = 0
+    target.write(HEADER.pack(CORPUS_MAGIC, CORPUS_VERSION, RECORD.size))
+    previousDigest, previousCount = b'', 0
+    for digest, count in heapq.merge(*(readRun(path) for path in runs)):
+        if digest == previousDigest:
+            previousCount += count
+            continue
+        if previousDigest:
+            target.write(RECORD.pack(previousDigest, min(previousCount, 0xFFFFFFFF)))
+            written += 1
+        previousDigest, previousCount = digest, count
+    if previousDigest:
+        target.write(RECORD.pack(previousDigest, min(previousCount, 0xFFFFFFFF)))
+        written += 1
+    return written
+
+
+def convertCorpus(sourcePath: str, targetPath: str, runRecords: int = 4000000) -> int:
+    """
+    Convert a text corpus into the sorted fixed-width binary format, using an external merge sort
+    so inputs larger than memory can be converted. Returns the number of records written.
+    """
+    directory = os.path.dirname(os.path.abspath(targetPath))
+    runs: List[str] = []
+    try:
+        records: List[Tuple[bytes, int]] = []
+        with open(sourcePath, 'rb') as source:
+            for record in parseCorpusLines(source):
+                records.append(record)
+                if len(records) >= runRecords:
+                    runs.append(writeRun(records, directory))
+                    records = []
+        runs.append(writeRun(records, directory))
+
+        with open(targetPath + '.tmp', 'wb') as target:
+            written = writeMerged(runs, target)
+        os.replace(targetPath + '.tmp', targetPath)
+        return written
+    finally:
+        for path in runs:
+            os.remove(path)
+
+
+class BreachCorpus:
+    """
+    A memory-mapped, sorted corpus of SHA-1 password hashes that answers lookups with a binary search.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        with open(path, 'rb') as file:
+            magic, version, recordSize = HEADER.unpack(file.read(HEADER.size))
+            if magic != CORPUS_MAGIC or version != CORPUS_VERSION or recordSize != RECORD.size:
+                raise ValueError(f"{path} is not a converted breach corpus.")
+            self.map: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.recordCount: int = (len(self.map) - HEADER.size) // RECORD.size
+
+    def countDigest(self, digest: bytes) -> int:
+        """
+        Return how often a SHA-1 digest occurs in the corpus, or 0 if it does not.
+        """
+        low, high = 0, self.recordCount
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            candidate = self.map[offset:offset + DIGEST_SIZE]
+            if candidate < digest:
+                low = middle + 1
+            elif candidate > digest:
+                high = middle
+            else:
+                return int(RECORD.unpack_from(self.map, offset)[1])
+        return 0
+
+    def count(self, password: str) -> int:
+        """
+        Return how often a password occurs in the corpus.
+        """
+        return self.countDigest(hashlib.sha1(password.encode()).digest())
+
+    def checkPasswords(self, passwords: Iterable[str]) -> Dict[str, bool]:
+        """
+        Check which of the given passwords occur in the corpus.
+        """
+        return {password: self.count(password) > 0 for password in set(passwords)}
+
+    def close(self) -> None:
+        """
+        Unmap the corpus file.
+        """
+        self.map.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python -m source.breachCorpus <corpus.txt> <corpus.bin>")
+    print(f"Wrote {convertCorpus(sys.argv[1], sys.argv[2])} records to {sys.argv[2]}")
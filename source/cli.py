@@ -0,0 +1,200 @@
+"""
+In this file, we will implement a non-interactive command line interface for scripts.
+
+Run with: python -m source.cli <get|add|search|audit|import|export> ...
+
+Only the standard library is imported at startup. The manager, cryptography and requests are imported by the subcommands
+that need them, so a command that is answered by a running agent never imports them at all.
+"""
+import os
+import sys
+import json
+import getpass
+import argparse
+import contextlib
+from typing import Any, List, Optional, TextIO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from source.passwordManager import PasswordManager
+
+MASTER_PASSWORD_VARIABLE = 'PASSWORD_MANAGER_MASTER_PASSWORD'
+FORMATS = ['csv', 'bitwarden', 'lastpass', 'chrome']  # The formats of source.importExport, listed here so it is not imported at startup
+DEFAULT_VAULT_PATH = 'passwords.json'  # The default file vault of PasswordManager, for the same reason
+IMPORT_TIME_BUDGET = 0.03  # Seconds that importing this module may take, checked by the tests
+
+
+def openVault(arguments: argparse.Namespace) -> 'PasswordManager':
+    """
+    Unlock the vault with the master password from the environment, or ask for it on the terminal.
+    A wrong master password is reported as PermissionError.
+    """
+    import cryptography.fernet  # pylint: disable=import-outside-toplevel
+    from source.passwordManager import PasswordManager  # pylint: disable=import-outside-toplevel
+    masterPassword = os.environ.get(MASTER_PASSWORD_VARIABLE)
+    if masterPassword is None:
+        masterPassword = getpass.getpass("Enter your master password: ")
+    pm = PasswordManager(masterPassword, storage=arguments.storage, path=arguments.vault)
+    try:
+        pm.loadData()
+    except cryptography.fernet.InvalidToken:
+        raise PermissionError("The master password is incorrect or the data is corrupted.") from None
+    return pm
+
+
+def askAgent(arguments: argparse.Namespace, command: str, **requestArguments: Any) -> Any:
+    """
+    Send a request to a running agent. Returns NotImplemented if there is no agent, its vault is locked or it is not the vault
+    the command would open, so the caller opens the vault itself.
+    """
+    if arguments.noAgent or arguments.storage != 'file':  # The agent serves a vault file
+        return NotImplemented
+    from source.agent import AgentClient, AgentError, defaultSocketPath  # pylint: disable=import-outside-toplevel
+    if not os.path.exists(defaultSocketPath()):
+        return NotImplemented
+    try:
+        client = AgentClient()
+        if client.status().get('vault') != os.path.realpath(arguments.vault or DEFAULT_VAULT_PATH):
+            return NotImplemented
+        return client.request(command, **requestArguments)
+    except (OSError, AgentError):
+        return NotImplemented
+
+
+def commandGet(arguments: argparse.Namespace, output: TextIO) -> int:
+    """
+    Print the password of a site, another field with --field, or the whole entry as JSON with --json.
+    """
+    entry = askAgent(arguments, 'get', site=arguments.site)
+    if entry is NotImplemented:
+        entry = openVault(arguments).getPassword(arguments.site)
+    if entry is None:
+        print(f"No entry for {arguments.site}.", file=sys.stderr)
+        return 1
+    if arguments.json:
+        print(json.dumps(entry), file=output)
+    else:
+        value = entry.get(arguments.field)
+        print('' if value is None else value, file=output)
+    return 0
+
+
+def commandAdd(arguments: argparse.Namespace, output: TextIO) -> int:
+    """
+    Add an entry, with a generated password if none is given. A generated password is printed.
+    """
+    password = arguments.password
+    if password is None:
+        from source.passwordGenerator import DEFAULT_GENERATOR  # pylint: disable=import-outside-toplevel
+        password = DEFAULT_GENERATOR.generate(max(arguments.length, 8))
+        print(password, file=output)
+    fields = {'site': arguments.site, 'username': arguments.username, 'password': password, 'notes': arguments.notes, 'category': arguments.category}
+    if askAgent(arguments, 'add', **fields) is not NotImplemented:
+        return 0
+    openVault(arguments).addPassword(**fields)
+    return 0
+
+
+def commandSearch(arguments: argparse.Namespace, output: TextIO) -> int:
+    """
+    Print the site, username and category of every entry matching a keyword, one per line.
+    """
+    results: Any = askAgent(arguments, 'search', keyword=arguments.keyword)
+    if results is NotImplemented:
+        results = openVault(arguments).searchPassword(arguments.keyword)
+    for site in sorted(results):
+        print(f"{site}\t{results[site].get('username') or ''}\t{results[site].get('category') or ''}", file=output)
+    return 0
+
+
+def commandAudit(arguments: argparse.Namespace, output: TextIO) -> int:
+    """
+    Report weak and reused passwords, and with --pwned also compromised ones. Returns 1 if anything was found.
+    """
+    findings = openVault(arguments).audit(pwned=arguments.pwned).findings()
+    for finding in findings:
+        print(finding, file=output)
+    return 1 if findings else 0
+
+
+def commandImport(arguments: argparse.Namespace, output: TextIO) -> int:
+    """
+    Import the entries of a CSV file in the given format, saving once at the end.
+    """
+    pm = openVault(arguments)
+    with (contextlib.nullcontext(sys.stdin) if arguments.file == '-' else open(arguments.file, newline='', encoding='utf-8')) as file:
+        counts = pm.importEntries(file, arguments.format, arguments.conflict, lambda count: print(f"{count} rows read", file=sys.stderr))
+    print(f"Imported {counts['added']} new, {counts['updated']} updated and {counts['skipped']} skipped entries.", file=output)
+    return 0
+
+
+def commandExport(arguments: argparse.Namespace, output: TextIO) -> int:
+    """
+    Write all entries with their decrypted passwords to a CSV file in the given format, or to the output for '-'.
+    """
+    pm = openVault(arguments)
+    with (contextlib.nullcontext(output) if arguments.file == '-' else open(arguments.file, 'w', newline='', encoding='utf-8')) as file:
+        pm.exportEntries(file, arguments.format)
+    return 0
+
+
+def buildParser() -> argparse.ArgumentParser:
+    """
+    Create the parser of the command line with one subparser per command.
+    """
+    parser = argparse.ArgumentParser(prog='python -m source.cli', description="Access the password vault from scripts.")
+    parser.add_argument('--storage', choices=['file', 'sqlite'], default='file', help="storage backend of the vault")
+    parser.add_argument('--vault', help="path of the vault, passwords.json or passwords.db in the current directory by default")
+    parser.add_argument('--no-agent', dest='noAgent', action='store_true', help="open the vault even if an agent is running")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    get = commands.add_parser('get', help="print a password or another field of an entry")
+    get.add_argument('site')
+    get.add_argument('--field', default='password', help="field to print instead of the password")
+    get.add_argument('--json', action='store_true', help="print the whole entry as JSON")
+    get.set_defaults(handler=commandGet)
+
+    add = commands.add_parser('add', help="add an entry, generating its password if none is given")
+    add.add_argument('site')
+    add.add_argument('--username')
+    add.add_argument('--password')
+    add.add_argument('--notes')
+    add.add_argument('--category')
+    add.add_argument('--length', type=int, default=16, help="length of a generated password")
+    add.set_defaults(handler=commandAdd)
+
+    search = commands.add_parser('search', help="search entries by site, username or category")
+    search.add_argument('keyword')
+    search.set_defaults(handler=commandSearch)
+
+    audit = commands.add_parser('audit', help="report weak and reused passwords")
+    audit.add_argument('--pwned', action='store_true', help="also check the passwords against the Pwned Passwords API")
+    audit.set_defaults(handler=commandAudit)
+
+    importCommand = commands.add_parser('import', help="import entries from a CSV file")
+    importCommand.add_argument('file', help="CSV file to read, - for standard input")
+    importCommand.add_argument('--format', choices=FORMATS, default='csv', help="layout of the file")
+    importCommand.add_argument('--conflict', choices=['skip', 'overwrite', 'merge'], default='skip', help="what to do with sites that exist already")
+    importCommand.set_defaults(handler=commandImport)
+
+    export = commands.add_parser('export', help="export all entries to a CSV file")
+    export.add_argument('file', help="CSV file to write, - for standard output")
+    export.add_argument('--format', choices=FORMATS, default='csv', help="layout of the file")
+    export.set_defaults(handler=commandExport)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, output: TextIO = sys.stdout) -> int:
+    """
+    Run a command and return its exit status.
+    """
+    arguments = buildParser().parse_args(argv)
+    try:
+        status: int = arguments.handler(arguments, output)
+        return status
+    except (ValueError, PermissionError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
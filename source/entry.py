@@ -0,0 +1,139 @@
+"""
+In this file, we will implement the Entry class that holds a single vault entry with less memory than a dict.
+"""
+import sys
+import copy
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, Mapping, MutableMapping, Optional, Tuple, Union
+
+ENTRY_FIELDS = ('username', 'password', 'notes', 'category', 'createdAt')
+INTERNED_FIELDS = ('username', 'category')
+EPOCH = datetime(1, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def toTimestamp(value: str) -> Optional[int]:
+    """
+    Convert a naive ISO timestamp to microseconds, or return None if it would not convert back to the same string.
+    """
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None or moment.isoformat() != value:
+        return None
+    return (moment - EPOCH) // MICROSECOND
+
+
+def formatTimestamp(value: int) -> str:
+    """
+    Convert microseconds back to the ISO timestamp they were created from.
+    """
+    return (EPOCH + value * MICROSECOND).isoformat()
+
+
+class Entry(MutableMapping[str, Any]):
+    """
+    A vault entry with a slot per known field instead of a dict. Usernames and categories are interned, so entries sharing them
+    share one string, and createdAt is kept as integer microseconds. It reads and writes like the dict entries it replaces:
+    createdAt is returned as an ISO string and fields that were never set are absent. Other fields are kept in a small dict.
+    """
+
+    __slots__ = ('username', 'password', 'notes', 'category', 'createdAt', 'extras')
+    username: Optional[str]
+    password: Any
+    notes: Any
+    category: Optional[str]
+    createdAt: Union[int, str, None]
+    extras: Dict[str, Any]
+
+    def __init__(self, fields: Optional[Mapping[str, Any]] = None) -> None:
+        if fields is not None:
+            for field, value in fields.items():
+                self[field] = value
+
+    def __getitem__(self, field: str) -> Any:
+        if field in ENTRY_FIELDS:
+            try:
+                value = getattr(self, field)
+            except AttributeError:
+                raise KeyError(field) from None
+            return formatTimestamp(value) if field == 'createdAt' and isinstance(value, int) else value
+        try:
+            return self.extras[field]
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __setitem__(self, field: str, value: Any) -> None:
+        if field not in ENTRY_FIELDS:
+            try:
+                self.extras[field] = value
+            except AttributeError:
+                self.extras = {field: value}
+            return
+        if field in INTERNED_FIELDS and type(value) is str:  # pylint: disable=unidiomatic-typecheck
+            value = sys.intern(value)
+        elif field == 'createdAt' and isinstance(value, str):
+            timestamp = toTimestamp(value)
+            value = timestamp if timestamp is not None else value
+        setattr(self, field, value)
+
+    def __delitem__(self, field: str) -> None:
+        try:
+            if field in ENTRY_FIELDS:
+                delattr(self, field)
+            else:
+                del self.extras[field]
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __iter__(self) -> Iterator[str]:
+        for field in ENTRY_FIELDS:
+            if hasattr(self, field):
+                yield field
+        if hasattr(self, 'extras'):
+            yield from self.extras
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f'Entry({dict(self)!r})'
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'Entry':
+        duplicate = self.copy()
+        if hasattr(self, 'extras'):
+            duplicate.extras = copy.deepcopy(self.extras, memo)
+        return duplicate
+
+    def rawItems(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate over the fields as they are stored, with createdAt as integer microseconds if it could be converted.
+        """
+        for field in ENTRY_FIELDS:
+            try:
+                yield field, getattr(self, field)
+            except AttributeError:
+                pass
+        if hasattr(self, 'extras'):
+            yield from self.extras.items()
+
+    def copy(self) -> 'Entry':
+        """
+        Return a shallow copy of the entry.
+        """
+        duplicate = Entry()
+        for field in self.__slots__:
+            try:
+                value = getattr(self, field)
+            except AttributeError:
+                continue
+            setattr(duplicate, field, dict(value) if field == 'extras' else value)
+        return duplicate
+
+
+def toEntry(entry: Union['Entry', Mapping[str, Any]]) -> 'Entry':
+    """
+    Return the entry itself if it is an Entry, otherwise an Entry with the same fields.
+    """
+    return entry if isinstance(entry, Entry) else Entry(entry)
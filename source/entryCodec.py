@@ -0,0 +1,266 @@
+"""
+In this file, we will implement the codecs that serialize vault entries inside the encrypted vault body.
+
+The codec of a vault is recorded by name in its header, vaults without one were written with the JSON codec.
+The binary codec writes each entry as a fixed-size record header followed by the raw bytes of its fields:
+
+    flags (2 bytes), lengths of site, username, password, notes, category and extras (4 bytes each), createdAt (8 bytes)
+
+The flags hold two bits per known field telling whether it is absent, None, text or stored in its compact form:
+sealed secrets as raw token bytes, createdAt as microseconds, and categories as an index into the categories that
+appeared earlier in the same stream. Any other field is kept in the extras as JSON.
+"""
+import json
+import struct
+import binascii
+import sys
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, Optional, Tuple
+from source.entry import Entry, toTimestamp
+from source.sealedSecrets import SealedSecret, jsonDefault, restoreSealed
+
+JSON_CODEC_NAME = 'json'
+BINARY_CODEC_NAME = 'binary1'
+RECORD_HEADER = struct.Struct('>HIIIIIIq')
+FIELD_POSITIONS = {'username': 0, 'password': 1, 'notes': 2, 'category': 3, 'createdAt': 4}
+FIELD_NONE = 1
+FIELD_TEXT = 2
+FIELD_COMPACT = 3
+FINGERPRINT_FLAG = 1 << 10
+FINGERPRINT_SIZE = 32
+TO_URLSAFE = bytes.maketrans(b'+/', b'-_')
+FROM_URLSAFE = bytes.maketrans(b'-_', b'+/')
+
+
+class EntryCodec(ABC):
+    """
+    Serializes a stream of (site, entry) pairs to bytes and back into Entry objects. Sealed secrets are kept as SealedSecret objects.
+    """
+
+    name: str = ''
+
+    @abstractmethod
+    def encodeEntries(self, entries: Iterable[Tuple[str, Mapping[str, Any]]]) -> Iterator[bytes]:
+        """
+        Serialize entries into a stream of byte strings.
+        """
+
+    @abstractmethod
+    def decodeEntries(self, chunks: Iterable[bytes]) -> Iterator[Tuple[str, Entry]]:
+        """
+        Parse entries from a stream of chunks that may split them at arbitrary positions.
+        """
+
+    def encodeEntry(self, site: str, entry: Mapping[str, Any]) -> bytes:
+        """
+        Serialize a single entry on its own.
+        """
+        return b''.join(self.encodeEntries([(site, entry)]))
+
+    def decodeEntry(self, data: bytes) -> Tuple[str, Entry]:
+        """
+        Parse a single entry serialized by encodeEntry.
+        """
+        return next(self.decodeEntries([data]))
+
+
+class JsonCodec(EntryCodec):
+    """
+    One JSON array [site, entry] per line.
+    """
+
+    name = JSON_CODEC_NAME
+
+    def encodeEntries(self, entries: Iterable[Tuple[str, Mapping[str, Any]]]) -> Iterator[bytes]:
+        for site, entry in entries:
+            yield json.dumps([site, entry], default=jsonDefault).encode() + b'\n'
+
+    def decodeEntries(self, chunks: Iterable[bytes]) -> Iterator[Tuple[str, Entry]]:
+        pending = b''
+        for chunk in chunks:
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                if line:
+                    yield self.decodeLine(line)
+        if pending.strip():
+            yield self.decodeLine(pending)
+
+    @staticmethod
+    def decodeLine(line: bytes) -> Tuple[str, Entry]:
+        """
+        Parse a single line. Database rows written before codecs were recorded hold only the entry object, their site is left empty.
+        """
+        value = json.loads(line)
+        if isinstance(value, dict):
+            return '', restoreSealed(value)
+        return value[0], restoreSealed(value[1])
+
+
+def hasCompactForm(position: int, secret: SealedSecret) -> bool:
+    """
+    Check whether a sealed secret can be stored as raw bytes: passwords with or without a fingerprint and notes without one.
+    """
+    if secret.fingerprint is None:
+        return position in (1, 2)
+    return position == 1 and len(secret.fingerprint) == 2 * FINGERPRINT_SIZE
+
+
+class BinaryCodec(EntryCodec):
+    """
+    Length-prefixed binary records with integer timestamps and interned categories.
+    """
+
+    name = BINARY_CODEC_NAME
+
+    def encodeEntries(self, entries: Iterable[Tuple[str, Mapping[str, Any]]]) -> Iterator[bytes]:
+        categories: Dict[str, int] = {}
+        for site, entry in entries:
+            yield self.encodeRecord(site, entry, categories)
+
+    @staticmethod
+    def encodeRecord(site: str, entry: Mapping[str, Any], categories: Dict[str, int]) -> bytes:  # pylint: disable=too-many-locals,too-many-branches
+        """
+        Serialize a single entry, interning its category in the categories of the stream.
+        """
+        flags = 0
+        payloads = [b'', b'', b'', b'']  # username, password, notes, category
+        categoryValue = 0
+        createdAt = 0
+        fingerprint = b''
+        extras: Dict[str, Any] = {}
+        for field, value in (entry.rawItems() if isinstance(entry, Entry) else entry.items()):
+            position = FIELD_POSITIONS.get(field)
+            if position is None:
+                extras[field] = value
+            elif value is None:
+                flags |= FIELD_NONE << 2 * position
+            elif position == 4 and isinstance(value, int):
+                flags |= FIELD_COMPACT << 2 * position
+                createdAt = value
+            elif isinstance(value, SealedSecret) and hasCompactForm(position, value):
+                flags |= FIELD_COMPACT << 2 * position
+                payloads[position] = binascii.a2b_base64(value.token.encode().translate(FROM_URLSAFE))
+                if position == 1 and value.fingerprint is not None:
+                    flags |= FINGERPRINT_FLAG
+                    fingerprint = bytes.fromhex(value.fingerprint)
+            elif not isinstance(value, str):
+                extras[field] = value
+            elif position == 3 and value in categories:
+                flags |= FIELD_COMPACT << 2 * position
+                categoryValue = categories[value]
+            elif position == 4:
+                timestamp = toTimestamp(value)
+                if timestamp is None:
+                    extras[field] = value
+                else:
+                    flags |= FIELD_COMPACT << 2 * position
+                    createdAt = timestamp
+            else:
+                flags |= FIELD_TEXT << 2 * position
+                payloads[position] = value.encode()
+                if position == 3:
+                    categories[value] = len(categories)
+                    categoryValue = len(payloads[3])
+        siteBytes = site.encode()
+        extrasBytes = json.dumps(extras, default=jsonDefault).encode() if extras else b''
+        header = RECORD_HEADER.pack(flags, len(siteBytes), len(payloads[0]), len(payloads[1]), len(payloads[2]),
+                                    categoryValue, len(extrasBytes), createdAt)
+        return b''.join((header, siteBytes, payloads[0], payloads[1], fingerprint, payloads[2], payloads[3], extrasBytes))
+
+    def decodeEntries(self, chunks: Iterable[bytes]) -> Iterator[Tuple[str, Entry]]:
+        categories: List[str] = []
+        buffer = b''
+        for chunk in chunks:
+            buffer += chunk
+            offset = 0
+            while True:
+                record = self.decodeRecord(buffer, offset, categories)
+                if record is None:
+                    break
+                site, entry, offset = record
+                yield site, entry
+            buffer = buffer[offset:]
+        if buffer:
+            raise ValueError("The vault data ends in the middle of an entry.")
+
+    @staticmethod
+    def decodeRecord(buffer: bytes, offset: int, categories: List[str]) -> Optional[Tuple[str, Entry, int]]:  # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+        """
+        Parse the record starting at offset, returning its site, its entry and the offset of the next record,
+        or None if the buffer does not hold all of it yet. The fields are unrolled since this runs once per entry on every load.
+        """
+        if len(buffer) - offset < RECORD_HEADER.size:
+            return None
+        flags, siteLength, usernameLength, passwordLength, notesLength, categoryValue, extrasLength, createdAt = RECORD_HEADER.unpack_from(buffer, offset)
+        categoryState = (flags >> 6) & 3
+        fingerprintLength = FINGERPRINT_SIZE if flags & FINGERPRINT_FLAG else 0
+        categoryLength = categoryValue if categoryState == FIELD_TEXT else 0
+        end = (offset + RECORD_HEADER.size + siteLength + usernameLength + passwordLength + fingerprintLength
+               + notesLength + categoryLength + extrasLength)
+        if len(buffer) < end:
+            return None
+
+        position = offset + RECORD_HEADER.size
+        site = buffer[position:position + siteLength].decode()
+        position += siteLength
+        entry = Entry()  # The slots are assigned directly, the values already have their stored form
+
+        state = flags & 3
+        if state == FIELD_NONE:
+            entry.username = None
+        elif state == FIELD_TEXT:
+            entry.username = sys.intern(buffer[position:position + usernameLength].decode())
+        position += usernameLength
+
+        state = (flags >> 2) & 3
+        if state == FIELD_NONE:
+            entry.password = None
+        elif state == FIELD_TEXT:
+            entry.password = buffer[position:position + passwordLength].decode()
+        elif state == FIELD_COMPACT:
+            token = binascii.b2a_base64(buffer[position:position + passwordLength], newline=False).translate(TO_URLSAFE).decode()
+            fingerprint = buffer[position + passwordLength:position + passwordLength + fingerprintLength].hex() if fingerprintLength else None
+            entry.password = SealedSecret(token, fingerprint)
+        position += passwordLength + fingerprintLength
+
+        state = (flags >> 4) & 3
+        if state == FIELD_NONE:
+            entry.notes = None
+        elif state == FIELD_TEXT:
+            entry.notes = buffer[position:position + notesLength].decode()
+        elif state == FIELD_COMPACT:
+            entry.notes = SealedSecret(binascii.b2a_base64(buffer[position:position + notesLength], newline=False).translate(TO_URLSAFE).decode())
+        position += notesLength
+
+        if categoryState == FIELD_NONE:
+            entry.category = None
+        elif categoryState == FIELD_TEXT:
+            entry.category = sys.intern(buffer[position:position + categoryLength].decode())
+            categories.append(entry.category)
+        elif categoryState == FIELD_COMPACT:
+            entry.category = categories[categoryValue]
+        position += categoryLength
+
+        state = (flags >> 8) & 3
+        if state == FIELD_NONE:
+            entry.createdAt = None
+        elif state == FIELD_COMPACT:
+            entry.createdAt = createdAt
+
+        if extrasLength:
+            entry.update(restoreSealed(json.loads(buffer[position:end])))
+        return site, entry, end
+
+
+CODECS: Dict[str, EntryCodec] = {codec.name: codec for codec in (JsonCodec(), BinaryCodec())}
+
+
+def getCodec(name: str) -> EntryCodec:
+    """
+    Return the codec registered under a name. Raises ValueError for unknown codecs.
+    """
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Unsupported entry codec {name}.")
+    return codec
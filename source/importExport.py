@@ -0,0 +1,148 @@
+"""
+In this file, we will implement the import and export of entries as CSV files, in our own layout and in the layouts of other password managers.
+
+Rows are read and written one at a time, so files of any size are processed with memory proportional to a single row.
+"""
+import csv
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterable, Iterator, List, Mapping, Tuple, TextIO, Callable, TYPE_CHECKING
+from source.entry import Entry
+
+if TYPE_CHECKING:
+    from source.passwordManager import PasswordManager
+
+CONFLICT_POLICIES = ('skip', 'overwrite', 'merge')
+PROGRESS_INTERVAL = 1000
+
+# The columns of every format in the order they are written, and the column holding each of our fields
+FORMAT_COLUMNS: Dict[str, List[str]] = {
+    'csv': ['site', 'username', 'password', 'notes', 'category', 'url'],
+    'bitwarden': ['folder', 'favorite', 'type', 'name', 'notes', 'fields', 'reprompt', 'login_uri', 'login_username', 'login_password', 'login_totp'],
+    'lastpass': ['url', 'username', 'password', 'totp', 'extra', 'name', 'grouping', 'fav'],
+    'chrome': ['name', 'url', 'username', 'password', 'note'],
+}
+FORMAT_FIELDS: Dict[str, Dict[str, str]] = {
+    'csv': {'site': 'site', 'username': 'username', 'password': 'password', 'notes': 'notes', 'category': 'category', 'url': 'url'},
+    'bitwarden': {'site': 'name', 'username': 'login_username', 'password': 'login_password', 'notes': 'notes', 'category': 'folder', 'url': 'login_uri'},
+    'lastpass': {'site': 'name', 'username': 'username', 'password': 'password', 'notes': 'extra', 'category': 'grouping', 'url': 'url'},
+    'chrome': {'site': 'name', 'username': 'username', 'password': 'password', 'notes': 'note', 'url': 'url'},
+}
+FORMAT_DEFAULTS: Dict[str, Dict[str, str]] = {
+    'bitwarden': {'type': 'login', 'favorite': '', 'fields': '', 'reprompt': '0', 'login_totp': ''},
+    'lastpass': {'totp': '', 'fav': '0'},
+}
+
+
+def checkFormat(name: str) -> Dict[str, str]:
+    """
+    Return the field mapping of a format, raising ValueError for unknown formats.
+    """
+    try:
+        return FORMAT_FIELDS[name]
+    except KeyError:
+        raise ValueError(f"Unsupported file format {name}.") from None
+
+
+def readRecords(stream: TextIO, name: str) -> Iterator[Tuple[str, Dict[str, Optional[str]]]]:
+    """
+    Parse the rows of a file in the given format into sites and their fields. Empty columns become None, and the site falls back to
+    the URL if the row has no name. Rows without either are skipped.
+    """
+    fields = checkFormat(name)
+    for row in csv.DictReader(stream):
+        record = {field: row.get(column) or None for field, column in fields.items()}
+        site = record.pop('site') or record.get('url')
+        if site:
+            yield site, record
+
+
+def writeRecords(stream: TextIO, name: str, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[int]:
+    """
+    Write decrypted entries as rows of the given format, yielding after each row so the caller can report progress.
+    Fields the format has no column for are left out.
+    """
+    fields = checkFormat(name)
+    writer = csv.DictWriter(stream, FORMAT_COLUMNS[name])
+    writer.writeheader()
+    defaults = FORMAT_DEFAULTS.get(name, {})
+    for count, (site, entry) in enumerate(entries, 1):
+        row = dict(defaults)
+        for field, column in fields.items():
+            value = site if field == 'site' else entry.get(field)
+            row[column] = '' if value is None else value
+        if name != 'csv' and not row[fields['url']]:
+            row[fields['url']] = site
+        writer.writerow(row)
+        yield count
+
+
+def recordToEntry(record: Dict[str, Optional[str]]) -> Entry:
+    """
+    Create a new entry from the fields of an imported row. The URL is only kept if the row has one.
+    """
+    entry = Entry({'username': record.get('username'), 'password': record.get('password'), 'createdAt': datetime.now().isoformat(),
+                   'notes': record.get('notes'), 'category': record.get('category')})
+    if record.get('url') is not None:
+        entry['url'] = record['url']
+    return entry
+
+
+def mergeFields(existing: Mapping[str, Any], record: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    Return the fields of an imported row that have a value and differ from the decrypted existing entry.
+    """
+    return {field: value for field, value in record.items() if value is not None and value != existing.get(field)}
+
+
+def mergeRecord(existing: Mapping[str, Any], record: Dict[str, Optional[str]]) -> Optional[Entry]:
+    """
+    Return the decrypted existing entry with the fields of an imported row that differ from it, or None if none differ.
+    """
+    updates = mergeFields(existing, record)
+    return Entry({**existing, **updates, 'modifiedAt': datetime.now().isoformat()}) if updates else None
+
+
+def reportProgress(progress: Optional[Callable[[int], None]], count: int, final: bool = False) -> None:
+    """
+    Call the progress callback every PROGRESS_INTERVAL rows and once at the end.
+    """
+    if progress is not None and (final or count % PROGRESS_INTERVAL == 0):
+        progress(count)
+
+
+def importEntries(pm: 'PasswordManager', stream: TextIO, format: str = 'csv', conflict: str = 'skip',  # pylint: disable=redefined-builtin
+                  progress: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+    """
+    Import the rows of a CSV file in our format or the one of Bitwarden, LastPass or Chrome into a vault through its putEntry, reading one row at a time and saving once at the end.
+    Sites that exist already are kept with 'skip', replaced with 'overwrite' or updated with the non-empty fields of the row with 'merge'.
+    progress is called with the number of rows read so far. Returns how many entries were added, updated and skipped.
+    """
+    if conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"Unknown conflict policy {conflict}.")
+    counts = {'added': 0, 'updated': 0, 'skipped': 0}
+    count = 0
+    with pm.transaction():
+        for count, (site, record) in enumerate(readRecords(stream, format), 1):
+            if site not in pm.data or conflict == 'overwrite':
+                counts['updated' if site in pm.data else 'added'] += 1
+                pm.putEntry(site, recordToEntry(record))
+            elif conflict == 'merge' and (merged := mergeRecord(pm.getPassword(site) or {}, record)) is not None:
+                counts['updated'] += 1
+                pm.putEntry(site, merged)
+            else:
+                counts['skipped'] += 1
+            reportProgress(progress, count)
+    reportProgress(progress, count, final=True)
+    return counts
+
+
+def exportEntries(pm: 'PasswordManager', stream: TextIO, format: str = 'csv', progress: Optional[Callable[[int], None]] = None) -> int:  # pylint: disable=redefined-builtin
+    """
+    Write all entries of a vault with their decrypted secrets as CSV in our format or the one of Bitwarden, LastPass or Chrome.
+    Entries are decrypted one at a time while they are written. Returns the number of entries written.
+    """
+    count = 0
+    for count in writeRecords(stream, format, ((site, pm.getPassword(site) or {}) for site in pm.data)):
+        reportProgress(progress, count)
+    reportProgress(progress, count, final=True)
+    return count
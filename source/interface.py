@@ -217,7 +217,8 @@ class CursesInterface:
         stdscr.clear()
         if results:
             row: int = 0
-            for siteName, details in results.items():
+            for siteName in results:
+                details: dict[str, Any] = self.pm.getPassword(siteName)  # Search results keep their secrets sealed
                 stdscr.addstr(row, 0, f"Site: {siteName}")
                 stdscr.addstr(row + 1, 0, f"Username: {details['username']}")
                 stdscr.addstr(row + 2, 0, f"Password: {details['password']}")
@@ -249,9 +250,9 @@ class CursesInterface:
         """
         stdscr.clear()
         reusedPasswords: dict[str, str] = {}
-        for site, details in self.pm.data.items():
-            if self.pm.checkReusedPassword(details['password']):
-                reusedPasswords[site] = details['password']
+        for sites in self.pm.reuseGroups():
+            for site in sites:
+                reusedPasswords[site] = self.pm.getPassword(site)['password']
 
         if reusedPasswords:
             row: int = 0
@@ -272,9 +273,12 @@ class CursesInterface:
         stdscr.clear()
         pwnedPasswords: dict[str, str] = {}
         try:
-            for site, details in self.pm.data.items():
-                if self.pm.checkPwnedPassword(details['password']):
-                    pwnedPasswords[site] = details['password']
+            revealed: dict[str, Any] = {site: self.pm.getPassword(site) for site in self.pm.data}
+            passwords: dict[str, str] = {site: details['password'] for site, details in revealed.items() if details['password']}
+            pwned: dict[str, bool] = self.pm.checkPwnedPasswords(passwords.values())
+            for site, password in passwords.items():
+                if pwned.get(password):
+                    pwnedPasswords[site] = password
 
             if pwnedPasswords:
                 row: int = 0
@@ -0,0 +1,84 @@
+"""
+In this file, we will implement the Journal class that records single vault mutations as encrypted append-only records.
+"""
+import os
+import json
+from typing import Dict, Any, Optional, Callable, Mapping, MutableMapping
+from cryptography.fernet import Fernet
+import cryptography.fernet
+from source.sealedSecrets import jsonDefault
+
+
+
+class Journal:
+    """
+    An append-only file of encrypted mutation records that is replayed on top of the vault snapshot.
+    """
+
+    def __init__(self, path: str, maxRecords: int = 1000, maxRatio: float = 0.5) -> None:
+        self.path: str = path
+        self.maxRecords: int = maxRecords
+        self.maxRatio: float = maxRatio
+        self.recordCount: int = 0
+        self.byteSize: int = 0
+        self.snapshotSize: int = 0
+
+    def append(self, fernet: Fernet, operation: str, site: str, entry: Optional[Mapping[str, Any]] = None) -> None:
+        """
+        Encrypt a single mutation and append it to the journal file.
+        """
+        record = json.dumps({'op': operation, 'site': site, 'entry': entry}, default=jsonDefault).encode()
+        line = fernet.encrypt(record) + b'\n'
+        with open(self.path, 'ab') as file:
+            file.write(line)
+            file.flush()
+            os.fsync(file.fileno())
+        self.recordCount += 1
+        self.byteSize += len(line)
+
+    def replay(self, fernet: Fernet, data: MutableMapping[str, Any], decodeEntry: Optional[Callable[[Dict[str, Any]], Any]] = None) -> None:
+        """
+        Apply all journal records to the given data in the order they were written, passing replayed entries through decodeEntry.
+        """
+        self.recordCount = 0
+        self.byteSize = 0
+        try:
+            with open(self.path, 'rb') as file:
+                lines = list(file)
+        except FileNotFoundError:
+            return
+        for index, line in enumerate(lines):
+            token = line.strip()
+            if not token:
+                continue
+            try:
+                record = json.loads(fernet.decrypt(token).decode())
+            except cryptography.fernet.InvalidToken as exc:
+                if index == len(lines) - 1 and not line.endswith(b'\n'):
+                    break  # A torn record from an interrupted append, the mutation never completed
+                raise cryptography.fernet.InvalidToken("The master password is incorrect or the journal is corrupted.") from exc
+            if record['op'] == 'delete':
+                data.pop(record['site'], None)
+            else:
+                data[record['site']] = decodeEntry(record['entry']) if decodeEntry is not None else record['entry']
+            self.recordCount += 1
+            self.byteSize += len(line)
+
+    def needsCompaction(self) -> bool:
+        """
+        Check whether the journal has grown large enough to be folded into a new snapshot.
+        """
+        if self.recordCount >= self.maxRecords:
+            return True
+        return self.byteSize > self.snapshotSize * self.maxRatio
+
+    def truncate(self) -> None:
+        """
+        Remove the journal after its records have been written into a snapshot.
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.recordCount = 0
+        self.byteSize = 0
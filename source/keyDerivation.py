@@ -0,0 +1,177 @@
+"""
+In this file, we will implement the derivation of the vault key from the master password with a salted, memory-hard KDF.
+
+The parameters of the derivation, including its salt, are stored with the vault, so the cost can be raised for new vaults
+without breaking older ones. Derived keys are kept in a small in-process cache, so reopening a vault does not pay the cost again.
+"""
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+KDF_SALT_SIZE = 16
+KDF_KEY_SIZE = 32
+DEFAULT_KDF: Dict[str, Any] = {'name': 'scrypt', 'n': 2 ** 15, 'r': 8, 'p': 1}
+MIN_SCRYPT_COST = 2 ** 14
+MAX_SCRYPT_COST = 2 ** 22
+MAX_SCRYPT_BLOCK_SIZE = 32
+MAX_SCRYPT_PARALLELISM = 16
+MIN_PBKDF2_ITERATIONS = 100000
+MAX_PBKDF2_ITERATIONS = 5000000  # About two seconds of a single core
+DEFAULT_MAX_MEMORY = 512 * 2 ** 20  # Also the most any vault may make scrypt allocate
+KEY_CACHE_SIZE = 4
+
+
+def scryptMemory(n: int, r: int, p: int) -> int:
+    """
+    Return the memory limit scrypt needs for the given cost, with some headroom over its 128 * r * (n + p) bytes.
+    """
+    return 128 * r * (n + p) + 2 ** 20
+
+
+def isIntegerBetween(value: Any, low: int, high: int) -> bool:
+    """
+    Check whether a value is an integer within the given bounds.
+    """
+    return isinstance(value, int) and low <= value <= high
+
+
+def checkParameters(parameters: Any) -> Dict[str, Any]:
+    """
+    Validate derivation parameters read from a vault or passed in by the caller, raising ValueError if they are unusable.
+    The limits keep a tampered vault from requesting an absurd amount of memory or time before its header can be verified.
+    """
+    if not isinstance(parameters, dict) or not isinstance(parameters.get('salt'), str):
+        raise ValueError("Key derivation parameters need a name and a salt.")
+    if parameters.get('name') == 'scrypt':
+        n: Any = parameters.get('n')
+        if (not isIntegerBetween(n, MIN_SCRYPT_COST, MAX_SCRYPT_COST) or n & (n - 1)
+                or not isIntegerBetween(parameters.get('r'), 1, MAX_SCRYPT_BLOCK_SIZE) or not isIntegerBetween(parameters.get('p'), 1, MAX_SCRYPT_PARALLELISM)
+                or scryptMemory(n, parameters['r'], parameters['p']) > DEFAULT_MAX_MEMORY):
+            raise ValueError("Unsupported scrypt parameters.")
+    elif parameters.get('name') == 'pbkdf2':
+        if not isIntegerBetween(parameters.get('iterations'), MIN_PBKDF2_ITERATIONS, MAX_PBKDF2_ITERATIONS):
+            raise ValueError("Unsupported PBKDF2 parameters.")
+    else:
+        raise ValueError(f"Unknown key derivation function {parameters.get('name')}.")
+    return parameters
+
+
+def newParameters(cost: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Return the parameters for a new vault key: the given cost, as returned by calibrate, or the default one, with a fresh salt.
+    """
+    parameters = dict(cost if cost is not None else DEFAULT_KDF)
+    parameters['salt'] = base64.b64encode(os.urandom(KDF_SALT_SIZE)).decode()
+    return checkParameters(parameters)
+
+
+def deriveRawKey(password: str, parameters: Dict[str, Any]) -> bytes:
+    """
+    Run the key derivation function without the cache.
+    """
+    salt = base64.b64decode(parameters['salt'])
+    if parameters['name'] == 'scrypt':
+        n, r, p = parameters['n'], parameters['r'], parameters['p']
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=scryptMemory(n, r, p), dklen=KDF_KEY_SIZE)
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, parameters['iterations'], KDF_KEY_SIZE)
+
+
+class KeyCache:
+    """
+    A small LRU cache of derived keys. Entries are looked up by a keyed hash of the password and the parameters, with a key
+    that is generated per process, so the cache never holds the password itself or a value that could be attacked offline.
+    """
+
+    def __init__(self, size: int = KEY_CACHE_SIZE) -> None:
+        self.size: int = size
+        self.secret: bytes = os.urandom(32)
+        self.keys: 'OrderedDict[bytes, bytes]' = OrderedDict()
+        self.lock: threading.Lock = threading.Lock()
+        self.derivations: int = 0
+
+    def lookupKey(self, password: str, parameters: Dict[str, Any]) -> bytes:
+        """
+        Compute the cache key of a password and its parameters.
+        """
+        return hmac.new(self.secret, json.dumps(parameters, sort_keys=True).encode() + b'\0' + password.encode(), hashlib.sha256).digest()
+
+    def derive(self, password: str, parameters: Dict[str, Any]) -> bytes:
+        """
+        Return the Fernet key for a password, deriving it only if it is not in the cache.
+        """
+        cacheKey = self.lookupKey(password, parameters)
+        with self.lock:
+            key = self.keys.get(cacheKey)
+            if key is not None:
+                self.keys.move_to_end(cacheKey)
+                return key
+        key = base64.urlsafe_b64encode(deriveRawKey(password, checkParameters(parameters)))
+        with self.lock:
+            self.derivations += 1
+            self.keys[cacheKey] = key
+            if len(self.keys) > self.size:
+                self.keys.popitem(last=False)
+        return key
+
+    def forget(self, password: str, parameters: Dict[str, Any]) -> None:
+        """
+        Drop the cached key of a password and its parameters.
+        """
+        with self.lock:
+            self.keys.pop(self.lookupKey(password, parameters), None)
+
+    def clear(self) -> None:
+        """
+        Forget all cached keys.
+        """
+        with self.lock:
+            self.keys.clear()
+
+
+KEY_CACHE = KeyCache()
+
+
+def deriveKey(password: str, parameters: Dict[str, Any]) -> bytes:
+    """
+    Derive the Fernet key of a vault from the master password and the parameters stored with the vault, using the process-wide cache.
+    """
+    return KEY_CACHE.derive(password, parameters)
+
+
+def timeDerivation(cost: Dict[str, Any]) -> float:
+    """
+    Measure how long a single derivation with the given cost takes.
+    """
+    parameters = newParameters(cost)
+    start = time.perf_counter()
+    deriveRawKey('calibration', parameters)
+    return time.perf_counter() - start
+
+
+def calibrate(targetSeconds: float = 0.5, name: str = 'scrypt', maxMemory: int = DEFAULT_MAX_MEMORY) -> Dict[str, Any]:
+    """
+    Pick the highest cost whose derivation stays within targetSeconds on this machine, never going below the minimum cost.
+    scrypt doubles its cost until the next step would exceed the target or maxMemory, capped at DEFAULT_MAX_MEMORY, PBKDF2 scales its iterations from a short
+    measurement and then corrects them with a second one at the estimated cost.
+    The result is passed to PasswordManager as kdf and is used for new vaults and for vaults that are migrated from the unsalted key.
+    """
+    if name == 'pbkdf2':
+        iterations = MIN_PBKDF2_ITERATIONS
+        for _ in range(2):
+            elapsed = timeDerivation({'name': 'pbkdf2', 'iterations': iterations})
+            iterations = min(max(int(iterations * targetSeconds / max(elapsed, 1e-9)), MIN_PBKDF2_ITERATIONS), MAX_PBKDF2_ITERATIONS)
+        return {'name': 'pbkdf2', 'iterations': iterations}
+    if name != 'scrypt':
+        raise ValueError(f"Unknown key derivation function {name}.")
+    cost = {'name': 'scrypt', 'n': MIN_SCRYPT_COST, 'r': DEFAULT_KDF['r'], 'p': DEFAULT_KDF['p']}
+    while cost['n'] < MAX_SCRYPT_COST and scryptMemory(cost['n'] * 2, cost['r'], cost['p']) <= min(maxMemory, DEFAULT_MAX_MEMORY):
+        if timeDerivation(cost) * 2 > targetSeconds:  # The time of scrypt grows linearly with n
+            break
+        cost['n'] *= 2
+    return cost
@@ -0,0 +1,127 @@
+"""
+In this file, we will implement a password generator that draws all randomness from the operating system's CSPRNG.
+
+Passwords are built constructively: one character of every required class is placed at a random position of a string of
+characters drawn from all classes, so every password contains each class without regenerating it. Random characters are drawn
+as bulk random bytes that are mapped onto the alphabet with bytes.translate, discarding the bytes that would bias the mapping.
+"""
+import os
+import math
+import string
+import secrets
+from functools import lru_cache
+from typing import List, Optional, Sequence, Set, Tuple
+
+DEFAULT_ALPHABETS = (string.ascii_lowercase, string.ascii_uppercase, string.digits, string.punctuation)
+MAX_PASSWORD_LENGTH = 256
+WORDLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wordlist.txt')
+
+
+@lru_cache(maxsize=4)
+def loadWordlist(path: str = WORDLIST_PATH) -> Tuple[str, ...]:
+    """
+    Read a wordlist with one word per line, once per path.
+    """
+    with open(path, encoding='utf-8') as file:
+        words = tuple(dict.fromkeys(line.strip() for line in file if line.strip()))
+    if len(words) < 2:
+        raise ValueError(f"The wordlist {path} needs at least two distinct words.")
+    return words
+
+
+@lru_cache(maxsize=64)
+def translation(symbols: bytes) -> Tuple[bytes, bytes]:
+    """
+    Return the table and the deleted bytes that map random bytes uniformly onto the given symbols. Bytes at or above the largest
+    multiple of the number of symbols are deleted, so every symbol is equally likely.
+    """
+    limit = 256 - 256 % len(symbols)
+    table = bytes(symbols[byte % len(symbols)] if byte < limit else 0 for byte in range(256))
+    return table, bytes(range(limit, 256))
+
+
+def randomSymbols(count: int, symbols: bytes) -> bytes:
+    """
+    Return count symbols drawn uniformly and independently from at most 256 distinct symbols.
+    """
+    table, deleted = translation(symbols)
+    acceptance = 1 - len(deleted) / 256
+    pieces: List[bytes] = []
+    drawn = 0
+    while drawn < count:
+        piece = secrets.token_bytes(int((count - drawn) / acceptance) + 16).translate(table, deleted)
+        pieces.append(piece)
+        drawn += len(piece)
+    return b''.join(pieces)[:count]
+
+
+class PasswordGenerator:
+    """
+    Generates passwords that contain at least one character of every alphabet, and passphrases of random words.
+    Alphabets are strings of ASCII characters, a character in several alphabets counts for each of them.
+    """
+
+    def __init__(self, alphabets: Sequence[str] = DEFAULT_ALPHABETS) -> None:
+        if not alphabets or any(not alphabet or not alphabet.isascii() for alphabet in alphabets):
+            raise ValueError("Every alphabet has to be a non-empty string of ASCII characters.")
+        self.alphabets: Tuple[bytes, ...] = tuple(''.join(dict.fromkeys(alphabet)).encode() for alphabet in alphabets)
+        self.alphabet: bytes = ''.join(dict.fromkeys(''.join(alphabets))).encode()
+
+    def entropy(self, length: int) -> float:
+        """
+        Return the entropy in bits of a password of the given length, ignoring the small loss from the required classes.
+        """
+        return length * math.log2(len(self.alphabet))
+
+    def generate(self, length: int = 16) -> str:
+        """
+        Generate a single password.
+        """
+        return self.generateMany(1, length)[0]
+
+    def generateMany(self, count: int, length: int = 16) -> List[str]:
+        """
+        Generate many passwords at once. The random bytes of all passwords are drawn in a few large reads, and each password
+        only replaces one character per required class at distinct random positions.
+        """
+        required = len(self.alphabets)
+        if not required <= length <= MAX_PASSWORD_LENGTH:
+            raise ValueError(f"The length has to be between {required} and {MAX_PASSWORD_LENGTH}.")
+        filler = randomSymbols(count * length, self.alphabet).decode()
+        picks = [randomSymbols(count, alphabet).decode() for alphabet in self.alphabets]
+        positionSymbols = bytes(range(length))
+        positions = randomSymbols(count * required * 2, positionSymbols)
+        nextPosition = 0
+        passwords: List[str] = []
+        for index in range(count):
+            characters = list(filler[index * length:(index + 1) * length])
+            used: Set[int] = set()
+            for pick in picks:
+                while True:
+                    if nextPosition == len(positions):
+                        positions, nextPosition = randomSymbols(count * required, positionSymbols), 0
+                    position = positions[nextPosition]
+                    nextPosition += 1
+                    if position not in used:
+                        break
+                used.add(position)
+                characters[position] = pick[index]
+            passwords.append(''.join(characters))
+        return passwords
+
+    def generatePassphrase(self, words: int = 6, separator: str = '-', wordlist: Optional[str] = None) -> str:
+        """
+        Generate a passphrase of random words from the bundled wordlist or the given file. Each word adds log2 of the list size bits.
+        """
+        candidates = loadWordlist(wordlist or WORDLIST_PATH)
+        return separator.join(secrets.choice(candidates) for _ in range(words))
+
+
+DEFAULT_GENERATOR = PasswordGenerator()
+
+
+def generateStrongPasswords(count: int, length: int = 16) -> List[str]:
+    """
+    Generate many passwords with lowercase and uppercase letters, digits and punctuation, for provisioning accounts in bulk.
+    """
+    return DEFAULT_GENERATOR.generateMany(count, length)
@@ -1,161 +1,456 @@
 """
 In this file, we will implement the PasswordManager class that will be used to manage passwords securely.
 """
-import json
-import random
+import hmac
 import hashlib
 import base64
-import string
-from typing import Dict, Any, Optional, Tuple, List
+import threading
+from typing import Dict, Any, Optional, Tuple, List, Iterator, Iterable, Union, MutableMapping, Callable, TextIO, TYPE_CHECKING
+from contextlib import contextmanager
 from datetime import datetime
-import requests
-from cryptography.fernet import Fernet
 import cryptography.fernet
+from source.searchIndex import SearchIndex
+from source.reuseIndex import ReuseIndex
+from source.sealedSecrets import SecretSealer, SealedSecret
+from source.entry import Entry, toEntry
+from source.entryCodec import EntryCodec, BINARY_CODEC_NAME, getCodec
+from source.storage import StorageBackend, VaultFileStorage
+from source.keyDerivation import KEY_CACHE, deriveKey, newParameters
+from source.strengthEstimator import StrengthEstimate, estimateStrength
+from source.vaultAudit import AuditReport, auditVault
+from source.writeBehind import WriteBehindSaver, DEFAULT_WINDOW, DEFAULT_MAX_DELAY
+from source.passwordGenerator import DEFAULT_GENERATOR, generateStrongPasswords
+from source import importExport
 
+if TYPE_CHECKING:  # Imported when they are used, requests alone takes longer to import than the rest of the manager
+    from source.pwnedClient import PwnedPasswordsClient
+    from source.breachCorpus import BreachCorpus
 
+DEFAULT_VAULT_PATHS = {'file': 'passwords.json', 'sqlite': 'passwords.db'}  # Relative to the current directory
 
-class PasswordManager:
+
+class PasswordManager:  # pylint: disable=too-many-instance-attributes,too-many-public-methods
     """
     A class to manage passwords securely.
     """
 
-    def __init__(self, masterPassword: str) -> None:
+    def __init__(self, masterPassword: str, journaled: bool = False, storage: str = 'file', codec: str = BINARY_CODEC_NAME,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 compression: Optional[str] = None, compressionLevel: int = 6, kdf: Optional[Dict[str, Any]] = None, onConflict: str = 'merge',
+                 path: Optional[str] = None) -> None:
         self.masterPassword: str = masterPassword
-        self.key: bytes = self.generateKey(masterPassword)
-        self.data: Dict[str, Dict[str, Any]] = {}
+        self.kdf: Optional[Dict[str, Any]] = kdf
+        self.kdfParameters: Optional[Dict[str, Any]] = None
+        self.key: bytes = self.generateKey(masterPassword)  # Replaced by the derived key once the vault parameters are known
+        self.searchIndex: SearchIndex = SearchIndex()
+        self.reuseIndex: ReuseIndex = ReuseIndex(hmac.new(self.key, b'reuse-index', hashlib.sha256).digest())
+        self.secrets: SecretSealer = SecretSealer(self.key)
+        self.strengthScores: Dict[str, StrengthEstimate] = {}
+        self.pwnedBackend: Optional[Union['PwnedPasswordsClient', 'BreachCorpus']] = None
+        self.loaded: threading.Event = threading.Event()
+        self.loadError: Optional[BaseException] = None
+        self.data = {}
+        self.loaded.set()
+        self.storage: StorageBackend = self.createStorage(storage, journaled, getCodec(codec), compression, compressionLevel, onConflict, path)
+        self.transactionDepth: int = 0
+        self.transactionDirty: bool = False
+        self.mutationLock: threading.RLock = threading.RLock()  # Held by mutations and saves, so a background save sees no half-applied change
+        self.writeBehind: Optional[WriteBehindSaver] = None
+
+    @property
+    def data(self) -> MutableMapping[str, Entry]:
+        """
+        The entries by site name, with passwords and notes sealed; waits for a background load to finish.
+        """
+        self.loaded.wait()
+        if self.loadError is not None:
+            raise self.loadError
+        return self._data
+
+    @data.setter
+    def data(self, value: MutableMapping[str, Entry]) -> None:
+        if isinstance(value, dict):
+            for site, entry in value.items():  # Replacing values in place keeps the dict the caller passed in
+                value[site] = toEntry(entry)
+        self._data = value
+        self.searchIndex.invalidate()  # The indexes are built on first use, so unlocking stays fast
+        self.reuseIndex.invalidate()
 
     def generateKey(self, password: str) -> bytes:
         """
-        Generate an encryption key based on the master password.
+        Generate the unsalted encryption key of vaults written before key derivation parameters were stored with them.
         """
         return base64.urlsafe_b64encode(hashlib.sha256(password.encode()).digest())
 
-    def loadData(self) -> None:
+    def useKey(self, kdfParameters: Optional[Dict[str, Any]]) -> None:
+        """
+        Derive the vault key with the given parameters, or use the unsalted key if there are none, and rekey everything derived from it.
+        """
+        self.key = self.generateKey(self.masterPassword) if kdfParameters is None else deriveKey(self.masterPassword, kdfParameters)
+        self.kdfParameters = kdfParameters
+        self.secrets.setKey(self.key)
+        self.reuseIndex.key = hmac.new(self.key, b'reuse-index', hashlib.sha256).digest()
+        self.reuseIndex.invalidate()
+        self.strengthScores = {}  # The estimates are keyed by fingerprints of the old key
+        self.storage.setKey(self.key, kdfParameters)
+
+    def upgradeKey(self) -> None:
+        """
+        Replace the unsalted key of a new or older vault by a salted one and save all entries under it.
+        """
+        revealed = {site: Entry(self.secrets.reveal(entry)) for site, entry in self.data.items()}
+        previousParameters = self.kdfParameters
+        self.useKey(newParameters(self.kdf))
+        try:
+            self.storage.save(revealed)
+        except BaseException:
+            self.useKey(previousParameters)
+            raise
+        self.data = self.storage.load(self.storage.unlock())  # Sealed under the new key, and a view of the rows of a database vault
+
+    def createStorage(self, storage: str, journaled: bool, codec: EntryCodec, compression: Optional[str], compressionLevel: int,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                      onConflict: str, path: Optional[str] = None) -> StorageBackend:
+        """
+        Create the storage backend: 'file' keeps the vault in one encrypted file, 'sqlite' keeps every entry in its own database row.
+        """
+        if storage not in DEFAULT_VAULT_PATHS:
+            raise ValueError(f"Unknown storage backend {storage}.")
+        path = path or DEFAULT_VAULT_PATHS[storage]
+        if storage == 'file':
+            return VaultFileStorage(path, self.key, self.secrets, self.reuseIndex.fingerprint, codec, journaled, compression, compressionLevel,
+                                    onConflict)
+        from source.sqliteStorage import SqliteStorage  # pylint: disable=import-outside-toplevel
+        return SqliteStorage(path, self.key, self.secrets, self.reuseIndex.fingerprint, codec)
+
+    def loadData(self, background: bool = False) -> None:
+        """
+        Load the password data from the storage backend, in a separate thread with background set.
+        """
+        self.loaded.clear()
+        self.loadError = None
+        try:
+            kdfParameters = self.storage.readKdfParameters()
+            if kdfParameters is None and not self.storage.exists():
+                kdfParameters = newParameters(self.kdf)
+            self.useKey(kdfParameters)
+            handle = self.storage.unlock()
+        except BaseException:
+            self.loaded.set()
+            raise
+
+        if background:
+            threading.Thread(target=self.finishLoading, args=(handle,), daemon=True).start()
+            return
+        self.finishLoading(handle)
+        if self.loadError is not None:
+            raise self.loadError
+
+    def finishLoading(self, handle: Any) -> None:
         """
-        Load and decrypt the password data from the file.
+        Load the entries from an unlocked backend and publish them.
         """
         try:
-            with open('passwords.json', 'rb') as file:
-                encryptedData = file.read()
-            fernet = Fernet(self.key)
-            decryptedData = fernet.decrypt(encryptedData).decode()
-            self.data = json.loads(decryptedData)
-        except FileNotFoundError:
-            self.data = {}
+            self.data = self.storage.load(handle)
         except cryptography.fernet.InvalidToken as exc:
-            raise cryptography.fernet.InvalidToken("The master password is incorrect or the data is corrupted.") from exc
+            self.loadError = cryptography.fernet.InvalidToken("The master password is incorrect or the data is corrupted.")
+            self.loadError.__cause__ = exc
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.loadError = exc  # Raised again by loadData or on the next access to the data
+        finally:
+            self.loaded.set()
+
+    def lock(self) -> None:
+        """
+        Drop the entries, the master password and every key derived from it until loadData is called again.
+        """
+        self.loaded.wait()  # A background load would otherwise swap keys mid-decrypt and publish its entries after the lock
+        if self.writeBehind is not None:
+            self.writeBehind.close()
+            self.writeBehind = None
+        if self.kdfParameters is not None:
+            KEY_CACHE.forget(self.masterPassword, self.kdfParameters)
+        self.storage.close()
+        self.secrets.clear()
+        self.data = {}
+        self.masterPassword = ''
+        self.useKey(None)
+        self.loadError = PermissionError("The vault is locked.")
 
     def saveData(self) -> None:
         """
-        Encrypt and save the password data to the file.
+        Save all password data to the storage backend, moving a vault still using the unsalted key to a derived key first.
+        """
+        with self.mutationLock:
+            if self.kdfParameters is None:
+                self.upgradeKey()
+                return
+            if self.storage.save(self.data):
+                self.searchIndex.invalidate()  # Entries saved by another process were merged in
+                self.reuseIndex.invalidate()
+
+    def recordChange(self, operation: str, site: str) -> None:
+        """
+        Update the indexes for a single mutation and persist it, either on its own or by saving all data if the backend requires it.
+        """
+        if operation == 'delete':
+            self.searchIndex.remove(site)
+            self.reuseIndex.remove(site)
+        else:
+            entry = self.data[site]
+            self.searchIndex.add(site, entry)
+            self.reuseIndex.add(site, entry)
+        if self.transactionDepth:
+            self.transactionDirty = True
+            return
+        if self.writeBehind is not None:
+            self.writeBehind.markDirty(site, operation)
+            return
+        self.savePending({site: operation}, False)
+
+    def savePending(self, changes: Dict[str, str], snapshot: bool) -> None:
+        """
+        Persist the latest operation of every changed site, or all entries if snapshot is set or the backend requires it.
+        """
+        with self.mutationLock:
+            if not snapshot and not self.storage.needsSnapshot(self.data):
+                for site, operation in changes.items():
+                    if not self.storage.persist(operation, site, self.data.get(site)) or self.storage.needsSnapshot(self.data):
+                        break
+                else:
+                    return
+            self.saveData()
+
+    def enableWriteBehind(self, window: float = DEFAULT_WINDOW, maxDelay: float = DEFAULT_MAX_DELAY) -> WriteBehindSaver:
+        """
+        Save mutations in a background thread after a quiet window instead of after every mutation, returning the saver.
+        """
+        if self.writeBehind is None:
+            self.writeBehind = WriteBehindSaver(self.savePending, window, maxDelay).start()
+        return self.writeBehind
+
+    def flush(self) -> None:
+        """
+        Save the mutations the write-behind saver has not saved yet. Does nothing without write-behind.
+        """
+        if self.writeBehind is not None:
+            self.writeBehind.flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator['PasswordManager']:
+        """
+        Group several mutations into a single save at commit, restoring the previous data if an exception occurs.
         """
-        fernet = Fernet(self.key)
-        encryptedData = fernet.encrypt(json.dumps(self.data).encode())
-        with open('passwords.json', 'wb') as file:
-            file.write(encryptedData)
+        if self.transactionDepth:  # Nested transactions join the outermost one
+            self.transactionDepth += 1
+            try:
+                yield self
+            finally:
+                self.transactionDepth -= 1
+            return
+
+        with self.mutationLock:
+            previousData = self.storage.checkpoint(self.data)
+            self.transactionDepth = 1
+            self.transactionDirty = False
+            try:
+                yield self
+                self.transactionDepth = 0
+                if self.transactionDirty and self.writeBehind is not None:
+                    self.writeBehind.markDirty()
+                elif self.transactionDirty:
+                    self.saveData()
+            except BaseException:
+                self.storage.rollback()
+                self.data = previousData
+                raise
+            finally:
+                self.transactionDepth = 0
+                self.transactionDirty = False
 
     def addPassword(self, site: str, username: Optional[str] = None, password: Optional[str] = None, notes: Optional[str] = None, category: Optional[str] = None) -> None:
         """
         Add a new password entry to the data.
         """
-        self.data[site] = {
+        self.putEntry(site, Entry({
             'username': username,
             'password': password,
             'createdAt': datetime.now().isoformat(),
             'notes': notes,
             'category': category
-        }
-        self.saveData()
+        }))
+
+    def putEntry(self, site: str, entry: Entry) -> None:
+        """
+        Store an entry under a site name with its secrets sealed, replacing any existing one, and persist it like every other mutation.
+        """
+        with self.mutationLock:
+            self.storage.noteChange(site, self.data.get(site))
+            self.data[site] = self.storage.sealEntry(entry)
+            self.recordChange('put', site)
 
     def getPassword(self, site: str) -> Optional[Dict[str, Any]]:
         """
-        Retrieve a password entry by site name.
+        Retrieve a password entry by site name, with its password and notes decrypted.
         """
-        return self.data.get(site, None)
+        with self.mutationLock:  # Readers on other threads must not see an entry half-way through a mutation
+            entry = self.data.get(site, None)
+            return self.secrets.reveal(entry) if entry is not None else None
 
     def deletePassword(self, site: str) -> None:
         """
         Delete a password entry by site name.
         """
-        if site in self.data:
-            del self.data[site]
-            self.saveData()
+        with self.mutationLock:
+            if site in self.data:
+                self.storage.noteChange(site, self.data[site])
+                del self.data[site]
+                self.recordChange('delete', site)
 
     def updatePassword(self, site: str, username: Optional[str] = None, password: Optional[str] = None, notes: Optional[str] = None, category: Optional[str] = None) -> None:
         """
         Update an existing password entry.
         """
-        if site in self.data:
-            if username:
-                self.data[site]['username'] = username
-            if password:
-                self.data[site]['password'] = password
-            if notes:
-                self.data[site]['notes'] = notes
-            if category:
-                self.data[site]['category'] = category
-            self.saveData()
+        with self.mutationLock:
+            entry = self.data.get(site)
+            if entry is not None:
+                self.storage.noteChange(site, entry)
+                if username:
+                    entry['username'] = username
+                if password:
+                    entry['password'] = password
+                if notes:
+                    entry['notes'] = notes
+                if category:
+                    entry['category'] = category
+                if username or password or notes or category:
+                    entry['modifiedAt'] = datetime.now().isoformat()  # Lets the audit skip entries that did not change
+                self.data[site] = self.storage.sealEntry(entry)  # A sealed copy, storage backends may hand out copies of their entries anyway
+                self.recordChange('put', site)
+
+    def importEntries(self, stream: TextIO, format: str = 'csv', conflict: str = 'skip',  # pylint: disable=redefined-builtin
+                      progress: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+        """
+        Import the rows of a CSV file, saving once at the end. Returns how many entries were added, updated and skipped.
+        """
+        return importExport.importEntries(self, stream, format, conflict, progress)
+
+    def exportEntries(self, stream: TextIO, format: str = 'csv', progress: Optional[Callable[[int], None]] = None) -> int:  # pylint: disable=redefined-builtin
+        """
+        Write all entries with their decrypted secrets as CSV. Returns the number of entries written.
+        """
+        return importExport.exportEntries(self, stream, format, progress)
+
+    def getCategory(self, category: str) -> List[str]:
+        """
+        Return the sites of all entries in a category.
+        """
+        return self.storage.sitesInCategory(self.data, category)
 
-    def searchPassword(self, keyword: str) -> Dict[str, Dict[str, Any]]:
+    def searchPassword(self, keyword: str) -> Dict[str, Entry]:
         """
-        Search for password entries by a keyword.
+        Search for password entries whose site, username or category contain a keyword.
         """
-        results = {}
-        for site, details in self.data.items():
-            if keyword.lower() in site.lower() or keyword.lower() in details['username'].lower():
-                results[site] = details
-        return results
+        with self.mutationLock:
+            if not self.searchIndex.built:
+                self.searchIndex.build(self.data)
+            return {site: self.data[site] for site in self.searchIndex.search(keyword)}
 
     def checkPasswordStrength(self, password: str) -> Tuple[bool, List[str]]:
         """
-        Check the strength of a given password.
+        Check the strength of a given password by its estimated entropy, returning the reasons if it is weak.
         """
-        reasons = []
-        if len(password) < 8:
-            reasons.append("Password is too short (minimum 8 characters).")
-        if not any(char.isdigit() for char in password):
-            reasons.append("Password should contain at least one digit.")
-        if not any(char.isupper() for char in password):
-            reasons.append("Password should contain at least one uppercase letter.")
-        if not any(char.islower() for char in password):
-            reasons.append("Password should contain at least one lowercase letter.")
-        if not any(char in string.punctuation for char in password):
-            reasons.append("Password should contain at least one special character.")
+        estimate = self.estimateStrength(password)
+        return estimate.strong, estimate.reasons()
 
-        return len(reasons) == 0, reasons
+    def estimateStrength(self, password: str, fingerprint: Optional[str] = None) -> StrengthEstimate:
+        """
+        Estimate the strength of a password, reusing the estimate of an earlier call with the same password fingerprint.
+        """
+        fingerprint = fingerprint or self.reuseIndex.fingerprint(password)
+        estimate = self.strengthScores.get(fingerprint)
+        if estimate is None:
+            estimate = self.strengthScores[fingerprint] = estimateStrength(password)
+        return estimate
+
+    def scoreAll(self) -> Dict[str, StrengthEstimate]:
+        """
+        Estimate the strength of the password of every entry, decrypting only passwords not scored before.
+        """
+        scores: Dict[str, StrengthEstimate] = {}
+        known, self.strengthScores = self.strengthScores, {}
+        for site, entry in self.data.items():
+            password: Any = entry.get('password')
+            if password is None:
+                continue
+            fingerprint = self.passwordFingerprint(password)
+            estimate = self.strengthScores.get(fingerprint) or known.get(fingerprint)
+            if estimate is None:
+                estimate = estimateStrength(self.secrets.open(password))
+            scores[site] = self.strengthScores[fingerprint] = estimate
+        return scores
+
+    def passwordFingerprint(self, password: Any) -> str:
+        """
+        Return the keyed fingerprint of a stored password, which sealed passwords carry so they are not decrypted.
+        """
+        fingerprint = password.fingerprint if isinstance(password, SealedSecret) else None
+        return fingerprint or self.reuseIndex.fingerprint(self.secrets.open(password))
+
+    def audit(self, pwned: bool = True) -> AuditReport:
+        """
+        Check every password for strength, reuse and, unless pwned is False, breaches, evaluating only entries changed since the last audit.
+        """
+        return auditVault(self, pwned)
 
     def generateStrongPassword(self, length: int = 12) -> str:
         """
-        Generate a strong random password.
+        Generate a strong random password with at least one lowercase and uppercase letter, digit and special character.
         """
-        if length < 8:
-            length = 8  # Ensure the password is at least 8 characters long
-        allChars = string.ascii_letters + string.digits + string.punctuation
-        password = ''.join(random.choice(allChars) for _ in range(length))
-        while not any(char.isdigit() for char in password) or not any(char.isupper() for char in password) or not any(char.islower() for char in password) or not any(char in string.punctuation for char in password):
-            password = ''.join(random.choice(allChars) for _ in range(length))
-        return password
+        return DEFAULT_GENERATOR.generate(max(length, 8))  # Ensure the password is at least 8 characters long
 
-    def checkReusedPassword(self, password: str) -> bool:
+    def generateStrongPasswords(self, count: int, length: int = 12) -> List[str]:
         """
-        Check if the given password is reused in any existing entries.
+        Generate many strong random passwords at once, for provisioning accounts in bulk.
         """
-        for details in self.data.values():
-            if details['password'] == password:
-                return True
-        return False
+        return generateStrongPasswords(count, max(length, 8))
+
+    def checkReusedPassword(self, password: str, excludeSite: Optional[str] = None) -> bool:
+        """
+        Check if the given password is reused in any existing entries, optionally ignoring the entry of one site.
+        """
+        with self.mutationLock:
+            if not self.reuseIndex.built:
+                self.reuseIndex.build(self.data)
+            sites = self.reuseIndex.sitesUsing(password)
+        if excludeSite is not None:
+            sites.discard(excludeSite)
+        return bool(sites)
+
+    def reuseGroups(self) -> List[List[str]]:
+        """
+        Return every group of sites that share the same password.
+        """
+        with self.mutationLock:
+            if not self.reuseIndex.built:
+                self.reuseIndex.build(self.data)
+            return self.reuseIndex.groups()
 
     def checkPwnedPassword(self, password: str) -> bool:
         """
         Check if the given password has been compromised using the Pwned Passwords API.
         """
-        try:
-            hashedPassword = hashlib.sha1(password.encode()).hexdigest().upper()
-            prefix, suffix = hashedPassword[:5], hashedPassword[5:]
-            response = requests.get(f'https://api.pwnedpasswords.com/range/{prefix}', timeout=5)
-            if response.status_code == 200:
-                hashes = (line.split(':') for line in response.text.splitlines())
-                return any(s == suffix for s, _ in hashes)
-        except requests.exceptions.RequestException:
-            pass
-        return False
+        return self.checkPwnedPasswords([password])[password]
+
+    def checkPwnedPasswords(self, passwords: Iterable[str]) -> Dict[str, bool]:
+        """
+        Check many passwords at once against the Pwned Passwords API or a configured local breach corpus.
+        """
+        return self.breachBackend().checkPasswords(passwords)
+
+    def breachBackend(self) -> Union['PwnedPasswordsClient', 'BreachCorpus']:
+        """
+        Return the backend for breach checks, creating a Pwned Passwords API client if none is configured.
+        """
+        if self.pwnedBackend is None:
+            from source.pwnedClient import PwnedPasswordsClient  # pylint: disable=import-outside-toplevel
+            self.pwnedBackend = PwnedPasswordsClient()
+        return self.pwnedBackend
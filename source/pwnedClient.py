@@ -0,0 +1,141 @@
+"""
+In this file, we will implement the PwnedPasswordsClient class that checks many passwords against the Pwned Passwords API at once.
+"""
+import time
+import hashlib
+from typing import Dict, List, Iterable, Mapping, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from source.rangeCache import RangeCache
+
+PWNED_API_URL = 'https://api.pwnedpasswords.com/range/'
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class PwnedPasswordsClient:
+    """
+    A client for the k-anonymity range API that fetches every SHA-1 prefix once, concurrently, over pooled connections.
+    """
+
+    def __init__(self, baseUrl: str = PWNED_API_URL, maxWorkers: int = 8, timeout: float = 5.0, retries: int = 3, backoff: float = 0.5,  # pylint: disable=too-many-arguments
+                 *, cache: Optional[RangeCache] = None) -> None:
+        self.baseUrl: str = baseUrl
+        self.cache: Optional[RangeCache] = cache
+        self.maxWorkers: int = maxWorkers
+        self.timeout: float = timeout
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.session: requests.Session = requests.Session()
+        self.session.headers['Add-Padding'] = 'true'  # Hide the real size of each range response
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maxWorkers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @staticmethod
+    def splitHash(password: str) -> Tuple[str, str]:
+        """
+        Split the uppercase SHA-1 hex digest of a password into the 5-character prefix and the suffix.
+        """
+        hashedPassword = hashlib.sha1(password.encode()).hexdigest().upper()
+        return hashedPassword[:5], hashedPassword[5:]
+
+    @staticmethod
+    def parseRange(text: str) -> Set[str]:
+        """
+        Parse a range response into the set of suffixes that occur in at least one breach.
+        """
+        suffixes = set()
+        for line in text.splitlines():
+            suffix, _, count = line.partition(':')
+            if count.strip() != '0':  # Padding entries carry a count of zero
+                suffixes.add(suffix.strip().upper())
+        return suffixes
+
+    def requestRange(self, prefix: str, headers: Dict[str, str]) -> Optional[requests.Response]:
+        """
+        Request one range, retrying transient failures with exponential backoff. Returns None if no usable response arrived.
+        """
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt
+            try:
+                response = self.session.get(f'{self.baseUrl}{prefix}', headers=headers, timeout=self.timeout)
+                if response.status_code in (200, 304):
+                    return response
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return None
+                retryAfter = response.headers.get('Retry-After', '')
+                if retryAfter.isdigit():
+                    delay = max(delay, float(retryAfter))
+            except requests.exceptions.RequestException:
+                pass
+            if attempt < self.retries:
+                time.sleep(delay)
+        return None
+
+    def fetchRange(self, prefix: str) -> Optional[Set[str]]:
+        """
+        Fetch the suffixes for one prefix, serving fresh responses from the cache and revalidating stale ones.
+        """
+        cached = None
+        headers = {}
+        if self.cache is not None:
+            cached = self.cache.get(prefix)
+            if cached is not None and cached.isFresh(self.cache.ttl):
+                return cached.suffixes
+            if cached is not None and cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached is not None and cached.lastModified:
+                headers['If-Modified-Since'] = cached.lastModified
+
+        response = self.requestRange(prefix, headers)
+        if response is None or (response.status_code == 304 and cached is None):
+            if cached is not None:
+                return cached.suffixes  # A stale answer is better than none when the service is unreachable
+            return None
+        if self.cache is not None and cached is not None and response.status_code == 304:
+            self.cache.refresh(prefix)
+            return cached.suffixes
+        suffixes = self.parseRange(response.text)
+        if self.cache is not None:
+            self.cache.put(prefix, suffixes, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return suffixes
+
+    def checkPasswords(self, passwords: Iterable[str]) -> Dict[str, bool]:
+        """
+        Check which of the given passwords have been compromised. Passwords whose range could not be fetched count as not pwned.
+        """
+        return self.checkPasswordBatch(passwords)[0]
+
+    def checkPasswordBatch(self, passwords: Iterable[str]) -> Tuple[Dict[str, bool], Set[str]]:
+        """
+        Check which of the given passwords have been compromised and return the prefixes whose range could not be fetched.
+        """
+        suffixesByPrefix = self.groupByPrefix(passwords)
+        prefixes = list(suffixesByPrefix)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.maxWorkers, len(prefixes)))) as executor:
+            ranges = dict(zip(prefixes, executor.map(self.fetchRange, prefixes)))
+        return self.matchRanges(suffixesByPrefix, ranges), {prefix for prefix, suffixes in ranges.items() if suffixes is None}
+
+    @classmethod
+    def groupByPrefix(cls, passwords: Iterable[str]) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Group the distinct passwords by the prefix of their hash, with the suffix of each.
+        """
+        suffixesByPrefix: Dict[str, List[Tuple[str, str]]] = {}
+        for password in set(passwords):
+            prefix, suffix = cls.splitHash(password)
+            suffixesByPrefix.setdefault(prefix, []).append((password, suffix))
+        return suffixesByPrefix
+
+    @staticmethod
+    def matchRanges(suffixesByPrefix: Dict[str, List[Tuple[str, str]]], ranges: Mapping[str, Optional[Set[str]]]) -> Dict[str, bool]:
+        """
+        Look up the suffix of every password in the range fetched for its prefix.
+        """
+        results = {}
+        for prefix, candidates in suffixesByPrefix.items():
+            pwnedSuffixes = ranges[prefix] or set()
+            for password, suffix in candidates:
+                results[password] = suffix in pwnedSuffixes
+        return results
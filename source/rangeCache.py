@@ -0,0 +1,137 @@
+"""
+In this file, we will implement the RangeCache class that keeps Pwned Passwords range responses on disk.
+
+The responses themselves are public, but the prefixes they are stored under are the first 20 bits of the SHA-1 hashes of
+the checked passwords, which narrows down a brute-force search of them. The cache therefore lives next to the vault it was
+filled from and is readable only by its owner, like the vault. Delete it together with the vault, or do not pass a cache
+to the client, if that trade-off is not wanted.
+"""
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional, Set
+
+
+
+def rangeCachePath(vaultPath: str) -> str:
+    """
+    Return the path of the range cache that belongs to a vault.
+    """
+    return os.path.join(os.path.dirname(vaultPath), 'pwnedRanges.db')
+
+
+class CachedRange:  # pylint: disable=too-few-public-methods
+    """
+    A cached range response together with the validators needed to revalidate it.
+    """
+
+    def __init__(self, suffixes: Set[str], etag: Optional[str], lastModified: Optional[str], fetchedAt: float) -> None:
+        self.suffixes: Set[str] = suffixes
+        self.etag: Optional[str] = etag
+        self.lastModified: Optional[str] = lastModified
+        self.fetchedAt: float = fetchedAt
+
+    def isFresh(self, ttl: float) -> bool:
+        """
+        Check whether the response is younger than the given time to live in seconds.
+        """
+        return time.time() - self.fetchedAt < ttl
+
+
+class RangeCache:
+    """
+    A persistent, size-bounded LRU cache of range responses keyed by hash prefix.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, maxEntries: int = 100000) -> None:
+        self.path: str = path
+        self.ttl: float = ttl
+        self.maxEntries: int = maxEntries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.revalidations: int = 0
+        self.lock: threading.Lock = threading.Lock()
+        self.connection: Optional[sqlite3.Connection] = None
+        self.entryCount: int = 0
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open the cache database on first use and create it, readable only by its owner, with its schema.
+        """
+        if self.connection is None:
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))  # SQLite gives its journal files the mode of the database
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS ranges (prefix TEXT PRIMARY KEY, suffixes TEXT NOT NULL, etag TEXT, '
+                                    'lastModified TEXT, fetchedAt REAL NOT NULL, lastUsed REAL NOT NULL)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS rangesLastUsed ON ranges (lastUsed)')
+            self.connection.commit()
+            self.entryCount = self.connection.execute('SELECT COUNT(*) FROM ranges').fetchone()[0]
+        return self.connection
+
+    def get(self, prefix: str) -> Optional[CachedRange]:
+        """
+        Look up a prefix, marking it as recently used. Stale entries are returned too so they can be revalidated.
+        """
+        with self.lock:
+            connection = self.connect()
+            row = connection.execute('SELECT suffixes, etag, lastModified, fetchedAt FROM ranges WHERE prefix = ?', (prefix,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute('UPDATE ranges SET lastUsed = ? WHERE prefix = ?', (time.time(), prefix))
+            connection.commit()
+            cached = CachedRange(set(row[0].split()), row[1], row[2], row[3])
+            if cached.isFresh(self.ttl):
+                self.hits += 1
+            else:
+                self.misses += 1
+            return cached
+
+    def put(self, prefix: str, suffixes: Set[str], etag: Optional[str] = None, lastModified: Optional[str] = None) -> None:
+        """
+        Store a freshly fetched range and evict the least recently used entries beyond the size bound.
+        """
+        now = time.time()
+        with self.lock:
+            connection = self.connect()
+            values = (' '.join(sorted(suffixes)), etag, lastModified, now, now, prefix)
+            cursor = connection.execute('UPDATE ranges SET suffixes = ?, etag = ?, lastModified = ?, fetchedAt = ?, lastUsed = ? WHERE prefix = ?', values)
+            if cursor.rowcount == 0:
+                connection.execute('INSERT INTO ranges (suffixes, etag, lastModified, fetchedAt, lastUsed, prefix) VALUES (?, ?, ?, ?, ?, ?)', values)
+                self.entryCount += 1
+            if self.entryCount > self.maxEntries:
+                excess = self.entryCount - self.maxEntries
+                connection.execute('DELETE FROM ranges WHERE prefix IN (SELECT prefix FROM ranges ORDER BY lastUsed LIMIT ?)', (excess,))
+                self.entryCount -= excess
+            connection.commit()
+
+    def refresh(self, prefix: str) -> None:
+        """
+        Mark a stale entry as fresh again after the server confirmed it is unchanged.
+        """
+        now = time.time()
+        with self.lock:
+            connection = self.connect()
+            connection.execute('UPDATE ranges SET fetchedAt = ?, lastUsed = ? WHERE prefix = ?', (now, now, prefix))
+            connection.commit()
+            self.revalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the hit, miss and revalidation counters and the number of cached prefixes.
+        """
+        with self.lock:
+            self.connect()
+            return {'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations, 'entries': self.entryCount}
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
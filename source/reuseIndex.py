@@ -0,0 +1,85 @@
+"""
+In this file, we will implement the ReuseIndex class that groups sites sharing the same password.
+"""
+import hmac
+import hashlib
+from typing import Dict, Any, Set, List, Mapping, Optional
+from source.sealedSecrets import SealedSecret
+
+
+
+class ReuseIndex:
+    """
+    A map from a keyed password fingerprint to the sites using that password, so plaintexts are never used as keys.
+    """
+
+    def __init__(self, key: bytes) -> None:
+        self.key: bytes = key
+        self.buckets: Dict[str, Set[str]] = {}
+        self.fingerprints: Dict[str, str] = {}
+        self.built: bool = False
+
+    def fingerprint(self, password: str) -> str:
+        """
+        Compute the keyed fingerprint of a password.
+        """
+        return hmac.new(self.key, password.encode(), hashlib.sha256).hexdigest()
+
+    def build(self, data: Mapping[str, Mapping[str, Any]]) -> None:
+        """
+        Rebuild the index from scratch for the given entries.
+        """
+        self.buckets = {}
+        self.fingerprints = {}
+        self.built = True
+        for site, entry in data.items():
+            self.add(site, entry)
+
+    def invalidate(self) -> None:
+        """
+        Drop the index so it is rebuilt before its next use.
+        """
+        self.buckets = {}
+        self.fingerprints = {}
+        self.built = False
+
+    def add(self, site: str, entry: Mapping[str, Any]) -> None:
+        """
+        Index the password of an entry, replacing any previously indexed version of it. Sealed passwords are indexed by
+        the fingerprint stored with them, so they are not decrypted. Does nothing until the index is built.
+        """
+        if not self.built:
+            return
+        self.remove(site)
+        password: Any = entry.get('password')
+        fingerprint: Optional[str] = password.fingerprint if isinstance(password, SealedSecret) else None
+        if isinstance(password, str):
+            fingerprint = self.fingerprint(password)
+        if fingerprint is None:
+            return
+        self.fingerprints[site] = fingerprint
+        self.buckets.setdefault(fingerprint, set()).add(site)
+
+    def remove(self, site: str) -> None:
+        """
+        Drop an entry from the index if it is indexed.
+        """
+        fingerprint = self.fingerprints.pop(site, None)
+        if fingerprint is None:
+            return
+        sites = self.buckets[fingerprint]
+        sites.discard(site)
+        if not sites:
+            del self.buckets[fingerprint]
+
+    def sitesUsing(self, password: str) -> Set[str]:
+        """
+        Return the sites whose password equals the given one.
+        """
+        return set(self.buckets.get(self.fingerprint(password), ()))
+
+    def groups(self) -> List[List[str]]:
+        """
+        Return every cluster of two or more sites that share a password.
+        """
+        return sorted(sorted(sites) for sites in self.buckets.values() if len(sites) > 1)
@@ -0,0 +1,136 @@
+"""
+In this file, we will implement the sealing of single secrets so passwords and notes are only decrypted when they are read.
+"""
+import hmac
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Mapping
+from cryptography.fernet import Fernet
+from source.entry import Entry, toEntry
+
+SECRET_FIELDS = ('password', 'notes')
+
+
+class SealedSecret:
+    """
+    An individually encrypted secret value. It never reveals its plaintext on its own, not even in its string form.
+    """
+
+    __slots__ = ('token', 'fingerprint')
+
+    def __init__(self, token: str, fingerprint: Optional[str] = None) -> None:
+        self.token: str = token
+        self.fingerprint: Optional[str] = fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, SealedSecret) and other.token == self.token
+
+    def __hash__(self) -> int:
+        return hash(self.token)
+
+    def __str__(self) -> str:
+        return '********'
+
+    def __repr__(self) -> str:
+        return 'SealedSecret(********)'
+
+
+class SecretSealer:
+    """
+    Seals and opens single secrets with a key derived from the vault key, keeping recently opened secrets in a small LRU cache.
+    """
+
+    def __init__(self, key: bytes, cacheSize: int = 128) -> None:
+        self.fernet: Fernet = Fernet(base64.urlsafe_b64encode(hmac.new(key, b'vault-secrets', hashlib.sha256).digest()))
+        self.cacheSize: int = cacheSize
+        self.cache: 'OrderedDict[str, str]' = OrderedDict()
+        self.decryptions: int = 0
+        self.lock: threading.Lock = threading.Lock()  # The cache is reordered by every read, which may come from several threads
+
+    def setKey(self, key: bytes) -> None:
+        """
+        Seal and open secrets with a new vault key from now on. Secrets sealed under the previous key can no longer be opened.
+        """
+        with self.lock:
+            self.fernet = Fernet(base64.urlsafe_b64encode(hmac.new(key, b'vault-secrets', hashlib.sha256).digest()))
+            self.cache.clear()
+
+    def seal(self, value: str, fingerprint: Optional[str] = None) -> SealedSecret:
+        """
+        Encrypt a single secret.
+        """
+        return SealedSecret(self.fernet.encrypt(value.encode()).decode(), fingerprint)
+
+    def open(self, value: Any) -> Any:
+        """
+        Return the plaintext of a sealed secret, decrypting it only if it is not in the cache. Other values are returned unchanged.
+        """
+        if not isinstance(value, SealedSecret):
+            return value
+        with self.lock:
+            plaintext = self.cache.get(value.token)
+            if plaintext is not None:
+                self.cache.move_to_end(value.token)
+                return plaintext
+            fernet = self.fernet
+        plaintext = fernet.decrypt(value.token.encode()).decode()  # Decrypted outside the lock, so readers do not wait for each other
+        with self.lock:
+            self.decryptions += 1
+            self.cache[value.token] = plaintext
+            if len(self.cache) > self.cacheSize:
+                self.cache.popitem(last=False)
+        return plaintext
+
+    def clear(self) -> None:
+        """
+        Forget all cached plaintexts.
+        """
+        with self.lock:
+            self.cache.clear()
+
+    def reveal(self, entry: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Return a copy of an entry with its secrets decrypted.
+        """
+        revealed = dict(entry)
+        for field in SECRET_FIELDS:
+            if field in revealed:
+                revealed[field] = self.open(revealed[field])
+        return revealed
+
+    def sealEntry(self, entry: Mapping[str, Any], fingerprint: Callable[[str], str]) -> Entry:
+        """
+        Return a copy of an entry whose secrets are sealed. Secrets that are already sealed are kept as they are,
+        so saving a loaded vault does not decrypt or re-encrypt them.
+        """
+        sealed = entry.copy() if isinstance(entry, Entry) else Entry(entry)
+        for field in SECRET_FIELDS:
+            value = sealed.get(field)
+            if isinstance(value, str):
+                sealed[field] = self.seal(value, fingerprint(value) if field == 'password' else None)
+        return sealed
+
+
+def jsonDefault(value: Any) -> Any:
+    """
+    Serialize sealed secrets for json.dumps as their token and fingerprint, and entries as objects.
+    """
+    if isinstance(value, Entry):
+        return dict(value)
+    if isinstance(value, SealedSecret):
+        return {'sealed': value.token, 'fingerprint': value.fingerprint} if value.fingerprint else {'sealed': value.token}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def restoreSealed(entry: Mapping[str, Any]) -> Entry:
+    """
+    Turn a parsed entry into an Entry, restoring the serialized form of its sealed secrets to SealedSecret objects.
+    """
+    restored = toEntry(entry)
+    for field in SECRET_FIELDS:
+        value = restored.get(field)
+        if isinstance(value, dict) and 'sealed' in value:
+            restored[field] = SealedSecret(value['sealed'], value.get('fingerprint'))
+    return restored
@@ -0,0 +1,95 @@
+"""
+In this file, we will implement the SearchIndex class that answers substring searches over the vault entries.
+"""
+import sys
+from typing import Dict, Any, Set, List, Mapping
+
+INDEXED_FIELDS = ('username', 'category')
+FIELD_SEPARATOR = '\x00'
+
+
+class SearchIndex:
+    """
+    An inverted trigram index over the site, username and category of every entry. Notes are sealed secrets and not indexed.
+    """
+
+    def __init__(self) -> None:
+        self.grams: Dict[str, Set[str]] = {}
+        self.texts: Dict[str, str] = {}
+        self.built: bool = False
+
+    @staticmethod
+    def gramsOf(text: str) -> Set[str]:
+        """
+        Split a lowercased text into its trigrams, skipping those that span two fields.
+        """
+        return {text[i:i + 3] for i in range(len(text) - 2) if FIELD_SEPARATOR not in text[i:i + 3]}
+
+    def build(self, data: Mapping[str, Mapping[str, Any]]) -> None:
+        """
+        Rebuild the index from scratch for the given entries.
+        """
+        self.grams = {}
+        self.texts = {}
+        self.built = True
+        for site, entry in data.items():
+            self.add(site, entry)
+
+    def invalidate(self) -> None:
+        """
+        Drop the index so it is rebuilt on the next search.
+        """
+        self.grams = {}
+        self.texts = {}
+        self.built = False
+
+    def add(self, site: str, entry: Mapping[str, Any]) -> None:
+        """
+        Index an entry, replacing any previously indexed version of it. Does nothing until the index is built.
+        """
+        if not self.built:
+            return
+        self.remove(site)
+        values = [site] + [entry.get(field) for field in INDEXED_FIELDS]
+        text = FIELD_SEPARATOR.join(value.lower() for value in values if isinstance(value, str))
+        self.texts[site] = text
+        for gram in self.gramsOf(text):
+            self.grams.setdefault(gram, set()).add(site)
+
+    def remove(self, site: str) -> None:
+        """
+        Drop an entry from the index if it is indexed.
+        """
+        text = self.texts.pop(site, None)
+        if text is None:
+            return
+        for gram in self.gramsOf(text):
+            postings = self.grams[gram]
+            postings.discard(site)
+            if not postings:
+                del self.grams[gram]
+
+    def search(self, keyword: str) -> List[str]:
+        """
+        Return the sites whose indexed fields contain the keyword, ignoring case.
+        """
+        query = keyword.lower()
+        if len(query) < 3:
+            candidates: Any = self.texts  # Too short for trigrams, scan the prelowered texts instead
+        else:
+            postings = sorted((self.grams.get(gram, set()) for gram in self.gramsOf(query)), key=len)
+            if not postings or not postings[0]:
+                return []
+            candidates = postings[0].intersection(*postings[1:])
+        return sorted(site for site in candidates if query in self.texts[site])
+
+    def memoryUsage(self) -> int:
+        """
+        Estimate the number of bytes held by the index structures.
+        """
+        size = sys.getsizeof(self.grams) + sys.getsizeof(self.texts)
+        for gram, postings in self.grams.items():
+            size += sys.getsizeof(gram) + sys.getsizeof(postings)
+        for text in self.texts.values():
+            size += sys.getsizeof(text)
+        return size
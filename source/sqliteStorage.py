@@ -0,0 +1,256 @@
+"""
+In this file, we will implement the storage backend that keeps every vault entry in its own encrypted row of an SQLite database.
+"""
+import hmac
+import json
+import base64
+import hashlib
+import sqlite3
+from typing import Dict, Any, Optional, Callable, Iterator, List, Mapping, MutableMapping, ItemsView, Tuple
+from cryptography.fernet import Fernet
+import cryptography.fernet
+from source.entry import Entry
+from source.sealedSecrets import SecretSealer
+from source.entryCodec import EntryCodec, JSON_CODEC_NAME, getCodec
+from source.storage import StorageBackend
+from source.keyDerivation import checkParameters
+from source.vaultFormat import deriveHeaderKey
+
+SQLITE_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS vault (name TEXT PRIMARY KEY, value BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS entries (siteKey BLOB PRIMARY KEY, categoryKey BLOB, site BLOB NOT NULL, entry BLOB NOT NULL) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS entriesByCategory ON entries (categoryKey)",
+)
+
+
+class SqliteItems(ItemsView[str, Entry]):
+    """
+    The items of the entries table, read with a single query instead of one lookup per site.
+    """
+
+    _mapping: 'SqliteEntries'
+
+    def __iter__(self) -> Iterator[Tuple[str, Entry]]:
+        storage = self._mapping.storage
+        for site, entry in storage.execute("SELECT site, entry FROM entries"):
+            yield storage.decrypt(site), storage.decodeEntry(entry)
+
+
+class SqliteEntries(MutableMapping[str, Entry]):
+    """
+    A mapping view of the entries table. Every access reads or writes a single row, so the vault never has to fit in memory.
+    Entries read from it are copies, assign them back to store a change.
+    """
+
+    def __init__(self, storage: 'SqliteStorage') -> None:
+        self.storage: 'SqliteStorage' = storage
+
+    def __getitem__(self, site: str) -> Entry:
+        row = self.storage.execute("SELECT entry FROM entries WHERE siteKey = ?", (self.storage.lookupKey(site),)).fetchone()
+        if row is None:
+            raise KeyError(site)
+        return self.storage.decodeEntry(row[0])
+
+    def __setitem__(self, site: str, entry: Entry) -> None:
+        self.storage.writeEntry(site, entry)
+
+    def __delitem__(self, site: str) -> None:
+        if self.storage.execute("DELETE FROM entries WHERE siteKey = ?", (self.storage.lookupKey(site),)).rowcount == 0:
+            raise KeyError(site)
+
+    def __contains__(self, site: object) -> bool:
+        if not isinstance(site, str):
+            return False
+        return self.storage.execute("SELECT 1 FROM entries WHERE siteKey = ?", (self.storage.lookupKey(site),)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (site,) in self.storage.execute("SELECT site FROM entries"):
+            yield self.storage.decrypt(site)
+
+    def __len__(self) -> int:
+        return int(self.storage.execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+
+    def items(self) -> SqliteItems:
+        return SqliteItems(self)
+
+
+class SqliteStorage(StorageBackend):
+    """
+    Stores each entry in its own row, encrypted separately from all other rows. Rows are found by a keyed hash of their site,
+    and a keyed hash of their category is indexed as well, so neither is stored in plaintext. The codec used for the rows is
+    recorded when the database is created, databases without one use the JSON codec. So are the key derivation parameters.
+    """
+
+    def __init__(self, path: str, key: bytes, secrets: SecretSealer, fingerprint: Callable[[str], str], codec: EntryCodec) -> None:
+        super().__init__(path, key, secrets, fingerprint, codec)
+        self.fernet: Fernet = Fernet(base64.urlsafe_b64encode(hmac.new(key, b'sqlite-fields', hashlib.sha256).digest()))
+        self.indexKey: bytes = hmac.new(key, b'sqlite-index', hashlib.sha256).digest()
+        self.connection: Optional[sqlite3.Connection] = None
+        self.entries: Optional[SqliteEntries] = None
+
+    def setKey(self, key: bytes, kdfParameters: Optional[Dict[str, Any]]) -> None:
+        """
+        Use a new vault key, together with the row and index keys derived from it.
+        """
+        super().setKey(key, kdfParameters)
+        self.fernet = Fernet(base64.urlsafe_b64encode(hmac.new(key, b'sqlite-fields', hashlib.sha256).digest()))
+        self.indexKey = hmac.new(key, b'sqlite-index', hashlib.sha256).digest()
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open the database on first use and create its tables.
+        """
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in SQLITE_SCHEMA:
+                self.connection.execute(statement)
+            self.connection.commit()
+        return self.connection
+
+    def execute(self, statement: str, parameters: Tuple[Any, ...] = ()) -> sqlite3.Cursor:
+        """
+        Run a statement on the database.
+        """
+        return self.connect().execute(statement, parameters)
+
+    def lookupKey(self, value: str) -> bytes:
+        """
+        Compute the keyed hash under which a site or category is indexed.
+        """
+        return hmac.new(self.indexKey, value.encode(), hashlib.sha256).digest()
+
+    def decrypt(self, value: bytes) -> str:
+        """
+        Decrypt a single encrypted column.
+        """
+        return self.fernet.decrypt(value).decode()
+
+    def decodeEntry(self, value: bytes) -> Entry:
+        """
+        Decrypt the entry column of a row. Its secrets stay sealed.
+        """
+        return self.codec.decodeEntry(self.fernet.decrypt(value))[1]
+
+    def writeEntry(self, site: str, entry: Mapping[str, Any]) -> None:
+        """
+        Insert or replace the row of a single entry.
+        """
+        category = entry.get('category')
+        self.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                     (self.lookupKey(site), self.lookupKey(category) if isinstance(category, str) else None,
+                      self.fernet.encrypt(site.encode()), self.fernet.encrypt(self.codec.encodeEntry(site, self.sealEntry(entry)))))
+
+    def keyCheck(self) -> bytes:
+        """
+        Compute the value stored in the database to check the key.
+        """
+        return hmac.new(deriveHeaderKey(self.key), b'sqlite-vault', hashlib.sha256).digest()
+
+    def writeVaultRows(self) -> None:
+        """
+        Store the key check value, the codec and the key derivation parameters of the vault.
+        """
+        self.execute("INSERT OR REPLACE INTO vault VALUES ('keyCheck', ?)", (self.keyCheck(),))
+        self.execute("INSERT OR REPLACE INTO vault VALUES ('codec', ?)", (self.codec.name,))
+        if self.kdfParameters is not None:
+            self.execute("INSERT OR REPLACE INTO vault VALUES ('kdf', ?)", (json.dumps(self.kdfParameters),))
+
+    def exists(self) -> bool:
+        """
+        Check whether the database holds a vault.
+        """
+        return self.execute("SELECT 1 FROM vault WHERE name = 'keyCheck'").fetchone() is not None
+
+    def readKdfParameters(self) -> Optional[Dict[str, Any]]:
+        """
+        Read the key derivation parameters of the vault. Databases created without them use the unsalted key.
+        """
+        row = self.execute("SELECT value FROM vault WHERE name = 'kdf'").fetchone()
+        if row is None:
+            return None
+        try:
+            return checkParameters(json.loads(row[0]))
+        except ValueError as exc:
+            raise cryptography.fernet.InvalidToken("The vault parameters are corrupted.") from exc
+
+    def unlock(self) -> None:
+        """
+        Compare the key check value stored in the database with the one of the key and select the codec of the rows,
+        storing them together with the key derivation parameters if the database is new.
+        """
+        row = self.execute("SELECT value FROM vault WHERE name = 'keyCheck'").fetchone()
+        if row is None:
+            self.writeVaultRows()
+            self.connect().commit()
+        elif not hmac.compare_digest(row[0], self.keyCheck()):
+            raise cryptography.fernet.InvalidToken("The master password is incorrect or the data is corrupted.")
+        codec = self.execute("SELECT value FROM vault WHERE name = 'codec'").fetchone()
+        self.codec = getCodec(codec[0] if codec is not None else JSON_CODEC_NAME)
+
+    def load(self, handle: Any) -> SqliteEntries:
+        """
+        Return the view of the entries table. No rows are read until they are accessed.
+        """
+        self.entries = SqliteEntries(self)
+        return self.entries
+
+    def save(self, data: Mapping[str, Mapping[str, Any]]) -> bool:
+        """
+        Commit the pending changes of the entries table, or replace all rows if the data is not the view of the table.
+        Rows are written by each process on its own and SQLite serializes the writers, so there is nothing to merge.
+        """
+        if data is not self.entries:
+            self.writeVaultRows()
+            self.execute("DELETE FROM entries")
+            for site, entry in data.items():
+                self.writeEntry(site, entry)
+        self.connect().commit()
+        return False
+
+    def needsSnapshot(self, data: Mapping[str, Mapping[str, Any]]) -> bool:
+        """
+        Changes to the view of the table are already written, anything else has to be saved in full.
+        """
+        return data is not self.entries
+
+    def persist(self, operation: str, site: str, entry: Optional[Mapping[str, Any]]) -> bool:
+        """
+        Commit the row that the view has written.
+        """
+        self.connect().commit()
+        return True
+
+    def checkpoint(self, data: MutableMapping[str, Entry]) -> MutableMapping[str, Entry]:
+        """
+        The view needs no copy, a transaction is rolled back by the database.
+        """
+        if data is self.entries:
+            return data
+        return super().checkpoint(data)
+
+    def rollback(self) -> None:
+        """
+        Roll back the uncommitted rows.
+        """
+        if self.connection is not None:
+            self.connection.rollback()
+
+    def sitesInCategory(self, data: Mapping[str, Mapping[str, Any]], category: str) -> List[str]:
+        """
+        Look up the sites of a category through the category index.
+        """
+        if data is not self.entries:
+            return super().sitesInCategory(data, category)
+        rows = self.execute("SELECT site FROM entries WHERE categoryKey = ?", (self.lookupKey(category),))
+        return sorted(self.decrypt(site) for (site,) in rows)
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        self.entries = None
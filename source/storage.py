@@ -0,0 +1,457 @@
+"""
+In this file, we will implement the storage backend interface of the vault and the backend that keeps the vault in a single encrypted file.
+"""
+import os
+import copy
+import hmac
+import json
+import stat
+import hashlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, suppress
+from typing import Dict, Any, Optional, Callable, Tuple, List, Mapping, MutableMapping, BinaryIO, Iterator, cast
+from cryptography.fernet import Fernet
+import cryptography.fernet
+from source.journal import Journal
+from source.entry import Entry
+from source.sealedSecrets import SecretSealer, restoreSealed
+from source.entryCodec import EntryCodec, JSON_CODEC_NAME, getCodec
+from source.keyDerivation import checkParameters
+from source.vaultFormat import (VAULT_FORMAT_VERSION, DEFAULT_CHUNK_SIZE, deriveHeaderKey, deriveSegmentKey, isHeaderLine, encodeHeader, verifyHeader, parseHeader,
+                                newFileId, chunkStream, writeSegments, readSegments, COMPRESSION_METHODS, compressStream, decompressStream)
+
+try:
+    import fcntl
+except ImportError:  # Windows has no advisory locks, processes writing the same vault there are not kept apart
+    fcntl = None  # type: ignore[assignment]
+
+WRITE_CONFLICT_POLICIES = ('merge', 'reject')
+TIMESTAMP_FIELDS = ('createdAt', 'modifiedAt')  # Ignored when comparing entries, the same change made twice differs only in them
+
+
+class VaultConflictError(RuntimeError):
+    """
+    Raised when the vault was changed by another process since it was loaded and the changes of this one cannot be merged into it.
+    sites lists the entries both changed, empty if the whole vault could not be merged.
+    """
+
+    def __init__(self, message: str, sites: Optional[List[str]] = None) -> None:
+        super().__init__(message)
+        self.sites: List[str] = sites or []
+
+
+def syncDirectory(path: str) -> None:
+    """
+    Flush a directory entry to disk, so a file renamed into it survives a crash. Not every platform can open directories.
+    """
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+class StorageBackend(ABC):
+    """
+    The interface between the PasswordManager and the place its entries are persisted.
+
+    The manager first derives the key from the parameters returned by readKdfParameters and passes it to setKey. unlock then
+    checks the key quickly and load returns the mapping the manager works on. The manager mutates that mapping and
+    then calls persist for the single changed entry, or save when needsSnapshot asks for all entries to be written.
+    """
+
+    def __init__(self, path: str, key: bytes, secrets: SecretSealer, fingerprint: Callable[[str], str], codec: EntryCodec) -> None:
+        self.path: str = path
+        self.key: bytes = key
+        self.secrets: SecretSealer = secrets
+        self.fingerprint: Callable[[str], str] = fingerprint
+        self.codec: EntryCodec = codec
+        self.kdfParameters: Optional[Dict[str, Any]] = None
+
+    def setKey(self, key: bytes, kdfParameters: Optional[Dict[str, Any]]) -> None:
+        """
+        Use a new vault key and record the parameters it was derived with, None for the unsalted key of older vaults.
+        """
+        self.key = key
+        self.kdfParameters = kdfParameters
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """
+        Check whether a vault has been stored yet.
+        """
+
+    @abstractmethod
+    def readKdfParameters(self) -> Optional[Dict[str, Any]]:
+        """
+        Read the key derivation parameters stored with the vault, without verifying them. Returns None if there are none.
+        """
+
+    def sealEntry(self, entry: Mapping[str, Any]) -> Entry:
+        """
+        Return a copy of an entry with its secrets sealed.
+        """
+        return self.secrets.sealEntry(entry, self.fingerprint)
+
+    @abstractmethod
+    def unlock(self) -> Any:
+        """
+        Verify the key without reading the entries. Raises InvalidToken if it is wrong. The result is passed on to load.
+        """
+
+    @abstractmethod
+    def load(self, handle: Any) -> MutableMapping[str, Entry]:
+        """
+        Read the entries after a successful unlock.
+        """
+
+    @abstractmethod
+    def save(self, data: Mapping[str, Mapping[str, Any]]) -> bool:
+        """
+        Persist all entries of the given mapping. Returns whether changes another process saved meanwhile were merged into it.
+        """
+
+    @abstractmethod
+    def needsSnapshot(self, data: Mapping[str, Mapping[str, Any]]) -> bool:
+        """
+        Check whether the next change has to be persisted by saving all entries instead of calling persist.
+        """
+
+    @abstractmethod
+    def persist(self, operation: str, site: str, entry: Optional[Mapping[str, Any]]) -> bool:
+        """
+        Persist a single put or delete that was already applied to the mapping returned by load.
+        Returns False if it could not be persisted on its own, and all entries have to be saved instead.
+        """
+
+    def noteChange(self, site: str, entry: Optional[Mapping[str, Any]]) -> None:
+        """
+        Called before an entry is changed with its current state, None if the site has no entry yet.
+        """
+
+    def checkpoint(self, data: MutableMapping[str, Entry]) -> MutableMapping[str, Entry]:
+        """
+        Start a transaction, returning what the data has to be set back to if it is rolled back.
+        """
+        return copy.deepcopy(data)
+
+    def rollback(self) -> None:
+        """
+        Discard the changes made since the last checkpoint that were not saved yet.
+        """
+
+    def sitesInCategory(self, data: Mapping[str, Mapping[str, Any]], category: str) -> List[str]:
+        """
+        Return the sites of all entries in a category.
+        """
+        return sorted(site for site, entry in data.items() if entry.get('category') == category)
+
+    def close(self) -> None:
+        """
+        Release any resources held by the backend.
+        """
+
+
+class VaultFileStorage(StorageBackend):  # pylint: disable=too-many-instance-attributes
+    """
+    Stores the vault as one encrypted file that is rewritten on every save, optionally with a journal of single mutations next to it.
+    The serialized entries can be compressed with zlib or lzma at the given level before they are encrypted.
+
+    The file is replaced atomically and every write holds an advisory lock, so several processes can share the vault. Each save
+    raises the revision in the header. A process whose vault was changed by another one since it loaded it merges the other
+    changes into its own with onConflict 'merge', unless both changed the same entry differently, or fails with 'reject'.
+    """
+
+    def __init__(self, path: str, key: bytes, secrets: SecretSealer, fingerprint: Callable[[str], str], codec: EntryCodec,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 journaled: bool = False, compression: Optional[str] = None, compressionLevel: int = 6, onConflict: str = 'merge') -> None:
+        super().__init__(path, key, secrets, fingerprint, codec)
+        if compression is not None and compression not in COMPRESSION_METHODS:
+            raise ValueError(f"Unsupported compression method {compression}.")
+        if onConflict not in WRITE_CONFLICT_POLICIES:
+            raise ValueError(f"Unknown write conflict policy {onConflict}.")
+        self.journaled: bool = journaled
+        self.compression: Optional[str] = compression
+        self.compressionLevel: int = compressionLevel
+        self.onConflict: str = onConflict
+        self.journal: Journal = Journal(path + '.journal')
+        self.lockPath: str = path + '.lock'
+        self.readLock: Optional[int] = None
+        self.knownState: Optional[Tuple[Optional[int], int]] = None  # The revision and journal size last read or written, see diskState
+        self.digestKey: bytes = os.urandom(32)
+        self.baseDigests: Dict[str, Optional[str]] = {}  # The digests of changed entries before their first unsaved change
+        self.checkpointDigests: Dict[str, Optional[str]] = {}
+
+    def acquireLock(self, exclusive: bool) -> Optional[int]:
+        """
+        Take the advisory lock of the vault, shared for reading or exclusive for writing, and return its descriptor.
+        """
+        if fcntl is None:
+            return None
+        descriptor = os.open(self.lockPath, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        except BaseException:
+            os.close(descriptor)
+            raise
+        return descriptor
+
+    def releaseLock(self, descriptor: Optional[int]) -> None:
+        """
+        Release a lock taken by acquireLock, closing the descriptor releases it.
+        """
+        if descriptor is not None:
+            os.close(descriptor)
+
+    @contextmanager
+    def lockedVault(self, exclusive: bool) -> Iterator[None]:
+        """
+        Hold the advisory lock of the vault for the duration of the block.
+        """
+        descriptor = self.acquireLock(exclusive)
+        try:
+            yield
+        finally:
+            self.releaseLock(descriptor)
+
+    def exists(self) -> bool:
+        """
+        Check whether the vault file exists.
+        """
+        return os.path.exists(self.path)
+
+    def readKdfParameters(self) -> Optional[Dict[str, Any]]:
+        """
+        Read the key derivation parameters from the header. Files without a header or without parameters use the unsalted key.
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                firstLine = file.readline()
+        except FileNotFoundError:
+            return None
+        parameters = parseHeader(firstLine).get('kdf') if isHeaderLine(firstLine) else None
+        if parameters is None:
+            return None
+        try:
+            return checkParameters(parameters)
+        except ValueError as exc:
+            raise cryptography.fernet.InvalidToken("The vault header is corrupted.") from exc
+
+    def diskState(self) -> Tuple[Optional[int], int]:
+        """
+        Read the revision of the vault file without verifying it, None if there is no file, and the size of the journal.
+        Files written before revisions were stored have revision 0.
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                firstLine = file.readline()
+            revision: Optional[int] = parseHeader(firstLine).get('revision', 0) if isHeaderLine(firstLine) else 0
+        except FileNotFoundError:
+            revision = None
+        try:
+            journalSize = os.path.getsize(self.journal.path)
+        except FileNotFoundError:
+            journalSize = 0
+        return revision, journalSize
+
+    def isStale(self) -> bool:
+        """
+        Check whether another process wrote the vault or its journal since this one last read or wrote them.
+        A backend that never read the vault replaces it, as it has no changes of its own to tell apart from those of others.
+        """
+        return self.knownState is not None and self.diskState() != self.knownState
+
+    def unlock(self) -> Tuple[Optional[BinaryIO], Optional[Dict[str, Any]], bytes]:
+        """
+        Open the vault file and verify its header, returning the open file, the header and the bytes already read of a file without header.
+        A shared lock is held until load has read the file, so no process replaces it in between.
+        """
+        self.readLock = self.acquireLock(exclusive=False)
+        try:
+            return self.openVaultFile()
+        except BaseException:
+            self.releaseLock(self.readLock)
+            self.readLock = None
+            raise
+
+    def openVaultFile(self) -> Tuple[Optional[BinaryIO], Optional[Dict[str, Any]], bytes]:
+        """
+        Open the vault file and verify its header with the current key.
+        """
+        try:
+            file: BinaryIO = open(self.path, 'rb')  # pylint: disable=consider-using-with
+        except FileNotFoundError:
+            return None, None, b''
+        try:
+            firstLine = file.readline()
+            if isHeaderLine(firstLine):
+                return file, verifyHeader(firstLine, deriveHeaderKey(self.key)), b''
+            return file, None, firstLine
+        except BaseException:
+            file.close()
+            raise
+
+    def load(self, handle: Tuple[Optional[BinaryIO], Optional[Dict[str, Any]], bytes]) -> Dict[str, Entry]:
+        """
+        Decrypt the body of the unlocked file and replay the journal on top of it, then release the lock taken by unlock.
+        """
+        try:
+            data, self.knownState = self.readState(handle)
+            self.baseDigests = {}
+            return data
+        finally:
+            self.releaseLock(self.readLock)
+            self.readLock = None
+
+    def readState(self, handle: Tuple[Optional[BinaryIO], Optional[Dict[str, Any]], bytes]) -> Tuple[Dict[str, Entry], Tuple[Optional[int], int]]:
+        """
+        Read the entries of an opened vault file and its journal, returning them with the revision and journal size they had.
+        """
+        file, header, legacyPrefix = handle
+        try:
+            data: Dict[str, Entry] = {}
+            self.journal.snapshotSize = 0
+            if file is not None:
+                data = self.readBody(file, header, legacyPrefix)
+            self.journal.replay(Fernet(self.key), data, restoreSealed)
+            revision = None if file is None else header.get('revision', 0) if header is not None else 0
+            return data, (revision, os.path.getsize(self.journal.path) if os.path.exists(self.journal.path) else 0)
+        finally:
+            if file is not None:
+                file.close()
+
+    def readBody(self, file: BinaryIO, header: Optional[Dict[str, Any]], legacyPrefix: bytes) -> Dict[str, Entry]:
+        """
+        Decrypt and parse the body of a vault file whose header has been read.
+        Segmented bodies are streamed through the codec named in the header, older single-token bodies are decrypted in one piece.
+        """
+        if header is not None and header['body'] == 'segmented':
+            chunks = readSegments(file, deriveSegmentKey(self.key), header['fileId'], header['chunkSize'])
+            if header.get('compression') is not None:
+                chunks = decompressStream(chunks, header['compression'])
+            data = dict(getCodec(header.get('codec', JSON_CODEC_NAME)).decodeEntries(chunks))
+            self.journal.snapshotSize = file.tell()
+            return data
+        encryptedData = legacyPrefix + file.read()
+        self.journal.snapshotSize = len(encryptedData)
+        loaded: Dict[str, Dict[str, Any]] = json.loads(Fernet(self.key).decrypt(encryptedData).decode())
+        return {site: restoreSealed(entry) for site, entry in loaded.items()}
+
+    def entryDigest(self, entry: Optional[Mapping[str, Any]]) -> Optional[str]:
+        """
+        Return a keyed digest of the decrypted content of an entry without its timestamps, None for a missing one, to tell whether two versions differ.
+        """
+        if entry is None:
+            return None
+        revealed = {field: value for field, value in self.secrets.reveal(entry).items() if field not in TIMESTAMP_FIELDS}
+        content = json.dumps(revealed, sort_keys=True, default=str).encode()
+        return hmac.new(self.digestKey, content, hashlib.sha256).hexdigest()
+
+    def noteChange(self, site: str, entry: Optional[Mapping[str, Any]]) -> None:
+        """
+        Remember the state an entry had before its first change since the last save, to merge it with changes of other processes.
+        """
+        if site not in self.baseDigests:
+            self.baseDigests[site] = self.entryDigest(entry)
+
+    def mergeFromDisk(self, data: MutableMapping[str, Any]) -> None:
+        """
+        Replace the entries this process did not change by those in the vault on disk, keeping the ones it changed.
+        Raises VaultConflictError if another process changed one of them differently or the vault on disk uses another key,
+        and the vault stays stale, so later saves merge again. A vault that was removed meanwhile is written again with the entries of this process.
+        """
+        if not self.exists():
+            self.knownState = None
+            return
+        try:
+            theirs, diskState = self.readState(self.openVaultFile())
+        except cryptography.fernet.InvalidToken as exc:
+            raise VaultConflictError("The vault was written with another key by another process.") from exc
+        conflicts = sorted(site for site, base in self.baseDigests.items()
+                           if self.entryDigest(theirs.get(site)) not in (base, self.entryDigest(data.get(site))))
+        if conflicts:
+            raise VaultConflictError(f"Entries changed by another process: {', '.join(conflicts)}.", conflicts)
+        for site in [site for site in data if site not in theirs and site not in self.baseDigests]:
+            del data[site]
+        for site, entry in theirs.items():
+            if site not in self.baseDigests:
+                data[site] = entry
+        self.knownState = diskState
+
+    def save(self, data: Mapping[str, Mapping[str, Any]]) -> bool:
+        """
+        Write all entries behind an authenticated header, folding any journal records into the snapshot.
+        Entries are serialized, chunked and encrypted as a stream, so no full plaintext or ciphertext copy of the vault is built.
+        The new file is written next to the vault, synced and renamed over it, so a crash leaves either the old or the new vault.
+        """
+        with self.lockedVault(exclusive=True):
+            merged = self.isStale()
+            if merged and self.onConflict == 'reject':
+                raise VaultConflictError("The vault was changed by another process since it was loaded.")
+            if merged:
+                self.mergeFromDisk(cast(MutableMapping[str, Any], data))
+            revision = ((self.knownState or self.diskState())[0] or 0) + 1
+            fileId = newFileId()
+            header = {'version': VAULT_FORMAT_VERSION, 'body': 'segmented', 'chunkSize': DEFAULT_CHUNK_SIZE, 'fileId': fileId, 'codec': self.codec.name,
+                      'compression': self.compression, 'compressionLevel': self.compressionLevel if self.compression is not None else None,
+                      'kdf': self.kdfParameters, 'revision': revision}
+            headerLine = encodeHeader(header, deriveHeaderKey(self.key))
+            temporaryPath = f'{self.path}.{os.getpid()}.tmp'
+            try:
+                with open(temporaryPath, 'wb') as file:
+                    file.write(headerLine)
+                    entries = ((site, self.sealEntry(entry)) for site, entry in data.items())
+                    pieces = self.codec.encodeEntries(entries)
+                    if self.compression is not None:
+                        pieces = compressStream(pieces, self.compression, self.compressionLevel)
+                    chunks = chunkStream(pieces, DEFAULT_CHUNK_SIZE)
+                    written = writeSegments(file, chunks, deriveSegmentKey(self.key), fileId)
+                    file.flush()
+                    os.fsync(file.fileno())
+                if self.exists():
+                    os.chmod(temporaryPath, stat.S_IMODE(os.stat(self.path).st_mode))
+                os.replace(temporaryPath, self.path)
+            except BaseException:
+                with suppress(FileNotFoundError):
+                    os.remove(temporaryPath)
+                raise
+            syncDirectory(os.path.dirname(os.path.abspath(self.path)))
+            self.journal.snapshotSize = len(headerLine) + written
+            self.journal.truncate()
+            self.knownState, self.baseDigests = (revision, 0), {}
+        return merged
+
+    def needsSnapshot(self, data: Mapping[str, Mapping[str, Any]]) -> bool:
+        """
+        Without a journal or a snapshot to append to every change rewrites the file, and a journal that grew too large is compacted.
+        """
+        return not self.journaled or not self.exists() or self.journal.needsCompaction()
+
+    def persist(self, operation: str, site: str, entry: Optional[Mapping[str, Any]]) -> bool:
+        """
+        Append the change to the journal, unless another process wrote the vault meanwhile and it has to be merged by save.
+        """
+        with self.lockedVault(exclusive=True):
+            if self.isStale():
+                return False
+            self.journal.append(Fernet(self.key), operation, site, self.sealEntry(entry) if entry is not None else None)
+            self.knownState = self.diskState()
+        self.baseDigests.pop(site, None)
+        return True
+
+    def checkpoint(self, data: MutableMapping[str, Entry]) -> MutableMapping[str, Entry]:
+        """
+        Copy the data and the state of the changed entries.
+        """
+        self.checkpointDigests = dict(self.baseDigests)
+        return super().checkpoint(data)
+
+    def rollback(self) -> None:
+        """
+        Forget the changes of entries made since the checkpoint.
+        """
+        self.baseDigests = self.checkpointDigests
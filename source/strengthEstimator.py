@@ -0,0 +1,338 @@
+"""
+In this file, we will implement a password strength estimator that scores passwords by the number of guesses an attacker would need.
+
+A password is scanned once. Every position records the patterns that end there: dictionary words and common passwords
+(also with capitals and substitutions like 0 for o), keyboard walks, repeated characters, sequences and dates. The estimate
+is the cheapest way to cover the password with these patterns and single brute-forced characters, in bits of entropy.
+"""
+import os
+import math
+import string
+import datetime
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+WORDLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wordlist.txt')
+COMMON_PASSWORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'commonPasswords.txt')
+MIN_PASSWORD_LENGTH = 8
+MIN_PATTERN_LENGTH = 3
+MIN_WORD_LENGTH = 4
+SCORE_THRESHOLDS = (20.0, 35.0, 50.0, 70.0)  # Bits of entropy needed for the scores 1 to 4
+STRONG_SCORE = 3
+SUBSTITUTIONS = str.maketrans('0134579@$!', 'oieastgasi')
+KEYBOARD_ROWS = ('1234567890-=', 'qwertyuiop[]', "asdfghjkl;'", 'zxcvbnm,./')
+SHIFTED_KEYS = str.maketrans('!@#$%^&*()_+{}:"<>?', '1234567890-=[];\',./')
+CHARACTER_CLASSES = (('lower', string.ascii_lowercase, 26), ('upper', string.ascii_uppercase, 26), ('digit', string.digits, 10),
+                     ('symbol', string.punctuation, 33))
+OTHER_CLASS_SIZE = 100
+DATE_FORMATS = {6: ('%d%m%y', '%y%m%d', '%m%d%y'), 8: ('%d%m%Y', '%Y%m%d', '%m%d%Y', '%d.%m.%y', '%m.%d.%y'),
+                10: ('%d.%m.%Y', '%Y.%m.%d', '%m.%d.%Y')}
+PATTERN_REASONS = {
+    'common': "Password contains a common password.",
+    'dictionary': "Password contains a dictionary word.",
+    'keyboard': "Password contains a keyboard pattern.",
+    'repeat': "Password contains repeated characters.",
+    'sequence': "Password contains a sequence like abc or 123.",
+    'date': "Password contains a date or year.",
+}
+
+
+def keyboardPositions() -> Dict[str, Tuple[int, int]]:
+    """
+    Return the row and column of every key of a QWERTY keyboard, with the rows shifted by half a key each like on the keyboard.
+    """
+    return {key: (row, 2 * column + row) for row, keys in enumerate(KEYBOARD_ROWS) for column, key in enumerate(keys)}
+
+
+def keyboardNeighbours() -> Dict[str, str]:
+    """
+    Return the keys next to every key of a QWERTY keyboard, in the same row and diagonally in the rows above and below.
+    """
+    neighbours: Dict[str, str] = {}
+    for row, keys in enumerate(KEYBOARD_ROWS):
+        for column, key in enumerate(keys):
+            adjacent = keys[max(column - 1, 0):column] + keys[column + 1:column + 2]
+            if row > 0:
+                adjacent += KEYBOARD_ROWS[row - 1][column:column + 2]
+            if row + 1 < len(KEYBOARD_ROWS):
+                adjacent += KEYBOARD_ROWS[row + 1][max(column - 1, 0):column + 1]
+            neighbours[key] = adjacent
+    return neighbours
+
+
+KEY_POSITIONS = keyboardPositions()
+KEYBOARD_NEIGHBOURS = keyboardNeighbours()
+TURN_BITS = math.log2(sum(map(len, KEYBOARD_NEIGHBOURS.values())) / len(KEYBOARD_NEIGHBOURS))
+
+
+class WordlistIndex:
+    """
+    A lookup of the words of a wordlist file, compiled on first use. The words of each length are kept in one string of
+    fixed-width records, ordered by their string hash, with the hashes and ranks in arrays. The index needs a handful of
+    objects instead of one per word, and a lookup is a binary search over the hashes in C and one comparison of a record.
+    """
+
+    def __init__(self, path: str, ranked: bool = False) -> None:
+        self.path: str = path
+        self.ranked: bool = ranked
+        self.words: Dict[int, str] = {}
+        self.hashes: Dict[int, 'array[int]'] = {}
+        self.ranks: Dict[int, 'array[int]'] = {}
+        self.size: int = 0
+        self.longest: int = 0
+        self.compiled: bool = False
+
+    def compile(self) -> None:
+        """
+        Read the wordlist and build the index. Words are lowercased, and the rank of a word is its line number.
+        """
+        byLength: Dict[int, Dict[str, int]] = {}
+        with open(self.path, encoding='utf-8') as file:
+            for rank, line in enumerate(file):
+                word = line.strip().lower()
+                if len(word) >= MIN_WORD_LENGTH:
+                    byLength.setdefault(len(word), {}).setdefault(word, rank)
+        for length, words in byLength.items():
+            ordered = sorted(words, key=hash)  # String hashes are salted per process, so the index is built in the process using it
+            self.words[length] = ''.join(ordered)
+            self.hashes[length] = array('q', map(hash, ordered))
+            self.ranks[length] = array('I', (words[word] for word in ordered))
+        self.size = sum(len(words) for words in byLength.values())
+        self.longest = max(byLength, default=0)
+        self.compiled = True
+
+    def rank(self, word: str) -> Optional[int]:
+        """
+        Return the rank of a lowercase word, or None if it is not in the list.
+        """
+        if not self.compiled:
+            self.compile()
+        length = len(word)
+        hashes = self.hashes.get(length)
+        if hashes is None:
+            return None
+        wordHash = hash(word)
+        position = bisect_left(hashes, wordHash)
+        while position < len(hashes) and hashes[position] == wordHash:  # Words whose hashes collide are adjacent
+            if self.words[length][position * length:(position + 1) * length] == word:
+                return self.ranks[length][position]
+            position += 1
+        return None
+
+    def guessBits(self, word: str) -> Optional[float]:
+        """
+        Return the bits needed to guess a word from this list, by its rank in a ranked list and by the list size otherwise.
+        """
+        rank = self.rank(word)
+        if rank is None:
+            return None
+        return math.log2(rank + 2) if self.ranked else math.log2(self.size)
+
+
+WORDLISTS = {'common': WordlistIndex(COMMON_PASSWORDS_PATH, ranked=True), 'dictionary': WordlistIndex(WORDLIST_PATH)}
+
+
+class StrengthEstimate:
+    """
+    The estimated entropy of a password in bits, a score from 0 to 4 and the names of the patterns found in it.
+    """
+
+    __slots__ = ('entropy', 'score', 'patterns', 'length')
+
+    def __init__(self, entropy: float, patterns: Tuple[str, ...], length: int) -> None:
+        self.entropy: float = entropy
+        self.score: int = sum(entropy >= threshold for threshold in SCORE_THRESHOLDS)
+        self.patterns: Tuple[str, ...] = patterns
+        self.length: int = length
+
+    @property
+    def strong(self) -> bool:
+        """
+        Whether the password is long enough and hard enough to guess.
+        """
+        return self.length >= MIN_PASSWORD_LENGTH and self.score >= STRONG_SCORE
+
+    def reasons(self) -> List[str]:
+        """
+        Explain why a password is not strong. Strong passwords have no reasons.
+        """
+        if self.strong:
+            return []
+        reasons = [PATTERN_REASONS[pattern] for pattern in self.patterns]
+        if self.length < MIN_PASSWORD_LENGTH:
+            reasons.insert(0, f"Password is too short (minimum {MIN_PASSWORD_LENGTH} characters).")
+        if self.score < STRONG_SCORE:
+            reasons.append(f"Password is too easy to guess (about {self.entropy:.0f} bits of entropy, "
+                           f"at least {SCORE_THRESHOLDS[STRONG_SCORE - 1]:.0f} needed).")
+        return reasons
+
+    def __repr__(self) -> str:
+        return f'StrengthEstimate(entropy={self.entropy:.1f}, score={self.score}, patterns={self.patterns})'
+
+
+def characterClass(character: str) -> Tuple[str, int]:
+    """
+    Return the name and the size of the character class a character belongs to.
+    """
+    for name, characters, size in CHARACTER_CLASSES:
+        if character in characters:
+            return name, size
+    return 'other', OTHER_CLASS_SIZE
+
+
+def classSize(character: str) -> int:
+    """
+    Return the size of the character class a character belongs to.
+    """
+    return characterClass(character)[1]
+
+
+def capitalizationBits(word: str) -> float:
+    """
+    Return the bits needed to guess the capitalization of a word: none for lowercase, one for a capital first letter or
+    all capitals and one per capital letter otherwise.
+    """
+    capitals = sum(character.isupper() for character in word)
+    if capitals == 0:
+        return 0.0
+    if capitals == len(word) or (capitals == 1 and word[0].isupper()):
+        return 1.0
+    return float(capitals)
+
+
+def isDate(window: str) -> bool:
+    """
+    Check if a string of digits, possibly with separators, is a plausible calendar date.
+    """
+    normalized = window.replace('/', '.').replace('-', '.')
+    for dateFormat in DATE_FORMATS.get(len(normalized), ()):
+        try:
+            year = datetime.datetime.strptime(normalized, dateFormat).year
+        except ValueError:
+            continue
+        if 1900 <= year <= 2099:
+            return True
+    return False
+
+
+class PatternScanner:
+    """
+    Finds the patterns that end at each position of a password, visiting the positions in order and keeping the state of the
+    repeats, sequences and keyboard walks that are still running.
+    """
+
+    def __init__(self, password: str) -> None:
+        self.password: str = password
+        self.lowered: str = password.lower()
+        self.unshifted: str = self.lowered.translate(SHIFTED_KEYS)
+        self.translated: str = self.lowered.translate(SUBSTITUTIONS)
+        self.runStart: int = 0
+        self.sequenceStart: int = 0
+        self.direction: int = 0
+        self.walkStart: int = 0
+        self.walkDirection: Optional[Tuple[int, int]] = None
+        self.turns: int = 0
+
+    def matchesEndingAt(self, index: int) -> List[Tuple[int, float, str]]:
+        """
+        Return the start, the bits to guess and the name of every pattern ending at the given position.
+        """
+        matches: List[Tuple[int, float, str]] = []
+        self.repeats(index, matches)
+        self.sequences(index, matches)
+        self.keyboardWalks(index, matches)
+        if self.password[index].isdigit():
+            self.dates(index + 1, matches)
+        self.words(index + 1, matches)
+        return matches
+
+    def repeats(self, index: int, matches: List[Tuple[int, float, str]]) -> None:
+        """
+        Add a run of the same character.
+        """
+        if not index or self.password[index] != self.password[index - 1]:
+            self.runStart = index
+        elif index + 1 - self.runStart >= MIN_PATTERN_LENGTH:
+            matches.append((self.runStart, math.log2(classSize(self.password[index])) + math.log2(index + 1 - self.runStart), 'repeat'))
+
+    def sequences(self, index: int, matches: List[Tuple[int, float, str]]) -> None:
+        """
+        Add a run of letters or digits that go up or down by one, like abc or 321.
+        """
+        current, previous = self.lowered[index], self.lowered[index - 1] if index else ''
+        step = ord(current) - ord(previous) if previous else 0
+        if step not in (1, -1) or not previous.isalnum() or characterClass(previous) != characterClass(current):
+            self.sequenceStart, self.direction = index, 0
+        elif step != self.direction:
+            self.sequenceStart, self.direction = index - 1, step
+        elif index + 1 - self.sequenceStart >= MIN_PATTERN_LENGTH:
+            matches.append((self.sequenceStart, math.log2(classSize(current)) + math.log2(index + 1 - self.sequenceStart) + 1, 'sequence'))
+
+    def keyboardWalks(self, index: int, matches: List[Tuple[int, float, str]]) -> None:
+        """
+        Add a run of neighbouring keys. Every change of direction, capital and shifted key makes a walk harder to guess.
+        """
+        key, previous = self.unshifted[index], self.unshifted[index - 1] if index else ''
+        if key not in KEYBOARD_NEIGHBOURS.get(previous, ''):
+            self.walkStart, self.walkDirection, self.turns = index, None, 0
+            return
+        direction = (KEY_POSITIONS[key][0] - KEY_POSITIONS[previous][0], KEY_POSITIONS[key][1] - KEY_POSITIONS[previous][1])
+        self.turns += self.walkDirection is not None and self.walkDirection != direction
+        self.walkDirection = direction
+        start, end = self.walkStart, index + 1
+        if end - start > MIN_PATTERN_LENGTH:
+            shifted = sum(original != plain for original, plain in zip(self.lowered[start:end], self.unshifted[start:end]))
+            bits = math.log2(len(KEYBOARD_NEIGHBOURS)) + math.log2(end - start) + self.turns * TURN_BITS + shifted
+            matches.append((start, bits + capitalizationBits(self.password[start:end]), 'keyboard'))
+
+    def dates(self, end: int, matches: List[Tuple[int, float, str]]) -> None:
+        """
+        Add the years and dates ending before position end.
+        """
+        year = self.password[max(end - 4, 0):end]
+        if len(year) == 4 and year.isdigit() and 1900 <= int(year) <= 2099:
+            matches.append((end - 4, math.log2(200), 'date'))
+        for length in DATE_FORMATS:
+            if end >= length and self.password[end - length].isdigit() and isDate(self.password[end - length:end]):
+                matches.append((end - length, math.log2(366 * 200), 'date'))
+
+    def words(self, end: int, matches: List[Tuple[int, float, str]]) -> None:
+        """
+        Add the dictionary words and common passwords ending before position end, with and without substitutions.
+        """
+        for name, wordlist in WORDLISTS.items():
+            if not wordlist.compiled:
+                wordlist.compile()
+            for start in range(max(end - wordlist.longest, 0), end - MIN_WORD_LENGTH + 1):
+                if end - start not in wordlist.words:
+                    continue
+                bits = wordlist.guessBits(self.translated[start:end])
+                if bits is not None:
+                    substitutions = sum(original != plain for original, plain in zip(self.lowered[start:end], self.translated[start:end]))
+                    matches.append((start, bits + capitalizationBits(self.password[start:end]) + substitutions, name))
+
+
+def estimateStrength(password: str) -> StrengthEstimate:
+    """
+    Estimate the strength of a password. The password is scanned once to find its character classes and the patterns ending at
+    every position, then the cheapest cover of the password with patterns and brute-forced characters is chosen.
+    """
+    scanner = PatternScanner(password)
+    classes: Dict[str, int] = {}
+    matchesEndingAt: List[List[Tuple[int, float, str]]] = [[]]
+    for index, character in enumerate(password):
+        name, size = characterClass(character)
+        classes[name] = size
+        matchesEndingAt.append(scanner.matchesEndingAt(index))
+
+    bitsPerCharacter = math.log2(sum(classes.values())) if classes else 0.0
+    cost: List[float] = [0.0]
+    patterns: List[Tuple[str, ...]] = [()]
+    for end in range(1, len(password) + 1):
+        cost.append(cost[end - 1] + bitsPerCharacter)
+        patterns.append(patterns[end - 1])
+        for start, bits, name in matchesEndingAt[end]:
+            if cost[start] + bits < cost[end]:
+                cost[end], patterns[end] = cost[start] + bits, patterns[start] + (name,)
+    return StrengthEstimate(cost[-1], tuple(dict.fromkeys(patterns[-1])), len(password))
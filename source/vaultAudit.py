@@ -0,0 +1,199 @@
+"""
+In this file, we will implement the cache and the report of the vault audit, which checks every password for strength, reuse and breaches.
+
+Results are stored per password fingerprint and audit version in a file next to the vault, encrypted with a key derived from
+the vault key. Later audits only evaluate entries that were created or modified since the previous audit.
+"""
+import os
+import json
+import hmac
+import base64
+import hashlib
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, TYPE_CHECKING
+from cryptography.fernet import Fernet, InvalidToken
+from source.strengthEstimator import StrengthEstimate
+
+if TYPE_CHECKING:
+    from source.passwordManager import PasswordManager
+
+AUDIT_VERSION = 1  # Raise this when a check changes, so results of the previous checks are evaluated again
+PWNED_RESULT_TTL = timedelta(days=7)
+
+
+def auditPath(vaultPath: str) -> str:
+    """
+    Return the path of the audit results that belong to a vault.
+    """
+    return os.path.splitext(vaultPath)[0] + '.audit'
+
+
+def resultKey(fingerprint: str) -> str:
+    """
+    Return the key of the results for a password fingerprint under the current audit version.
+    """
+    return f'{fingerprint}:{AUDIT_VERSION}'
+
+
+def changedSince(entry: Mapping[str, Any], moment: Optional[str]) -> bool:
+    """
+    Check if an entry was created or modified at or after an ISO timestamp. Entries without timestamps count as changed.
+    """
+    stamp = entry.get('modifiedAt') or entry.get('createdAt')
+    return moment is None or not isinstance(stamp, str) or stamp >= moment
+
+
+def needsPwnedCheck(result: Mapping[str, Any], now: datetime) -> bool:
+    """
+    Check if the breach status of a result is unknown or older than PWNED_RESULT_TTL, since new breaches are published all the time.
+    """
+    checkedAt = result.get('pwnedCheckedAt')
+    return result.get('pwned') is None or checkedAt is None or now - datetime.fromisoformat(checkedAt) > PWNED_RESULT_TTL
+
+
+class AuditCache:
+    """
+    The results of earlier audits: the time of the last audit, the fingerprint of the password each site had then and the
+    results of every fingerprint. A file that cannot be decrypted, for example after the vault key changed, counts as empty.
+    """
+
+    def __init__(self, path: str, key: bytes) -> None:
+        self.path: str = path
+        self.fernet: Fernet = Fernet(base64.urlsafe_b64encode(hmac.new(key, b'audit-results', hashlib.sha256).digest()))
+        self.auditedAt: Optional[str] = None
+        self.fingerprints: Dict[str, str] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> None:
+        """
+        Read the results of the previous audit if there are any.
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                state = json.loads(self.fernet.decrypt(file.read()))
+        except (FileNotFoundError, InvalidToken, ValueError):
+            return
+        if state.get('version') == AUDIT_VERSION:
+            self.auditedAt, self.fingerprints, self.results = state['auditedAt'], state['fingerprints'], state['results']
+
+    def save(self, auditedAt: str, fingerprints: Dict[str, str]) -> None:
+        """
+        Write the results of an audit, dropping those of passwords that are no longer in the vault. The file is replaced
+        atomically, so an interrupted audit leaves the previous results intact.
+        """
+        keys = {resultKey(fingerprint) for fingerprint in fingerprints.values()}
+        results = {key: result for key, result in self.results.items() if key in keys}
+        state = {'version': AUDIT_VERSION, 'auditedAt': auditedAt, 'fingerprints': fingerprints, 'results': results}
+        descriptor, temporaryPath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(self.fernet.encrypt(json.dumps(state).encode()))
+            os.replace(temporaryPath, self.path)
+        except BaseException:
+            os.remove(temporaryPath)
+            raise
+        self.auditedAt, self.fingerprints, self.results = auditedAt, fingerprints, results
+
+
+class AuditReport:
+    """
+    The findings of an audit: the reasons every weak password is weak, the groups of sites sharing a password, the sites
+    with breached passwords and those whose breach status could not be checked, and how many entries were evaluated
+    and how many were answered from earlier results.
+    """
+
+    def __init__(self) -> None:
+        self.weak: Dict[str, List[str]] = {}
+        self.reused: List[List[str]] = []
+        self.pwned: List[str] = []
+        self.unchecked: List[str] = []
+        self.evaluated: int = 0
+        self.cached: int = 0
+
+    def addResult(self, site: str, result: Mapping[str, Any], pwned: bool) -> None:
+        """
+        Add the results of one entry.
+        """
+        entropy, patterns, length = result['strength']
+        estimate = StrengthEstimate(entropy, tuple(patterns), length)
+        if not estimate.strong:
+            self.weak[site] = estimate.reasons()
+        if pwned and result.get('pwned'):
+            self.pwned.append(site)
+        elif pwned and result.get('pwned') is None:
+            self.unchecked.append(site)
+
+    def findings(self) -> List[str]:
+        """
+        Return one tab-separated line per finding, weak passwords first, then reused and breached ones.
+        """
+        lines = [f"weak\t{site}\t{' '.join(reasons)}" for site, reasons in sorted(self.weak.items())]
+        lines.extend(f"reused\t{', '.join(group)}" for group in self.reused)
+        lines.extend(f"pwned\t{site}" for site in sorted(self.pwned))
+        return lines
+
+    def toDict(self) -> Dict[str, Any]:
+        """
+        Return the report as a JSON-compatible dict.
+        """
+        return {'weak': self.weak, 'reused': self.reused, 'pwned': sorted(self.pwned), 'unchecked': sorted(self.unchecked),
+                'evaluated': self.evaluated, 'cached': self.cached}
+
+
+def auditVault(pm: 'PasswordManager', pwned: bool = True) -> AuditReport:
+    """
+    Check every password of a vault for strength, reuse and, unless pwned is False, breaches in one pass. Results are kept per
+    password fingerprint next to the vault, so entries created or modified since the last audit are the only ones evaluated.
+    The passwords without a fresh breach status are checked in one batch.
+    """
+    cache = AuditCache(auditPath(pm.storage.path), pm.key)
+    cache.load()
+    now = datetime.now()
+    report = AuditReport()
+    fingerprints: Dict[str, str] = {}
+    sitesByFingerprint: Dict[str, List[str]] = {}
+    pendingPasswords: Dict[str, str] = {}
+    for site, entry in pm.data.items():
+        password: Any = entry.get('password')
+        if password is None:
+            continue
+        fingerprint = cache.fingerprints.get(site) if not changedSince(entry, cache.auditedAt) else None
+        fingerprint = fingerprint or pm.passwordFingerprint(password)
+        fingerprints[site] = fingerprint
+        sitesByFingerprint.setdefault(fingerprint, []).append(site)
+        key = resultKey(fingerprint)
+        result = cache.results.get(key)
+        if result is None:
+            estimate = pm.estimateStrength(pm.secrets.open(password), fingerprint)
+            result = cache.results[key] = {'strength': [estimate.entropy, list(estimate.patterns), estimate.length]}
+            report.evaluated += 1
+        else:
+            report.cached += 1
+        if pwned and key not in pendingPasswords and needsPwnedCheck(result, now):
+            pendingPasswords[key] = pm.secrets.open(password)
+    if pendingPasswords:
+        updatePwnedResults(pm, cache.results, pendingPasswords, now)
+
+    for site, fingerprint in sorted(fingerprints.items()):
+        report.addResult(site, cache.results[resultKey(fingerprint)], pwned)
+    report.reused = sorted(sorted(sites) for sites in sitesByFingerprint.values() if len(sites) > 1)
+    cache.save(now.isoformat(), fingerprints)
+    return report
+
+
+def updatePwnedResults(pm: 'PasswordManager', results: Dict[str, Dict[str, Any]], passwords: Dict[str, str], now: datetime) -> None:
+    """
+    Check the breach status of passwords by their result key in one batch. Passwords whose range could not be fetched keep an
+    unknown status, so they are checked again by the next audit.
+    """
+    backend = pm.breachBackend()
+    if hasattr(backend, 'checkPasswordBatch'):  # Only the API client can fail to answer
+        pwned, failed = backend.checkPasswordBatch(passwords.values())
+    else:
+        pwned, failed = backend.checkPasswords(passwords.values()), set()
+    for key, password in passwords.items():
+        if hashlib.sha1(password.encode()).hexdigest().upper()[:5] in failed:
+            results[key]['pwned'] = None
+        else:
+            results[key]['pwned'], results[key]['pwnedCheckedAt'] = pwned[password], now.isoformat()
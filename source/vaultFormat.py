@@ -0,0 +1,198 @@
+"""
+In this file, we will implement the format of the vault file.
+
+A vault file starts with a single header line
+
+    PMVAULT2 <base64 header JSON>.<base64 HMAC-SHA256>
+
+followed by the encrypted body. The HMAC is keyed from the vault key, so it doubles as a key-check value:
+it can be verified without touching the body. Files without this line are single Fernet tokens written
+by older versions.
+
+The body is a sequence of segments, each a 4-byte length, whose top bit marks the last segment, followed by an
+AES-GCM nonce and the ciphertext of at most chunkSize plaintext bytes. The associated data of every segment binds it to the file, its position and whether
+it is the last one, so segments cannot be reordered, dropped or spliced in from another vault. The plaintext is
+the stream of entries written by the codec named in the header, optionally compressed with the method named there, so both directions
+stream with memory proportional to the chunk size.
+"""
+import os
+import hmac
+import json
+import lzma
+import zlib
+import struct
+import base64
+import hashlib
+from typing import Dict, Any, BinaryIO, Iterable, Iterator, Callable, Tuple
+import cryptography.fernet
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+VAULT_MAGIC = b'PMVAULT2 '
+VAULT_FORMAT_VERSION = 2
+DEFAULT_CHUNK_SIZE = 64 * 1024
+SEGMENT_LENGTH = struct.Struct('>I')
+SEGMENT_POSITION = struct.Struct('>Q?')  # segment index, last segment flag
+LAST_SEGMENT_FLAG = 0x80000000
+NONCE_SIZE = 12
+TAG_SIZE = 16
+COMPRESSION_METHODS: Dict[str, Tuple[Callable[[int], Any], Callable[[], Any]]] = {
+    'zlib': (zlib.compressobj, zlib.decompressobj),
+    'lzma': (lambda level: lzma.LZMACompressor(preset=level), lzma.LZMADecompressor),
+}
+
+
+def deriveHeaderKey(key: bytes) -> bytes:
+    """
+    Derive the key that authenticates the header from the vault key.
+    """
+    return hmac.new(key, b'vault-header', hashlib.sha256).digest()
+
+
+def isHeaderLine(line: bytes) -> bool:
+    """
+    Check whether the first line of a file is a vault header.
+    """
+    return line.startswith(VAULT_MAGIC)
+
+
+def encodeHeader(header: Dict[str, Any], headerKey: bytes) -> bytes:
+    """
+    Serialize and authenticate a header, returning the complete header line.
+    """
+    payload = base64.urlsafe_b64encode(json.dumps(header, sort_keys=True).encode())
+    mac = base64.urlsafe_b64encode(hmac.new(headerKey, VAULT_MAGIC + payload, hashlib.sha256).digest())
+    return VAULT_MAGIC + payload + b'.' + mac + b'\n'
+
+
+def parseHeader(line: bytes) -> Dict[str, Any]:
+    """
+    Parse a header line without verifying it, for reading the parameters needed to derive the key.
+    """
+    payload, _, _ = line[len(VAULT_MAGIC):].strip().partition(b'.')
+    try:
+        header: Dict[str, Any] = json.loads(base64.urlsafe_b64decode(payload))
+    except ValueError as exc:
+        raise cryptography.fernet.InvalidToken("The vault header is corrupted.") from exc
+    return header
+
+
+def verifyHeader(line: bytes, headerKey: bytes) -> Dict[str, Any]:
+    """
+    Verify a header line in constant time and return the header. Raises InvalidToken if the key is wrong.
+    """
+    payload, _, mac = line[len(VAULT_MAGIC):].strip().partition(b'.')
+    expected = base64.urlsafe_b64encode(hmac.new(headerKey, VAULT_MAGIC + payload, hashlib.sha256).digest())
+    if not hmac.compare_digest(mac, expected):
+        raise cryptography.fernet.InvalidToken("The master password is incorrect or the data is corrupted.")
+    header = parseHeader(line)
+    if header.get('version') != VAULT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported vault format version {header.get('version')}.")
+    return header
+
+
+def deriveSegmentKey(key: bytes) -> bytes:
+    """
+    Derive the AES-GCM key that encrypts the segments from the vault key.
+    """
+    return hmac.new(key, b'vault-segments', hashlib.sha256).digest()
+
+
+def newFileId() -> str:
+    """
+    Create a random identifier that binds the segments to one written file.
+    """
+    return base64.urlsafe_b64encode(os.urandom(16)).decode()
+
+
+def chunkStream(pieces: Iterable[bytes], chunkSize: int) -> Iterator[bytes]:
+    """
+    Regroup a stream of byte strings into chunks of exactly chunkSize bytes. The last chunk may be shorter or empty.
+    """
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        while len(buffer) >= chunkSize:
+            yield bytes(buffer[:chunkSize])
+            del buffer[:chunkSize]
+    yield bytes(buffer)
+
+
+def writeSegments(file: BinaryIO, chunks: Iterable[bytes], segmentKey: bytes, fileId: str) -> int:
+    """
+    Encrypt plaintext chunks into segments and write them, returning the number of bytes written.
+    """
+    aesgcm = AESGCM(segmentKey)
+    written = 0
+    iterator = iter(chunks)
+    current = next(iterator, b'')
+    index = 0
+    while True:
+        following = next(iterator, None)
+        last = following is None
+        nonce = os.urandom(NONCE_SIZE)
+        segment = nonce + aesgcm.encrypt(nonce, current, fileId.encode() + SEGMENT_POSITION.pack(index, last))
+        file.write(SEGMENT_LENGTH.pack(len(segment) | (LAST_SEGMENT_FLAG if last else 0)) + segment)
+        written += SEGMENT_LENGTH.size + len(segment)
+        if following is None:
+            return written
+        current = following
+        index += 1
+
+
+def readSegments(file: BinaryIO, segmentKey: bytes, fileId: str, chunkSize: int) -> Iterator[bytes]:
+    """
+    Read, authenticate and decrypt segments one at a time. Raises InvalidToken if a segment was modified,
+    reordered, or the body was truncated or extended.
+    """
+    aesgcm = AESGCM(segmentKey)
+    index = 0
+    while True:
+        lengthBytes = file.read(SEGMENT_LENGTH.size)
+        if len(lengthBytes) < SEGMENT_LENGTH.size:
+            raise cryptography.fernet.InvalidToken("The vault data is truncated.")
+        length = SEGMENT_LENGTH.unpack(lengthBytes)[0]
+        last = bool(length & LAST_SEGMENT_FLAG)
+        length &= ~LAST_SEGMENT_FLAG
+        if length > NONCE_SIZE + chunkSize + TAG_SIZE:
+            raise cryptography.fernet.InvalidToken("The vault data is corrupted.")
+        segment = file.read(length)
+        try:
+            plaintext = aesgcm.decrypt(segment[:NONCE_SIZE], segment[NONCE_SIZE:], fileId.encode() + SEGMENT_POSITION.pack(index, last))
+        except (InvalidTag, ValueError) as exc:
+            raise cryptography.fernet.InvalidToken("The vault data is corrupted.") from exc
+        yield plaintext
+        if last:
+            if file.read(1):
+                raise cryptography.fernet.InvalidToken("The vault data has trailing bytes.")
+            return
+        index += 1
+
+
+def compressStream(pieces: Iterable[bytes], method: str, level: int) -> Iterator[bytes]:
+    """
+    Compress a stream of byte strings with one of the COMPRESSION_METHODS.
+    """
+    if method not in COMPRESSION_METHODS:
+        raise ValueError(f"Unsupported compression method {method}.")
+    compressor = COMPRESSION_METHODS[method][0](level)
+    for piece in pieces:
+        compressed = compressor.compress(piece)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def decompressStream(chunks: Iterable[bytes], method: str) -> Iterator[bytes]:
+    """
+    Decompress a stream of chunks written by compressStream. Raises ValueError if the compressed data is incomplete.
+    """
+    if method not in COMPRESSION_METHODS:
+        raise ValueError(f"Unsupported compression method {method}.")
+    decompressor = COMPRESSION_METHODS[method][1]()
+    for chunk in chunks:
+        decompressed = decompressor.decompress(chunk)
+        if decompressed:
+            yield decompressed
+    if not decompressor.eof:
+        raise ValueError("The compressed vault data is incomplete.")
@@ -0,0 +1,243 @@
+"""
+In this file, we will implement the VaultPool class that keeps several vaults unlocked for a long-running service.
+
+A service that answers requests for many vaults would otherwise derive the key and decrypt a vault for every request.
+The pool keeps up to maxVaults unlocked managers, least recently used first out, and locks those that were idle for
+idleTimeout seconds or that exceed the memory limit. Locking saves pending changes and drops the entries and keys.
+"""
+import os
+import sys
+import hmac
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import cryptography.fernet
+from source.passwordManager import PasswordManager
+from source.sealedSecrets import SealedSecret
+
+DEFAULT_MAX_VAULTS = 8
+DEFAULT_IDLE_TIMEOUT = 15 * 60.0
+
+
+def estimateMemory(pm: PasswordManager) -> int:
+    """
+    Estimate the bytes held by the entries of an unlocked manager and by the plaintexts in its secret cache.
+    Shared strings are counted once per entry, so the estimate errs on the high side.
+    """
+    size = sys.getsizeof(pm.data)
+    for site, entry in pm.data.items():
+        size += sys.getsizeof(site) + sys.getsizeof(entry)
+        for value in entry.values():
+            size += sys.getsizeof(value)
+            if isinstance(value, SealedSecret):
+                size += sys.getsizeof(value.token) + sys.getsizeof(value.fingerprint)
+    return size + sum(sys.getsizeof(plaintext) for plaintext in pm.secrets.cache.values())
+
+
+class PooledVault:  # pylint: disable=too-few-public-methods
+    """
+    An unlocked vault in the pool: its manager, a keyed digest of the master password it was unlocked with, when it was last
+    used, its estimated memory and entry count, the number of callers using it and the lock that serializes them.
+    """
+
+    __slots__ = ('pm', 'passwordDigest', 'lastUsed', 'memory', 'entries', 'users', 'lock')
+
+    def __init__(self, passwordDigest: bytes) -> None:
+        self.pm: Optional[PasswordManager] = None
+        self.passwordDigest: bytes = passwordDigest
+        self.lastUsed: float = time.monotonic()
+        self.memory: int = 0
+        self.entries: int = 0
+        self.users: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    def countEntries(self, entries: int) -> None:
+        """
+        Update the memory estimate for a new number of entries, assuming that added or removed entries are as large as the
+        average one. Only a vault that had no entries is walked again, so a change never decrypts every row of a database vault.
+        """
+        if entries == self.entries or self.pm is None:
+            return
+        if self.entries == 0:
+            self.memory = estimateMemory(self.pm)
+        else:
+            self.memory = max(0, self.memory + (entries - self.entries) * self.memory // self.entries)
+        self.entries = entries
+
+
+class VaultPool:
+    """
+    Keeps unlocked PasswordManagers by vault path. open hands out the manager of a vault to one caller at a time, unlocking
+    it with the master password on first use and checking the password against the one it was unlocked with afterwards.
+    Further keyword arguments are passed on to every PasswordManager the pool creates.
+    """
+
+    def __init__(self, maxVaults: int = DEFAULT_MAX_VAULTS, idleTimeout: float = DEFAULT_IDLE_TIMEOUT, maxMemory: Optional[int] = None, **options: Any) -> None:
+        self.maxVaults: int = maxVaults
+        self.idleTimeout: float = idleTimeout
+        self.maxMemory: Optional[int] = maxMemory
+        self.options: Dict[str, Any] = options
+        self.vaults: 'OrderedDict[str, PooledVault]' = OrderedDict()
+        self.lock: threading.Lock = threading.Lock()
+        self.secret: bytes = os.urandom(32)  # Keys the password digests, so they cannot be attacked offline
+        self.counts: Dict[str, int] = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self.stopped: threading.Event = threading.Event()
+        self.reaper: Optional[threading.Thread] = None
+
+    def passwordDigest(self, masterPassword: str) -> bytes:
+        """
+        Return the keyed digest of a master password that the pool keeps instead of the password.
+        """
+        return hmac.new(self.secret, masterPassword.encode(), hashlib.sha256).digest()
+
+    @contextmanager
+    def open(self, path: str, masterPassword: str) -> Iterator[PasswordManager]:
+        """
+        Use the unlocked manager of the vault at path, unlocking it first if it is not in the pool. Other callers of the same
+        vault wait until the block ends. Raises InvalidToken if the master password is wrong.
+        """
+        vault, pm = self.checkout(path, masterPassword)
+        try:
+            yield pm
+        finally:
+            self.checkin(vault)
+
+    def checkout(self, path: str, masterPassword: str) -> Tuple[PooledVault, PasswordManager]:
+        """
+        Take the vault at path from the pool, or add and unlock it, and hold its lock. Returns the vault and its manager.
+        """
+        key = os.path.abspath(path)
+        digest = self.passwordDigest(masterPassword)
+        with self.lock:
+            vault = self.vaults.get(key)
+            if vault is None:
+                vault = self.vaults[key] = PooledVault(digest)
+            self.vaults.move_to_end(key)
+            vault.users += 1
+        vault.lock.acquire()  # pylint: disable=consider-using-with
+        try:
+            pm, hit = vault.pm, vault.pm is not None
+            if pm is None:
+                pm = PasswordManager(masterPassword, path=path, **self.options)
+                pm.loadData()
+                vault.pm, vault.passwordDigest = pm, digest
+                vault.memory, vault.entries = estimateMemory(pm), len(pm.data)
+            elif not hmac.compare_digest(vault.passwordDigest, digest):
+                raise cryptography.fernet.InvalidToken("The master password is incorrect.")
+        except BaseException:
+            self.checkin(vault)
+            raise
+        with self.lock:
+            self.counts['hits' if hit else 'misses'] += 1
+        return vault, pm
+
+    def checkin(self, vault: PooledVault) -> None:
+        """
+        Return a vault taken by checkout, update its memory estimate and lock the vaults the pool no longer has room for.
+        A vault that failed to unlock or was locked by its caller is dropped.
+        """
+        if vault.pm is not None and vault.pm.loadError is not None:
+            vault.pm = None
+        if vault.pm is not None:
+            vault.countEntries(len(vault.pm.data))
+        vault.lastUsed = time.monotonic()
+        vault.lock.release()
+        with self.lock:
+            vault.users -= 1
+            if vault.pm is None and vault.users == 0:
+                self.dropVault(vault)
+            victims = self.selectVictims()
+        self.teardown(victims)
+
+    def dropVault(self, vault: PooledVault) -> None:
+        """
+        Remove a vault from the pool. The caller holds the pool lock.
+        """
+        for key, pooled in self.vaults.items():
+            if pooled is vault:
+                del self.vaults[key]
+                return
+
+    def selectVictims(self, idleOnly: bool = False) -> List[PooledVault]:
+        """
+        Remove the vaults that are not in use and were idle for too long, then, least recently used first, those beyond the
+        number and memory limits, and return them. Vaults in use are skipped. The caller holds the pool lock.
+        """
+        now = time.monotonic()
+        idle = [key for key, vault in self.vaults.items() if vault.users == 0 and now - vault.lastUsed >= self.idleTimeout]
+        victims = [self.vaults.pop(key) for key in idle]
+        if not idleOnly:
+            memory = self.memory()
+            for key in [key for key, vault in list(self.vaults.items())[:-1] if vault.users == 0]:  # The latest vault stays even if it alone is too large
+                if len(self.vaults) <= self.maxVaults and (self.maxMemory is None or memory <= self.maxMemory):
+                    break
+                victim = self.vaults.pop(key)
+                memory -= victim.memory
+                victims.append(victim)
+        self.counts['evictions'] += len(victims)
+        return victims
+
+    def teardown(self, victims: List[PooledVault]) -> None:
+        """
+        Lock the managers of removed vaults, which saves their pending changes and drops their entries and keys.
+        """
+        for vault in victims:
+            with vault.lock:
+                if vault.pm is not None:
+                    vault.pm.lock()
+                    vault.pm = None
+
+    def evictIdle(self) -> int:
+        """
+        Lock the vaults that were not used within the idle timeout and return how many there were.
+        """
+        with self.lock:
+            victims = self.selectVictims(idleOnly=True)
+        self.teardown(victims)
+        return len(victims)
+
+    def memory(self) -> int:
+        """
+        Return the estimated bytes held by all vaults in the pool.
+        """
+        return sum(vault.memory for vault in self.vaults.values())
+
+    def start(self, interval: float = 60.0) -> 'VaultPool':
+        """
+        Lock idle vaults every interval seconds in a background thread, so they are locked even without further requests.
+        """
+        if self.reaper is None:
+            self.stopped.clear()
+            self.reaper = threading.Thread(target=self.reap, args=(interval,), name='vault-pool', daemon=True)
+            self.reaper.start()
+        return self
+
+    def reap(self, interval: float) -> None:
+        """
+        Evict idle vaults until the pool is closed.
+        """
+        while not self.stopped.wait(interval):
+            self.evictIdle()
+
+    def close(self) -> None:
+        """
+        Stop the background thread and lock every vault, waiting for the callers still using one.
+        """
+        self.stopped.set()
+        if self.reaper is not None and self.reaper is not threading.current_thread():
+            self.reaper.join()
+        self.reaper = None
+        with self.lock:
+            victims = list(self.vaults.values())
+            self.vaults.clear()
+        self.teardown(victims)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Return the number of unlocked vaults, their estimated memory, and the hits, misses and evictions so far.
+        """
+        with self.lock:
+            return {'vaults': len(self.vaults), 'memory': self.memory(), **self.counts}
@@ -0,0 +1,257 @@
+"""
+In this file, we will implement the WriteBehindSaver class that saves the vault in a background thread after mutations have settled.
+
+Mutations only mark the sites they changed. Once no further mutation arrived for a short window, or the oldest unsaved
+mutation reached the maximum delay, the thread persists all of them at once. Repeated changes of the same site are
+coalesced into one. flush saves synchronously and runs at exit and on SIGTERM and SIGHUP. A signal handler cannot wait
+for locks the interrupted code may hold, so on a signal the flush runs in its own thread and is given SIGNAL_FLUSH_TIMEOUT seconds.
+"""
+import os
+import time
+import atexit
+import signal
+import threading
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_WINDOW = 0.5
+DEFAULT_MAX_DELAY = 5.0
+SIGNAL_FLUSH_TIMEOUT = 5.0
+FLUSH_SIGNALS = tuple(getattr(signal, name) for name in ('SIGTERM', 'SIGHUP') if hasattr(signal, name))
+
+
+class PendingBatch:
+    """
+    The mutations not saved yet: the latest operation of every changed site, whether all entries have to be saved, how many
+    mutations there were and when the first and the last of them arrived.
+    """
+
+    def __init__(self) -> None:
+        self.sites: Dict[str, str] = {}
+        self.snapshot: bool = False
+        self.mutations: int = 0
+        self.firstChange: float = 0.0
+        self.lastChange: float = 0.0
+
+    def empty(self) -> bool:
+        """
+        Check whether there is nothing to save.
+        """
+        return not self.sites and not self.snapshot
+
+    def add(self, site: Optional[str], operation: str, now: float) -> None:
+        """
+        Record a mutation of a site, or with no site a change that requires all entries to be saved.
+        """
+        if self.empty():
+            self.firstChange = now
+        if site is None:
+            self.snapshot = True
+        else:
+            self.sites[site] = operation
+        self.mutations += 1
+        self.lastChange = now
+
+    def restore(self, failed: 'PendingBatch') -> None:
+        """
+        Take back the mutations of a batch whose save failed, keeping the operations of newer mutations of the same sites.
+        """
+        if self.empty():
+            self.firstChange, self.lastChange = failed.firstChange, failed.lastChange
+        else:
+            self.firstChange, self.lastChange = min(self.firstChange, failed.firstChange), max(self.lastChange, failed.lastChange)
+        for site, operation in failed.sites.items():
+            self.sites.setdefault(site, operation)
+        self.snapshot = self.snapshot or failed.snapshot
+        self.mutations += failed.mutations
+
+
+class SaveStats:
+    """
+    The number of saves and of mutations they coalesced, the duration of the last, the longest and all saves, the delay of the
+    last save after its first mutation in seconds, and the error of the last save if it failed.
+    """
+
+    def __init__(self) -> None:
+        self.saves: int = 0
+        self.coalesced: int = 0
+        self.lastLatency: float = 0.0
+        self.maxLatency: float = 0.0
+        self.totalLatency: float = 0.0
+        self.lastDelay: float = 0.0
+        self.lastError: Optional[BaseException] = None
+
+    def recordSave(self, mutations: int, latency: float, delay: float) -> None:
+        """
+        Count a successful save.
+        """
+        self.saves += 1
+        self.coalesced += mutations
+        self.lastLatency = latency
+        self.maxLatency = max(self.maxLatency, latency)
+        self.totalLatency += latency
+        self.lastDelay = delay
+        self.lastError = None
+
+    def toDict(self) -> Dict[str, Any]:
+        """
+        Return the statistics with the average instead of the total duration of the saves.
+        """
+        return {'saves': self.saves, 'coalesced': self.coalesced, 'lastLatency': self.lastLatency, 'maxLatency': self.maxLatency,
+                'averageLatency': self.totalLatency / self.saves if self.saves else 0.0, 'lastDelay': self.lastDelay,
+                'lastError': self.lastError}
+
+
+class WriteBehindSaver:
+    """
+    Collects mutations by site and saves them in a background thread. save is called with the latest operation of every
+    changed site and whether all entries have to be written. Failed saves are kept pending and retried.
+    """
+
+    def __init__(self, save: Callable[[Dict[str, str], bool], None], window: float = DEFAULT_WINDOW, maxDelay: float = DEFAULT_MAX_DELAY) -> None:
+        self.save: Callable[[Dict[str, str], bool], None] = save
+        self.window: float = window
+        self.maxDelay: float = max(maxDelay, window)
+        self.condition: threading.Condition = threading.Condition()
+        self.pending: PendingBatch = PendingBatch()
+        self.saving: Optional[threading.Thread] = None
+        self.closed: bool = False
+        self.stats: SaveStats = SaveStats()
+        self.thread: threading.Thread = threading.Thread(target=self.run, name='write-behind', daemon=True)
+        self.previousHandlers: Dict[int, Any] = {}
+
+    def start(self) -> 'WriteBehindSaver':
+        """
+        Start the background thread and flush at exit and, when called from the main thread, on SIGTERM and SIGHUP.
+        """
+        self.thread.start()
+        atexit.register(self.close)
+        if threading.current_thread() is threading.main_thread():
+            for signalNumber in FLUSH_SIGNALS:
+                self.previousHandlers[signalNumber] = signal.signal(signalNumber, self.handleSignal)
+        return self
+
+    def handleSignal(self, signalNumber: int, frame: Any) -> None:
+        """
+        Save pending mutations, then let the handler that was installed before ours, or the default action, handle the signal.
+        The save is skipped if the signal interrupted one, and abandoned after SIGNAL_FLUSH_TIMEOUT if it waits for a lock the
+        interrupted code holds.
+        """
+        try:
+            if self.saving is not threading.current_thread():
+                flusher = threading.Thread(target=self.flushQuietly, name='write-behind-flush', daemon=True)
+                flusher.start()
+                flusher.join(SIGNAL_FLUSH_TIMEOUT)
+        finally:
+            previous = self.previousHandlers.get(signalNumber, signal.SIG_DFL)
+            if callable(previous):
+                previous(signalNumber, frame)
+            elif previous == signal.SIG_DFL:
+                signal.signal(signalNumber, signal.SIG_DFL)
+                os.kill(os.getpid(), signalNumber)
+
+    def markDirty(self, site: Optional[str] = None, operation: str = 'put') -> None:
+        """
+        Record a mutation of a site, or with no site a change that requires all entries to be saved.
+        """
+        with self.condition:
+            self.pending.add(site, operation, time.monotonic())
+            self.condition.notify_all()
+
+    def run(self) -> None:
+        """
+        Save whenever mutations have settled, until the saver is closed.
+        """
+        while self.waitUntilDue():
+            try:
+                self.savePending()
+            except Exception:  # pylint: disable=broad-exception-caught
+                with self.condition:  # The error is kept in the stats and raised by flush, retry after the window
+                    self.condition.wait(self.window)
+
+    def waitUntilDue(self) -> bool:
+        """
+        Wait until there are pending mutations and the window since the last one or the maximum delay since the first one passed.
+        Returns False once the saver is closed.
+        """
+        with self.condition:
+            while not self.closed:
+                if self.pending.empty():
+                    self.condition.wait()
+                    continue
+                remaining = min(self.pending.lastChange + self.window, self.pending.firstChange + self.maxDelay) - time.monotonic()
+                if remaining <= 0:
+                    return True
+                self.condition.wait(remaining)
+            return False
+
+    def savePending(self) -> None:
+        """
+        Save the pending mutations in the calling thread, waiting for a save in progress first. If the save fails, its mutations
+        stay pending unless newer ones replaced them, and the error is raised.
+        """
+        with self.condition:
+            if self.saving is threading.current_thread():
+                return  # A signal handler interrupted a save of this thread, the mutations after it are saved later
+            while self.saving is not None:
+                self.condition.wait()
+            if self.pending.empty():
+                return
+            batch, self.pending = self.pending, PendingBatch()
+            self.saving = threading.current_thread()
+        start = time.monotonic()
+        try:
+            self.save(batch.sites, batch.snapshot)
+        except BaseException as error:
+            with self.condition:
+                self.pending.restore(batch)
+                self.stats.lastError = error
+                self.saving = None
+                self.condition.notify_all()
+            raise
+        end = time.monotonic()
+        with self.condition:
+            self.stats.recordSave(batch.mutations, end - start, end - batch.firstChange)
+            self.saving = None
+            self.condition.notify_all()
+
+    def flush(self) -> None:
+        """
+        Save all pending mutations now and wait until they are written. Raises the error if the save fails.
+        """
+        self.savePending()
+
+    def flushQuietly(self) -> None:
+        """
+        Flush, leaving a failure in the stats instead of raising it.
+        """
+        try:
+            self.flush()
+        except Exception:  # pylint: disable=broad-exception-caught
+            pass
+
+    def close(self) -> None:
+        """
+        Flush, stop the thread and restore the signal handlers. Closing twice does nothing.
+        """
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+        atexit.unregister(self.close)
+        if threading.current_thread() is threading.main_thread():
+            for signalNumber, previous in self.previousHandlers.items():
+                signal.signal(signalNumber, previous)
+        self.previousHandlers = {}
+        self.flush()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Return the queue depth (the number of mutations and sites not saved yet), the number of saves and of mutations they
+        coalesced, the duration of the last, the longest and the average save, the delay of the last save after its first
+        mutation in seconds, and the error of the last save if it failed.
+        """
+        with self.condition:
+            return {'pendingMutations': self.pending.mutations, 'pendingSites': len(self.pending.sites), **self.stats.toDict()}
@@ -0,0 +1,97 @@
+#pylint: disable=C)
+import os
+import stat
+import time
+import unittest
+from unittest.mock import patch
+from source.passwordManager import PasswordManager
+from source.agent import VaultAgent, AgentClient, AgentError, defaultSocketPath
+from source.storage import VaultConflictError
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestAgent(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        pm = PasswordManager(self.masterPassword)
+        pm.addPassword('example.com', 'alice', 'first', 'notes', 'Mail')
+        self.pm = PasswordManager(self.masterPassword)
+        self.pm.loadData()
+        self.socketPath = os.path.join(self.tempDir.name, 'agent', 'agent.sock')
+
+    def startAgent(self, idleTimeout=60.0):
+        agent = VaultAgent(self.pm, self.socketPath, idleTimeout)
+        agent.start()
+        self.addCleanup(agent.stop)
+        return AgentClient(self.socketPath)
+
+    def testServesRequests(self):
+        client = self.startAgent()
+        self.assertEqual(client.get('example.com')['password'], 'first')
+        self.assertIsNone(client.get('missing.com'))
+        client.add('github.com', 'bob', 'second', category='Development')
+        self.assertEqual(client.search('github'), {'github.com': {'username': 'bob', 'createdAt': self.pm.data['github.com']['createdAt'],
+                                                                  'category': 'Development'}})
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData()
+        self.assertEqual(reloaded.getPassword('github.com')['password'], 'second')
+
+    def testSocketIsPrivate(self):
+        self.startAgent()
+        self.assertEqual(stat.S_IMODE(os.stat(self.socketPath).st_mode) & 0o077, 0)
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(self.socketPath)).st_mode) & 0o077, 0)
+
+    def testSocketDirectoryMustBePrivate(self):
+        os.makedirs(os.path.dirname(self.socketPath), mode=0o755)
+        os.chmod(os.path.dirname(self.socketPath), 0o755)
+        with self.assertRaises(PermissionError):
+            self.startAgent()
+        with self.assertRaises(PermissionError):
+            AgentClient(self.socketPath).status()
+        os.symlink(os.path.dirname(self.socketPath), 'linked')
+        with self.assertRaises(PermissionError):
+            VaultAgent(self.pm, os.path.join(self.tempDir.name, 'linked', 'agent.sock')).start()
+
+    def testDefaultSocketPathPrefersTheRuntimeDirectory(self):
+        with patch.dict(os.environ, {'XDG_RUNTIME_DIR': self.tempDir.name}):
+            os.environ.pop('PASSWORD_MANAGER_AGENT', None)
+            self.assertEqual(defaultSocketPath(), os.path.join(self.tempDir.name, 'passwordManager', 'agent.sock'))
+
+    def testStorageErrorsAreReported(self):
+        client = self.startAgent()
+        with patch.object(self.pm, 'addPassword', side_effect=VaultConflictError("Entries changed by another process: github.com.")):
+            with self.assertRaisesRegex(AgentError, 'another process'):
+                client.add('github.com', 'bob', 'second')
+        with patch.object(self.pm, 'addPassword', side_effect=OSError("disk full")):
+            with self.assertRaisesRegex(AgentError, 'disk full'):
+                client.add('github.com', 'bob', 'second')
+        self.assertEqual(client.get('example.com')['username'], 'alice')
+
+    def testLocksWhenIdle(self):
+        client = self.startAgent(idleTimeout=0.2)
+        self.assertEqual(client.get('example.com')['username'], 'alice')
+        time.sleep(0.6)
+        self.assertTrue(client.status()['locked'])
+        self.assertEqual(self.pm.masterPassword, '')
+        with self.assertRaises(PermissionError):
+            _ = self.pm.data
+        with self.assertRaises(AgentError):
+            client.get('example.com')
+
+        with self.assertRaises(AgentError):
+            client.unlock("WrongPassword")
+        client.unlock(self.masterPassword)
+        self.assertEqual(client.get('example.com')['password'], 'first')
+
+    def testMalformedRequestsAreRejected(self):
+        client = self.startAgent()
+        with self.assertRaises(AgentError):
+            client.request('delete', site='example.com')
+        with self.assertRaises(AgentError):
+            client.request('get')
+        self.assertFalse(client.status()['locked'])
+
+
+if __name__ == '__main__':
+    unittest.main()
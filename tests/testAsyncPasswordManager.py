@@ -0,0 +1,111 @@
+#pylint: disable=C)
+import time
+import asyncio
+import threading
+import unittest
+from collections import Counter
+from source.asyncPasswordManager import AsyncPasswordManager
+from source.passwordManager import PasswordManager
+from source.pwnedClient import PwnedPasswordsClient
+from tests.vaultTestCase import AsyncVaultTestCase, FAST_KDF
+
+
+class SlowRangeClient(PwnedPasswordsClient):
+    """
+    A client whose range fetches block for a while and are counted, without network access.
+    """
+
+    def __init__(self, pwnedPasswords, delay):
+        super().__init__(maxWorkers=4)
+        self.ranges = {}
+        for password in pwnedPasswords:
+            prefix, suffix = self.splitHash(password)
+            self.ranges.setdefault(prefix, set()).add(suffix)
+        self.delay = delay
+        self.fetches = Counter()
+        self.lock = threading.Lock()
+
+    def fetchRange(self, prefix):
+        with self.lock:
+            self.fetches[prefix] += 1
+        time.sleep(self.delay)
+        return self.ranges.get(prefix, set())
+
+
+class TestAsyncPasswordManager(AsyncVaultTestCase):
+
+    async def testConcurrentWritersAreSerializedAndSaved(self):
+        manager = await AsyncPasswordManager.open(self.masterPassword, kdf=FAST_KDF)
+        await asyncio.gather(*(manager.addPassword(f'site{number}.com', 'user', f'Password!{number}') for number in range(50)))
+        await manager.updatePassword('site7.com', password='Changed!7')
+        await manager.deletePassword('site8.com')
+        self.assertEqual((await manager.getPassword('site7.com'))['password'], 'Changed!7')
+        self.assertEqual(len(await manager.searchPassword('site')), 49)
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData()
+        self.assertEqual(len(reloaded.data), 49)
+
+    async def testAuditIsSerializedWithWriters(self):
+        manager = await AsyncPasswordManager.open(self.masterPassword, kdf=FAST_KDF)
+        await asyncio.gather(*(manager.addPassword(f'site{number}.com', 'user', f'Password!{number}') for number in range(20)))
+        results = await asyncio.gather(manager.audit(pwned=False), *(manager.addPassword(f'new{number}.com', 'user', 'weak') for number in range(20)))
+        report = results[0]
+        self.assertEqual(report.evaluated + report.cached, 20)  # The audit ran before the writers queued after it
+        self.assertEqual(sum(site.startswith('new') for site in (await manager.audit(pwned=False)).weak), 20)
+
+    async def testReadersRunAlongsideWriters(self):
+        manager = await AsyncPasswordManager.open(self.masterPassword, kdf=FAST_KDF)
+        manager.pm.data = {f'site{number}.com': {'username': 'user', 'password': f'Password!{number}'} for number in range(5000)}
+        manager.pm.enableWriteBehind(window=60, maxDelay=60)
+        for attempt in range(5):
+            manager.pm.searchIndex.invalidate()  # Every round builds the index while the writers add entries
+            manager.pm.reuseIndex.invalidate()
+            results = await asyncio.gather(manager.searchPassword('site1'), manager.getPassword('site1.com'),
+                                           *(manager.addPassword(f'new{attempt}-{number}.com', 'user', f'New!{number}') for number in range(50)))
+            self.assertIn('site1.com', results[0])
+            self.assertEqual(results[1]['password'], 'Password!1')
+        self.assertFalse(await manager.run(manager.pm.checkReusedPassword, 'Unused!1'))
+        await manager.lock()
+
+    async def testLoopIsNotBlockedWhileSaving(self):
+        manager = await AsyncPasswordManager.open(self.masterPassword, kdf=FAST_KDF)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.ensure_future(ticker())
+        try:
+            manager.pm.data = {f'site{number}.com': {'username': 'user', 'password': f'Password!{number}'} for number in range(5000)}
+            await manager.saveData()
+        finally:
+            task.cancel()
+        self.assertGreater(ticks, 1)
+
+    async def testConcurrentChecksShareRangeFetches(self):
+        manager = AsyncPasswordManager(PasswordManager(self.masterPassword))
+        client = SlowRangeClient(['password1'], delay=0.1)
+        manager.pm.pwnedBackend = client
+        start = time.perf_counter()
+        results = await asyncio.gather(*(manager.checkPwnedPassword(password) for password in ['password1', 'correct horse'] * 100))
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(results[:2], [True, False])
+        self.assertEqual(sorted(client.fetches.values()), [1, 1])
+        self.assertEqual(await manager.checkPwnedPasswords(['password1', 'other']), {'password1': True, 'other': False})
+
+    async def testLocalBreachCorpusRunsOnTheExecutor(self):
+        manager = AsyncPasswordManager(PasswordManager(self.masterPassword))
+
+        class Corpus:  # pylint: disable=too-few-public-methods
+            def checkPasswords(self, passwords):
+                return {password: password == 'password1' for password in passwords}
+
+        manager.pm.pwnedBackend = Corpus()
+        self.assertEqual(await manager.checkPwnedPasswords(['password1', 'other']), {'password1': True, 'other': False})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+#pylint: disable=C)
+import os
+import hashlib
+import unittest
+from source.breachCorpus import BreachCorpus, convertCorpus
+from source.passwordManager import PasswordManager
+from tests.vaultTestCase import VaultTestCase
+
+
+def sha1Hex(password):
+    return hashlib.sha1(password.encode()).hexdigest()
+
+
+class TestBreachCorpus(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.sourcePath = os.path.join(self.tempDir.name, 'corpus.txt')
+        self.targetPath = os.path.join(self.tempDir.name, 'corpus.bin')
+        lines = [
+            f'{sha1Hex("password").upper()}:10',
+            f'{sha1Hex("123456")}:7',
+            '',
+            f'{sha1Hex("letmein").upper()}',
+            f'{sha1Hex("qwerty").upper()}:2',
+            f'{sha1Hex("password").upper()}:5',
+        ]
+        with open(self.sourcePath, 'w', encoding='utf-8') as file:
+            file.write('\r\n'.join(lines))
+
+    def testConvertSortsAndMergesDuplicates(self):
+        self.assertEqual(convertCorpus(self.sourcePath, self.targetPath, runRecords=2), 4)
+        self.assertEqual(os.listdir(self.tempDir.name).count('corpus.bin'), 1)
+        self.assertEqual(len(os.listdir(self.tempDir.name)), 2)  # No temporary runs are left behind
+
+        corpus = BreachCorpus(self.targetPath)
+        self.addCleanup(corpus.close)
+        self.assertEqual(corpus.recordCount, 4)
+        self.assertEqual(corpus.count('password'), 15)
+        self.assertEqual(corpus.count('123456'), 7)
+        self.assertEqual(corpus.count('letmein'), 1)
+        self.assertEqual(corpus.count('correct horse battery staple'), 0)
+        self.assertEqual(corpus.checkPasswords(['qwerty', 'unbreached']), {'qwerty': True, 'unbreached': False})
+
+    def testRejectsUnconvertedFile(self):
+        with self.assertRaises(ValueError):
+            BreachCorpus(self.sourcePath)
+
+    def testPasswordManagerUsesCorpusBackend(self):
+        convertCorpus(self.sourcePath, self.targetPath)
+        pm = PasswordManager("SuperSecretMasterPassword")
+        pm.pwnedBackend = BreachCorpus(self.targetPath)
+        self.addCleanup(pm.pwnedBackend.close)
+        self.assertTrue(pm.checkPwnedPassword('password'))
+        self.assertFalse(pm.checkPwnedPassword('unbreached'))
+
+
+if __name__ == '__main__':
+    unittest.main()
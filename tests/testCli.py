@@ -0,0 +1,105 @@
+#pylint: disable=C)
+import io
+import os
+import sys
+import subprocess
+import unittest
+from unittest.mock import patch
+from source.cli import main, IMPORT_TIME_BUDGET, MASTER_PASSWORD_VARIABLE
+from source.agent import VaultAgent, AGENT_SOCKET_VARIABLE
+from source.passwordManager import PasswordManager
+from tests.vaultTestCase import VaultTestCase
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestCli(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        environment = patch.dict(os.environ, {MASTER_PASSWORD_VARIABLE: self.masterPassword, AGENT_SOCKET_VARIABLE: os.path.join(self.tempDir.name, 'agent.sock')})
+        environment.start()
+        self.addCleanup(environment.stop)
+        pm = PasswordManager(self.masterPassword)
+        pm.addPassword('example.com', 'alice', 'k8#Vq2!mZr4$Tx', None, 'Mail')
+        pm.addPassword('github.com', 'bob', 'weak', None, 'Development')
+
+    def runCli(self, *argv):
+        output = io.StringIO()
+        status = main(list(argv), output)
+        return status, output.getvalue()
+
+    def testImportIsFast(self):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                                 "import sys, source.cli; print(' '.join(sorted(name for name in sys.modules if name.split('.')[0] in ('cryptography', 'requests', 'source'))))"],
+                                cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ['source', 'source.cli'])
+        cumulative = [int(line.split('|')[1]) for line in result.stderr.splitlines() if line.rstrip().endswith('| source.cli')]
+        self.assertLess(cumulative[0] / 1e6, IMPORT_TIME_BUDGET)
+
+    def testGetAndSearch(self):
+        self.assertEqual(self.runCli('get', 'example.com'), (0, 'k8#Vq2!mZr4$Tx\n'))
+        self.assertEqual(self.runCli('get', 'example.com', '--field', 'username'), (0, 'alice\n'))
+        self.assertEqual(self.runCli('get', 'missing.com')[0], 1)
+        self.assertEqual(self.runCli('search', 'git'), (0, 'github.com\tbob\tDevelopment\n'))
+
+    def testVaultOption(self):
+        self.assertEqual(self.runCli('--vault', 'team.json', 'add', 'team.com', '--password', 'k8#Vq2!mZr4$Tx')[0], 0)
+        self.assertEqual(self.runCli('--vault', 'team.json', 'get', 'team.com'), (0, 'k8#Vq2!mZr4$Tx\n'))
+        self.assertEqual(self.runCli('get', 'team.com')[0], 1)
+
+    def testAddGeneratesPassword(self):
+        status, output = self.runCli('add', 'new.com', '--username', 'carol', '--length', '20')
+        self.assertEqual(status, 0)
+        self.assertEqual(self.runCli('get', 'new.com'), (0, output))
+        self.assertEqual(len(output.strip()), 20)
+
+    def testImportExportRoundTrip(self):
+        status, exported = self.runCli('export', '-')
+        self.assertEqual(status, 0)
+        self.assertIn('example.com,alice,k8#Vq2!mZr4$Tx,,Mail,', exported.splitlines())
+        with open('entries.csv', 'w', encoding='utf-8') as file:
+            file.write(exported.replace('example.com', 'copy.com').replace('github.com', 'copy2.com'))
+        with patch('source.passwordManager.PasswordManager.saveData', autospec=True, side_effect=PasswordManager.saveData) as mockSave:
+            self.assertEqual(self.runCli('import', 'entries.csv'), (0, 'Imported 2 new, 0 updated and 0 skipped entries.\n'))
+            mockSave.assert_called_once()
+        self.assertEqual(self.runCli('get', 'copy.com'), (0, 'k8#Vq2!mZr4$Tx\n'))
+
+    def testAuditReportsFindings(self):
+        self.runCli('add', 'reused.com', '--password', 'weak')
+        status, output = self.runCli('audit')
+        self.assertEqual(status, 1)
+        self.assertIn('reused\tgithub.com, reused.com', output)
+        self.assertIn('weak\tgithub.com', output)
+        self.assertNotIn('example.com', output)
+
+    def testWrongMasterPassword(self):
+        with patch.dict(os.environ, {MASTER_PASSWORD_VARIABLE: 'WrongPassword'}):
+            self.assertEqual(self.runCli('get', 'example.com'), (2, ''))
+
+    def testUsesRunningAgent(self):
+        pm = PasswordManager(self.masterPassword)
+        pm.loadData()
+        agent = VaultAgent(pm, os.environ[AGENT_SOCKET_VARIABLE])
+        agent.start()
+        self.addCleanup(agent.stop)
+        with patch.dict(os.environ, {MASTER_PASSWORD_VARIABLE: 'WrongPassword'}):  # Never used while the agent answers
+            self.assertEqual(self.runCli('get', 'github.com'), (0, 'weak\n'))
+            self.assertEqual(self.runCli('--no-agent', 'get', 'github.com')[0], 2)
+            self.assertEqual(self.runCli('--vault', os.path.abspath('passwords.json'), 'get', 'github.com'), (0, 'weak\n'))
+
+    def testAgentOfAnotherVaultIsNotUsed(self):
+        pm = PasswordManager(self.masterPassword)
+        pm.loadData()
+        agent = VaultAgent(pm, os.environ[AGENT_SOCKET_VARIABLE])
+        agent.start()
+        self.addCleanup(agent.stop)
+        self.assertEqual(self.runCli('--storage', 'sqlite', 'get', 'github.com')[0], 1)  # Answered from the empty database vault
+        os.mkdir('other')
+        os.chdir('other')
+        self.assertEqual(self.runCli('get', 'github.com')[0], 1)  # Answered from the vault of this directory
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+#pylint: disable=C)
+import os
+import time
+import threading
+import unittest
+from unittest.mock import patch
+from source.passwordManager import PasswordManager
+from source.storage import VaultConflictError, fcntl
+from source.vaultFormat import parseHeader
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestConcurrentWriters(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        pm = PasswordManager(self.masterPassword)
+        pm.loadData()
+        with pm.transaction():
+            pm.addPassword('shared.com', 'user', 'Shared!1')
+            pm.addPassword('old.com', 'user', 'Old!1')
+
+    def openManager(self, **options):
+        pm = PasswordManager(self.masterPassword, **options)
+        pm.loadData()
+        return pm
+
+    def reload(self):
+        return self.openManager().data
+
+    def revision(self):
+        with open('passwords.json', 'rb') as file:
+            return parseHeader(file.readline())['revision']
+
+    def testStaleWriterMergesChangesOfOtherSites(self):
+        first, second = self.openManager(), self.openManager()
+        first.addPassword('first.com', 'user', 'First!1')
+        first.deletePassword('old.com')
+        second.addPassword('second.com', 'user', 'Second!1')
+        self.assertEqual(set(second.data), {'shared.com', 'first.com', 'second.com'})
+        self.assertEqual(set(self.reload()), {'shared.com', 'first.com', 'second.com'})
+        self.assertEqual(second.searchPassword('first'), {'first.com': second.data['first.com']})
+
+    def testSameChangeOnBothSidesIsNoConflict(self):
+        first, second = self.openManager(), self.openManager()
+        first.updatePassword('shared.com', password='Changed!1')
+        second.updatePassword('shared.com', password='Changed!1')
+        self.assertEqual(self.openManager().getPassword('shared.com')['password'], 'Changed!1')
+
+    def testConflictingChangesAreRejected(self):
+        first, second = self.openManager(), self.openManager()
+        first.updatePassword('shared.com', password='First!1')
+        with self.assertRaises(VaultConflictError) as context:
+            second.updatePassword('shared.com', password='Second!1')
+        self.assertEqual(context.exception.sites, ['shared.com'])
+        self.assertEqual(self.openManager().getPassword('shared.com')['password'], 'First!1')
+
+    def testWriterStaysStaleAfterAConflict(self):
+        first, second = self.openManager(), self.openManager()
+        first.updatePassword('shared.com', password='First!1')
+        first.addPassword('first.com', 'user', 'First!1')
+        with self.assertRaises(VaultConflictError):
+            second.updatePassword('shared.com', password='Second!1')
+        with self.assertRaises(VaultConflictError):
+            second.addPassword('second.com', 'user', 'Second!1')  # The conflicting change is still unsaved
+        reloaded = self.openManager()
+        self.assertEqual(reloaded.getPassword('shared.com')['password'], 'First!1')
+        self.assertIn('first.com', reloaded.data)
+
+    def testRejectPolicyFailsOnAnyStaleWrite(self):
+        first, second = self.openManager(), self.openManager(onConflict='reject')
+        first.addPassword('first.com', 'user', 'First!1')
+        with self.assertRaises(VaultConflictError):
+            second.addPassword('second.com', 'user', 'Second!1')
+        self.assertNotIn('second.com', self.reload())
+        with self.assertRaises(ValueError):
+            PasswordManager(self.masterPassword, onConflict='ignore')
+
+    def testJournaledWriterFallsBackToMergingSave(self):
+        pm = self.openManager()
+        with pm.transaction():  # Large enough that single records are appended instead of compacted
+            for number in range(50):
+                pm.addPassword(f'site{number}.com', 'user', f'Password!{number}')
+        first, second = self.openManager(journaled=True), self.openManager(journaled=True)
+        first.addPassword('first.com', 'user', 'First!1')
+        self.assertTrue(os.path.exists('passwords.json.journal'))
+        second.addPassword('second.com', 'user', 'Second!1')
+        self.assertFalse(os.path.exists('passwords.json.journal'))
+        self.assertTrue({'shared.com', 'old.com', 'first.com', 'second.com'} <= set(self.reload()))
+
+    def testRevisionIncreasesWithEverySave(self):
+        revision = self.revision()
+        pm = self.openManager()
+        pm.addPassword('next.com', 'user', 'Next!1')
+        self.assertEqual(self.revision(), revision + 1)
+
+    def testFailedWriteKeepsThePreviousVault(self):
+        with open('passwords.json', 'rb') as file:
+            previous = file.read()
+        pm = self.openManager()
+        with patch('source.storage.writeSegments', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                pm.addPassword('new.com', 'user', 'New!1')
+        with open('passwords.json', 'rb') as file:
+            self.assertEqual(file.read(), previous)
+        self.assertFalse([name for name in os.listdir('.') if name.endswith('.tmp')])
+
+    @unittest.skipIf(fcntl is None, "advisory locks are not available on this platform")
+    def testSaveWaitsForTheLockOfAnotherWriter(self):
+        pm, revision = self.openManager(), self.revision()
+        descriptor = os.open('passwords.json.lock', os.O_RDWR | os.O_CREAT)
+        fcntl.flock(descriptor, fcntl.LOCK_EX)
+        writer = threading.Thread(target=pm.addPassword, args=('new.com', 'user', 'New!1'))
+        writer.start()
+        time.sleep(0.2)
+        self.assertTrue(writer.is_alive())
+        self.assertEqual(self.revision(), revision)
+        os.close(descriptor)
+        writer.join(5)
+        self.assertIn('new.com', self.reload())
+
+
+if __name__ == '__main__':
+    unittest.main()
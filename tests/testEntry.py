@@ -0,0 +1,52 @@
+#pylint: disable=C)
+import copy
+import unittest
+from unittest.mock import patch
+from source.entry import Entry
+from source.passwordManager import PasswordManager
+
+
+class TestEntry(unittest.TestCase):
+
+    def testBehavesLikeTheDictItReplaces(self):
+        fields = {'username': 'alice', 'password': 'pass', 'createdAt': '2024-01-01T12:00:00.123456', 'notes': None, 'tags': ['a']}
+        entry = Entry(fields)
+        self.assertEqual(entry, fields)
+        self.assertEqual(dict(entry), fields)
+        self.assertEqual(entry['createdAt'], '2024-01-01T12:00:00.123456')
+        self.assertIsNone(entry['notes'])
+        self.assertNotIn('category', entry)
+        self.assertIsNone(entry.get('category'))
+        with self.assertRaises(KeyError):
+            _ = entry['category']
+        del entry['tags']
+        self.assertEqual(len(entry), 4)
+
+    def testCompactStorage(self):
+        first = Entry({'username': ''.join(['al', 'ice']), 'category': ''.join(['Wo', 'rk']), 'createdAt': '2024-01-01T12:00:00'})
+        second = Entry({'username': ''.join(['ali', 'ce']), 'category': ''.join(['W', 'ork']), 'createdAt': 'yesterday'})
+        self.assertIs(first.username, second.username)
+        self.assertIs(first.category, second.category)
+        self.assertIsInstance(first.createdAt, int)
+        self.assertEqual(second['createdAt'], 'yesterday')
+        self.assertFalse(hasattr(first, '__dict__'))
+
+    def testCopiesAreIndependent(self):
+        entry = Entry({'username': 'alice', 'tags': ['a']})
+        duplicate = copy.deepcopy(entry)
+        duplicate['username'] = 'bob'
+        duplicate['tags'].append('b')
+        self.assertEqual(entry, {'username': 'alice', 'tags': ['a']})
+
+    @patch('source.passwordManager.PasswordManager.saveData')
+    def testManagerStoresEntries(self, _mockSave):
+        pm = PasswordManager("SuperSecretMasterPassword")
+        pm.addPassword('example.com', 'alice', 'pass')
+        self.assertIsInstance(pm.data['example.com'], Entry)
+        pm.data = {'other.com': {'username': 'bob'}}
+        self.assertIsInstance(pm.data['other.com'], Entry)
+        self.assertEqual(type(pm.getPassword('other.com')), dict)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#pylint: disable=C)
+import unittest
+from source.passwordManager import PasswordManager
+from source.sealedSecrets import SealedSecret, SecretSealer
+from source.entryCodec import EntryCodec, BinaryCodec, JsonCodec, CODECS, getCodec
+from source.vaultFormat import encodeHeader, parseHeader, deriveHeaderKey, deriveSegmentKey, chunkStream, writeSegments
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestEntryCodec(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        sealer = SecretSealer(b'key')
+        self.entries = [
+            ('example.com', {'username': 'alice', 'password': sealer.seal('first', 'ab' * 32), 'createdAt': '2024-01-01T12:00:00',
+                             'notes': sealer.seal('notes'), 'category': 'Mail'}),
+            ('mail.com', {'username': None, 'password': None, 'createdAt': '2024-01-01T12:00:00.123456', 'notes': None, 'category': 'Mail'}),
+            ('plain.com', {'username': 'bob', 'password': 'plain', 'notes': 'plain notes', 'category': None}),
+            ('other.com', {'createdAt': 'yesterday', 'tags': ['a', 'b'], 'password': sealer.seal('x', 'short')}),
+            ('empty.com', {}),
+        ]
+
+    def testAllCodecsRoundTrip(self):
+        for codec in CODECS.values():
+            with self.subTest(codec=codec.name):
+                data = b''.join(codec.encodeEntries(self.entries))
+                self.assertEqual(list(codec.decodeEntries([data[i:i + 7] for i in range(0, len(data), 7)])), self.entries)
+                self.assertEqual(codec.decodeEntry(codec.encodeEntry(*self.entries[0])), self.entries[0])
+
+    def testBinaryRecordsAreCompact(self):
+        binary = b''.join(BinaryCodec().encodeEntries(self.entries))
+        json = b''.join(JsonCodec().encodeEntries(self.entries))
+        self.assertLess(len(binary), len(json))
+        self.assertNotIn(b'Mail', binary[binary.index(b'mail.com'):])  # The second category is a reference to the first
+        self.assertNotIn(b'2024', binary)
+
+    def testBinaryKeepsFingerprintsAndSealing(self):
+        _, entry = next(BinaryCodec().decodeEntries(BinaryCodec().encodeEntries(self.entries[:1])))
+        self.assertIsInstance(entry['password'], SealedSecret)
+        self.assertEqual(entry['password'].fingerprint, 'ab' * 32)
+        self.assertIsNone(entry['notes'].fingerprint)
+
+    def testTruncatedBinaryStreamIsRejected(self):
+        data = b''.join(BinaryCodec().encodeEntries(self.entries))
+        with self.assertRaises(ValueError):
+            list(BinaryCodec().decodeEntries([data[:-3]]))
+
+    def testUnknownCodecIsRejected(self):
+        with self.assertRaises(ValueError):
+            getCodec('yaml')
+        with self.assertRaises(TypeError):
+            EntryCodec()  # pylint: disable=abstract-class-instantiated
+
+    def testVaultsWithoutCodecLoadAsJson(self):
+        pm = PasswordManager(self.masterPassword)
+        header = {'version': 2, 'body': 'segmented', 'chunkSize': 100, 'fileId': 'file-id'}
+        with open('passwords.json', 'wb') as file:
+            file.write(encodeHeader(header, deriveHeaderKey(pm.key)))
+            entries = JsonCodec().encodeEntries([('example.com', {'username': 'user', 'password': 'pass'})])
+            writeSegments(file, chunkStream(entries, 100), deriveSegmentKey(pm.key), 'file-id')
+        pm.loadData()
+        self.assertEqual(pm.getPassword('example.com'), {'username': 'user', 'password': 'pass'})
+
+        pm.saveData()  # Migrates the vault to the binary codec
+        with open('passwords.json', 'rb') as file:
+            self.assertEqual(parseHeader(file.readline())['codec'], 'binary1')
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData()
+        self.assertEqual(reloaded.getPassword('example.com'), {'username': 'user', 'password': 'pass'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#pylint: disable=C)
+import io
+import unittest
+from unittest.mock import patch
+from source.passwordManager import PasswordManager
+from source.importExport import PROGRESS_INTERVAL, readRecords
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestImportExport(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pm = PasswordManager(self.masterPassword)
+        self.pm.addPassword('example.com', 'alice', 'first', 'old notes', 'Mail')
+
+    def testImportSavesOnce(self):
+        rows = ''.join(f'site{index}.com,user{index},pass{index},,Work,\n' for index in range(2500))
+        progress = []
+        with patch.object(self.pm, 'saveData', wraps=self.pm.saveData) as mockSave:
+            counts = self.pm.importEntries(io.StringIO('site,username,password,notes,category,url\n' + rows), progress=progress.append)
+            mockSave.assert_called_once()
+        self.assertEqual(counts, {'added': 2500, 'updated': 0, 'skipped': 0})
+        self.assertEqual(progress, [PROGRESS_INTERVAL, 2 * PROGRESS_INTERVAL, 2500])
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData()
+        self.assertEqual(len(reloaded.data), 2501)
+        self.assertEqual(reloaded.getPassword('site7.com')['password'], 'pass7')
+
+    def testConflictPolicies(self):
+        csv = 'site,username,password,notes,category\nexample.com,,second,,\n'
+        self.assertEqual(self.pm.importEntries(io.StringIO(csv), conflict='skip')['skipped'], 1)
+        self.assertEqual(self.pm.getPassword('example.com')['password'], 'first')
+
+        self.assertEqual(self.pm.importEntries(io.StringIO(csv), conflict='merge')['updated'], 1)
+        merged = self.pm.getPassword('example.com')
+        self.assertEqual((merged['username'], merged['password'], merged['notes']), ('alice', 'second', 'old notes'))
+        self.assertEqual(self.pm.importEntries(io.StringIO(csv), conflict='merge')['skipped'], 1)  # Nothing left to merge
+
+        self.assertEqual(self.pm.importEntries(io.StringIO(csv), conflict='overwrite')['updated'], 1)
+        overwritten = self.pm.getPassword('example.com')
+        self.assertEqual((overwritten['username'], overwritten['password'], overwritten['notes']), (None, 'second', None))
+        with self.assertRaises(ValueError):
+            self.pm.importEntries(io.StringIO(csv), conflict='ask')
+
+    def testOtherManagerFormats(self):
+        files = {
+            'bitwarden': 'folder,favorite,type,name,notes,fields,reprompt,login_uri,login_username,login_password,login_totp\n'
+                         'Dev,,login,GitHub,some notes,,0,https://github.com,bob,secret,\n',
+            'lastpass': 'url,username,password,totp,extra,name,grouping,fav\nhttps://github.com,bob,secret,,some notes,GitHub,Dev,0\n',
+            'chrome': 'name,url,username,password,note\nGitHub,https://github.com,bob,secret,some notes\n',
+        }
+        for name, contents in files.items():
+            with self.subTest(format=name):
+                site, record = next(readRecords(io.StringIO(contents), name))
+                self.assertEqual(site, 'GitHub')
+                self.assertEqual((record['username'], record['password'], record['notes'], record['url']), ('bob', 'secret', 'some notes', 'https://github.com'))
+                self.pm.importEntries(io.StringIO(contents), name, conflict='overwrite')
+                exported = io.StringIO()
+                self.assertEqual(self.pm.exportEntries(exported, name), 2)
+                self.assertEqual(exported.getvalue().splitlines()[0], contents.splitlines()[0])
+                self.assertIn(contents.splitlines()[1], exported.getvalue().splitlines())
+        with self.assertRaises(ValueError):
+            self.pm.exportEntries(io.StringIO(), 'keepass')
+
+    def testRowsWithoutSiteAreSkipped(self):
+        records = list(readRecords(io.StringIO('name,url,username,password,note\n,,bob,secret,\n,https://a.com,carol,pw,\n'), 'chrome'))
+        self.assertEqual([site for site, _ in records], ['https://a.com'])
+
+
+if __name__ == '__main__':
+    unittest.main()
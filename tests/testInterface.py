@@ -143,27 +143,38 @@ class TestCursesInterface(unittest.TestCase):
         self.pm.searchPassword.return_value = {
             'example.com': {
                 'username': 'user',
-                'password': 'pass',
-                'notes': 'some notes',
+                'password': '********',
+                'notes': '********',
                 'category': 'general',
                 'createdAt': '2024-01-01'
             }
         }
+        self.pm.getPassword.return_value = {
+            'username': 'user',
+            'password': 'pass',
+            'notes': 'some notes',
+            'category': 'general',
+            'createdAt': '2024-01-01'
+        }
 
         with patch.object(self.interface, 'getInput', return_value="example"):
             self.interface.searchPassword(stdscr)
             self.pm.searchPassword.assert_called_once_with("example")
             stdscr.addstr.assert_any_call(0, 0, "Site: example.com")
+            self.pm.getPassword.assert_called_once_with("example.com")
+            stdscr.addstr.assert_any_call(2, 0, "Password: pass")
+            stdscr.addstr.assert_any_call(3, 0, "Notes: some notes")
 
     @patch('source.interface.curses')
     def testCheckPwnedPasswordWithPwnedPasswords(self, mockCurses):
         stdscr = MagicMock()
-        # Mock the pm data and checkPwnedPassword method
+        # Mock the pm data and checkPwnedPasswords method
         self.pm.data = {
             'example.com': {'password': '123456'},
             'another.com': {'password': 'password'}
         }
-        self.pm.checkPwnedPassword.side_effect = lambda password: password in ['123456']
+        self.pm.getPassword.side_effect = self.pm.data.get
+        self.pm.checkPwnedPasswords.side_effect = lambda passwords: {password: password in ['123456'] for password in passwords}
 
         self.interface.checkPwnedPassword(stdscr)
 
@@ -176,12 +187,13 @@ class TestCursesInterface(unittest.TestCase):
     @patch('source.interface.curses')
     def testCheckPwnedPasswordNoPwnedPasswords(self, mockCurses):
         stdscr = MagicMock()
-        # Mock the pm data and checkPwnedPassword method
+        # Mock the pm data and checkPwnedPasswords method
         self.pm.data = {
             'example.com': {'password': 'securepassword'},
             'another.com': {'password': 'anothersecurepassword'}
         }
-        self.pm.checkPwnedPassword.side_effect = lambda password: False
+        self.pm.getPassword.side_effect = self.pm.data.get
+        self.pm.checkPwnedPasswords.side_effect = lambda passwords: {password: False for password in passwords}
 
         self.interface.checkPwnedPassword(stdscr)
 
@@ -193,13 +205,14 @@ class TestCursesInterface(unittest.TestCase):
     @patch('source.interface.curses')
     def testCheckReusedPasswordWithReusedPasswords(self, mockCurses):
         stdscr = MagicMock()
-        # Mock the pm data and checkReusedPassword method
+        # Mock the pm data and reuseGroups method
         self.pm.data = {
             'example.com': {'password': 'reusedpassword'},
             'another.com': {'password': 'reusedpassword'},
             'unique.com': {'password': 'uniquepassword'}
         }
-        self.pm.checkReusedPassword.side_effect = lambda password: password == 'reusedpassword'
+        self.pm.getPassword.side_effect = self.pm.data.get
+        self.pm.reuseGroups.return_value = [['example.com', 'another.com']]
 
         self.interface.checkReusedPassword(stdscr)
 
@@ -214,12 +227,13 @@ class TestCursesInterface(unittest.TestCase):
     @patch('source.interface.curses')
     def testCheckReusedPasswordNoReusedPasswords(self, mockCurses):
         stdscr = MagicMock()
-        # Mock the pm data and checkReusedPassword method
+        # Mock the pm data and reuseGroups method
         self.pm.data = {
             'example.com': {'password': 'uniquepassword1'},
             'another.com': {'password': 'uniquepassword2'}
         }
-        self.pm.checkReusedPassword.side_effect = lambda password: False
+        self.pm.getPassword.side_effect = self.pm.data.get
+        self.pm.reuseGroups.return_value = []
 
         self.interface.checkReusedPassword(stdscr)
 
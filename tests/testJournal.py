@@ -0,0 +1,70 @@
+#pylint: disable=C)
+import os
+import unittest
+from cryptography.fernet import Fernet, InvalidToken
+from source.passwordManager import PasswordManager
+from source.journal import Journal
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestJournal(VaultTestCase):
+
+    def testMutationsAreAppendedInsteadOfRewritingTheSnapshot(self):
+        pm = PasswordManager(self.masterPassword, journaled=True)
+        pm.storage.journal.maxRatio = 100.0
+        pm.addPassword('first.com', 'user', 'pass')
+        snapshot = os.path.getsize('passwords.json')
+        pm.addPassword('second.com', 'user', 'pass')
+        pm.updatePassword('first.com', password='newpass')
+        pm.deletePassword('second.com')
+        self.assertEqual(os.path.getsize('passwords.json'), snapshot)
+        self.assertEqual(pm.storage.journal.recordCount, 3)
+
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData()
+        self.assertEqual(list(reloaded.data), list(pm.data))
+        self.assertEqual(reloaded.getPassword('first.com'), pm.getPassword('first.com'))
+        self.assertEqual(reloaded.getPassword('first.com')['password'], 'newpass')
+        self.assertNotIn('second.com', reloaded.data)
+
+    def testCompactionFoldsJournalIntoSnapshot(self):
+        pm = PasswordManager(self.masterPassword, journaled=True)
+        pm.storage.journal.maxRecords = 3
+        pm.storage.journal.maxRatio = 100.0
+        for index in range(4):
+            pm.addPassword(f'site{index}.com', 'user', 'pass')
+        self.assertEqual(pm.storage.journal.recordCount, 0)
+        self.assertFalse(os.path.exists('passwords.json.journal'))
+
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData()
+        self.assertEqual(len(reloaded.data), 4)
+
+    def testSaveDataTruncatesJournal(self):
+        pm = PasswordManager(self.masterPassword, journaled=True)
+        pm.storage.journal.maxRatio = 100.0
+        pm.addPassword('first.com', 'user', 'pass')
+        pm.addPassword('second.com', 'user', 'pass')
+        self.assertTrue(os.path.exists('passwords.json.journal'))
+        pm.saveData()
+        self.assertFalse(os.path.exists('passwords.json.journal'))
+
+    def testReplayIgnoresTornTailRecord(self):
+        fernet = Fernet(Fernet.generate_key())
+        journal = Journal('test.journal')
+        journal.append(fernet, 'put', 'example.com', {'username': 'user'})
+        with open('test.journal', 'ab') as file:
+            file.write(b'gAAAAABtorn')
+        data = {}
+        journal.replay(fernet, data)
+        self.assertEqual(data, {'example.com': {'username': 'user'}})
+
+    def testReplayRejectsWrongKey(self):
+        journal = Journal('test.journal')
+        journal.append(Fernet(Fernet.generate_key()), 'put', 'example.com', {'username': 'user'})
+        with self.assertRaises(InvalidToken):
+            journal.replay(Fernet(Fernet.generate_key()), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#pylint: disable=C)
+import json
+import unittest
+from cryptography.fernet import InvalidToken
+from source.passwordManager import PasswordManager
+from source.keyDerivation import KEY_CACHE, MIN_SCRYPT_COST, MIN_PBKDF2_ITERATIONS, MAX_PBKDF2_ITERATIONS, checkParameters, deriveKey, newParameters, calibrate
+from source.sealedSecrets import SealedSecret
+from source.sqliteStorage import SqliteEntries
+from source.vaultFormat import parseHeader, encodeHeader, deriveHeaderKey
+from tests.vaultTestCase import VaultTestCase, FAST_KDF
+
+
+class TestKeyDerivation(VaultTestCase):
+
+    def readHeader(self):
+        with open('passwords.json', 'rb') as file:
+            return parseHeader(file.readline())
+
+    def testKeysDependOnPasswordAndSalt(self):
+        parameters = newParameters(FAST_KDF)
+        key = deriveKey(self.masterPassword, parameters)
+        self.assertEqual(len(key), 44)
+        self.assertEqual(deriveKey(self.masterPassword, dict(parameters)), key)
+        self.assertNotEqual(deriveKey(self.masterPassword, newParameters(FAST_KDF)), key)
+        self.assertNotEqual(deriveKey("WrongPassword", parameters), key)
+        pbkdf2 = newParameters({'name': 'pbkdf2', 'iterations': MIN_PBKDF2_ITERATIONS})
+        self.assertEqual(len(deriveKey(self.masterPassword, pbkdf2)), 44)
+
+    def testParametersAreStoredInTheHeader(self):
+        pm = PasswordManager(self.masterPassword, kdf=FAST_KDF)
+        pm.addPassword('example.com', 'alice', 'pass')
+        parameters = self.readHeader()['kdf']
+        self.assertEqual(parameters['n'], MIN_SCRYPT_COST)
+        self.assertNotEqual(pm.key, pm.generateKey(self.masterPassword))
+
+        other = PasswordManager(self.masterPassword, kdf=FAST_KDF)
+        other.storage.path = 'other.json'
+        other.addPassword('example.com', 'alice', 'pass')
+        self.assertNotEqual(other.kdfParameters['salt'], parameters['salt'])
+        self.assertNotEqual(other.key, pm.key)
+
+    def testReloadingUsesTheCachedKey(self):
+        pm = PasswordManager(self.masterPassword, kdf=FAST_KDF)
+        pm.addPassword('example.com', 'alice', 'pass')
+        derivations = KEY_CACHE.derivations
+        for _ in range(3):
+            reloaded = PasswordManager(self.masterPassword)
+            reloaded.loadData()
+            reloaded.saveData()
+            self.assertEqual(reloaded.getPassword('example.com')['password'], 'pass')
+        self.assertEqual(KEY_CACHE.derivations, derivations)
+        with self.assertRaises(InvalidToken):
+            PasswordManager("WrongPassword").loadData()
+
+    def testUnsaltedVaultIsMigrated(self):
+        pm = PasswordManager(self.masterPassword, kdf=FAST_KDF)
+        pm.data = {'example.com': {'username': 'alice', 'password': 'shared'}, 'mail.com': {'username': 'bob', 'password': 'shared'}}
+        pm.storage.setKey(pm.key, None)
+        pm.storage.save(pm.data)  # A vault written with the unsalted key
+        self.assertIsNone(self.readHeader()['kdf'])
+
+        legacy = PasswordManager(self.masterPassword, kdf=FAST_KDF)
+        legacy.loadData()
+        self.assertIsNone(legacy.kdfParameters)
+        legacy.saveData()
+        self.assertEqual(self.readHeader()['kdf'], legacy.kdfParameters)
+
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData()
+        self.assertEqual(reloaded.getPassword('mail.com')['password'], 'shared')
+        self.assertEqual(reloaded.reuseGroups(), [['example.com', 'mail.com']])
+
+    def testUnsaltedSqliteVaultStaysAViewOfItsRows(self):
+        pm = PasswordManager(self.masterPassword, storage='sqlite', kdf=FAST_KDF)
+        self.addCleanup(pm.storage.close)
+        pm.storage.setKey(pm.key, None)
+        pm.storage.save({'example.com': {'username': 'alice', 'password': 'pass'}})  # A database written with the unsalted key
+
+        legacy = PasswordManager(self.masterPassword, storage='sqlite', kdf=FAST_KDF)
+        self.addCleanup(legacy.storage.close)
+        legacy.loadData()
+        self.assertIsNone(legacy.kdfParameters)
+        legacy.saveData()
+        self.assertIsNotNone(legacy.kdfParameters)
+        self.assertIsInstance(legacy.data, SqliteEntries)
+        self.assertIsInstance(legacy.data['example.com']['password'], SealedSecret)
+        legacy.addPassword('mail.com', 'bob', 'other')
+
+        reloaded = PasswordManager(self.masterPassword, storage='sqlite')
+        self.addCleanup(reloaded.storage.close)
+        reloaded.loadData()
+        self.assertEqual(reloaded.getPassword('example.com')['password'], 'pass')
+        self.assertEqual(reloaded.getPassword('mail.com')['password'], 'other')
+
+    def testAbsurdParametersAreRejected(self):
+        parameters = dict(newParameters(FAST_KDF), n=2 ** 40)
+        with open('passwords.json', 'wb') as file:
+            file.write(encodeHeader({'version': 2, 'body': 'segmented', 'kdf': parameters}, deriveHeaderKey(b'key')))
+        with self.assertRaises(InvalidToken):
+            PasswordManager(self.masterPassword).loadData()
+
+    def testParametersNeedingTooMuchMemoryOrTimeAreRejected(self):
+        for cost in ({'name': 'scrypt', 'n': 2 ** 22, 'r': 32, 'p': 16}, {'name': 'scrypt', 'n': 2 ** 19, 'r': 8, 'p': 1},
+                     {'name': 'pbkdf2', 'iterations': MAX_PBKDF2_ITERATIONS + 1}):
+            with self.assertRaises(ValueError):
+                checkParameters(dict(cost, salt='c2FsdA=='))
+        checkParameters({'name': 'scrypt', 'n': 2 ** 18, 'r': 8, 'p': 1, 'salt': 'c2FsdA=='})
+
+    def testSqliteStoresParameters(self):
+        pm = PasswordManager(self.masterPassword, storage='sqlite', kdf=FAST_KDF)
+        self.addCleanup(pm.storage.close)
+        pm.loadData()
+        pm.addPassword('example.com', 'alice', 'pass')
+        stored = pm.storage.execute("SELECT value FROM vault WHERE name = 'kdf'").fetchone()[0]
+        self.assertEqual(json.loads(stored), pm.kdfParameters)
+
+        reloaded = PasswordManager(self.masterPassword, storage='sqlite')
+        self.addCleanup(reloaded.storage.close)
+        reloaded.loadData()
+        self.assertEqual(reloaded.getPassword('example.com')['password'], 'pass')
+
+    def testCalibrationRespectsLimits(self):
+        self.assertEqual(calibrate(0.0), FAST_KDF)
+        self.assertEqual(calibrate(0.0, 'pbkdf2'), {'name': 'pbkdf2', 'iterations': MIN_PBKDF2_ITERATIONS})
+        self.assertEqual(calibrate(10.0, maxMemory=0)['n'], MIN_SCRYPT_COST)
+        with self.assertRaises(ValueError):
+            calibrate(0.5, 'md5')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -36,9 +36,11 @@ class TestPasswordManagerInterface(unittest.TestCase):
 
         mockGetHiddenPassword.assert_called_once_with(stdscr, "Enter your master password: ")
         mockPasswordManager.assert_called_once_with('correct_password')
-        mockPm.loadData.assert_called_once()
+        mockPm.loadData.assert_called_once_with(background=True)
         mockCursesInterface.assert_called_once_with(mockPm)
         mockInterface.run.assert_called_once_with(stdscr)
+        mockPm.enableWriteBehind.assert_called_once_with()
+        mockPm.lock.assert_called_once_with()
 
     @patch('main.PasswordManager')
     @patch('main.getHiddenPassword')
@@ -61,5 +63,22 @@ class TestPasswordManagerInterface(unittest.TestCase):
         self.assertEqual(stdscr.getch.call_count, 4)  # Updated expected call count
         stdscr.addstr.assert_any_call(0, 0, "Maximum attempts reached. Exiting...")
 
+    @patch('main.PasswordManager')
+    @patch('main.CursesInterface')
+    @patch('main.getHiddenPassword')
+    @patch('main.curses')
+    def testMainStopsTheSaverAfterAFailedAttempt(self, mockCurses, mockGetHiddenPassword, mockCursesInterface, mockPasswordManager):
+        stdscr = MagicMock()
+        mockPm = MagicMock()
+        mockPasswordManager.return_value = mockPm
+        mockCursesInterface.return_value.run.side_effect = [cryptography.fernet.InvalidToken, None]  # Found out while decrypting in the background
+
+        with patch('main.curses.wrapper', lambda f: f(stdscr)):
+            main(stdscr)
+
+        self.assertEqual(mockPm.enableWriteBehind.call_count, 2)
+        self.assertEqual(mockPm.lock.call_count, 2)
+        stdscr.addstr.assert_any_call(0, 0, "Incorrect master password. Please try again.")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+#pylint: disable=C)
+import os
+import string
+import tempfile
+import unittest
+from collections import Counter
+from source.passwordGenerator import PasswordGenerator, generateStrongPasswords, loadWordlist, randomSymbols, MAX_PASSWORD_LENGTH
+
+
+class TestPasswordGenerator(unittest.TestCase):
+
+    def testEveryPasswordContainsEveryClass(self):
+        passwords = generateStrongPasswords(2000, 4)
+        self.assertEqual(len(passwords), 2000)
+        for password in passwords:
+            self.assertEqual(len(password), 4)
+            for alphabet in (string.ascii_lowercase, string.ascii_uppercase, string.digits, string.punctuation):
+                self.assertTrue(any(character in alphabet for character in password), password)
+        self.assertGreater(len(set(generateStrongPasswords(1000, 16))), 999)
+
+    def testCustomAlphabets(self):
+        generator = PasswordGenerator(['abc', '0123456789'])
+        for password in generator.generateMany(200, 6):
+            self.assertTrue(set(password) <= set('abc0123456789'))
+            self.assertTrue(set(password) & set('abc') and set(password) & set(string.digits))
+        self.assertAlmostEqual(generator.entropy(10), 10 * 3.7004, places=3)
+
+    def testInvalidConfigurations(self):
+        for alphabets in ([], ['abc', ''], ['äöü']):
+            with self.subTest(alphabets=alphabets), self.assertRaises(ValueError):
+                PasswordGenerator(alphabets)
+        with self.assertRaises(ValueError):
+            generateStrongPasswords(1, 3)
+        with self.assertRaises(ValueError):
+            generateStrongPasswords(1, MAX_PASSWORD_LENGTH + 1)
+
+    def testSymbolsAreUniform(self):
+        counts = Counter(randomSymbols(100000, b'0123456789'))
+        self.assertEqual(sum(counts.values()), 100000)
+        for count in counts.values():
+            self.assertLess(abs(count - 10000), 500)
+
+    def testPassphrase(self):
+        words = PasswordGenerator().generatePassphrase(8, ' ').split(' ')
+        self.assertEqual(len(words), 8)
+        self.assertTrue(set(words) <= set(loadWordlist()))
+        self.assertEqual(len(loadWordlist()), 2048)
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            path = os.path.join(tempDir, 'words.txt')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('correct\nhorse\nbattery\nstaple\n')
+            self.assertTrue(set(PasswordGenerator().generatePassphrase(5, wordlist=path).split('-')) <= {'correct', 'horse', 'battery', 'staple'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,14 +2,17 @@
 import unittest
 from unittest.mock import patch, mock_open
 from cryptography.fernet import InvalidToken
+import os
 import json
 from source.passwordManager import PasswordManager
+from source.sealedSecrets import SealedSecret
+from tests.vaultTestCase import VaultTestCase
 
 
-class TestPasswordManager(unittest.TestCase):
+class TestPasswordManager(VaultTestCase):
 
     def setUp(self):
-        self.masterPassword = "SuperSecretMasterPassword"
+        super().setUp()
         self.passwordManager = PasswordManager(self.masterPassword)
 
     def testGenerateKey(self):
@@ -29,19 +32,49 @@ class TestPasswordManager(unittest.TestCase):
         with self.assertRaises(InvalidToken):
             self.passwordManager.loadData()
 
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('cryptography.fernet.Fernet.encrypt')
-    def testSaveData(self, _mockEncrypt, _mockFile):
+    def testSaveData(self):
         self.passwordManager.data = {'example.com': {'username': 'user', 'password': 'pass'}}
-        _mockEncrypt.return_value = b'encrypted_data'
         self.passwordManager.saveData()
-        _mockFile().write.assert_called_once_with(b'encrypted_data')
+        with open('passwords.json', 'rb') as file:
+            content = file.read()
+        self.assertTrue(content.startswith(b'PMVAULT2 '))
+        self.assertNotIn(b'example.com', content)
+        self.assertFalse([name for name in os.listdir('.') if name.endswith('.tmp')])  # Written to a temporary file and renamed
 
     def testAddPassword(self):
         self.passwordManager.addPassword('example.com', 'user', 'pass')
         self.assertIn('example.com', self.passwordManager.data)
         self.assertEqual(self.passwordManager.data['example.com']['username'], 'user')
 
+    def testTransactionSavesOnceAtCommit(self):
+        with patch.object(self.passwordManager, 'saveData') as mockSave:
+            with self.passwordManager.transaction():
+                for index in range(100):
+                    self.passwordManager.addPassword(f'site{index}.com', 'user', 'pass')
+                self.passwordManager.deletePassword('site0.com')
+                mockSave.assert_not_called()
+            mockSave.assert_called_once()
+        self.assertEqual(len(self.passwordManager.data), 99)
+
+    def testTransactionRollsBackOnException(self):
+        self.passwordManager.data = {'example.com': {'username': 'user', 'password': 'pass'}}
+        with patch.object(self.passwordManager, 'saveData') as mockSave:
+            with self.assertRaises(ValueError):
+                with self.passwordManager.transaction():
+                    self.passwordManager.addPassword('new.com', 'user', 'pass')
+                    self.passwordManager.updatePassword('example.com', password='changed')
+                    raise ValueError("abort")
+            mockSave.assert_not_called()
+        self.assertEqual(self.passwordManager.data, {'example.com': {'username': 'user', 'password': 'pass'}})
+
+    def testNestedTransactionCommitsWithOuter(self):
+        with patch.object(self.passwordManager, 'saveData') as mockSave:
+            with self.passwordManager.transaction():
+                with self.passwordManager.transaction():
+                    self.passwordManager.addPassword('example.com', 'user', 'pass')
+                mockSave.assert_not_called()
+            mockSave.assert_called_once()
+
     def testGetPassword(self):
         self.passwordManager.data = {'example.com': {'username': 'user', 'password': 'pass'}}
         passwordEntry = self.passwordManager.getPassword('example.com')
@@ -57,7 +90,8 @@ class TestPasswordManager(unittest.TestCase):
         self.passwordManager.data = {'example.com': {'username': 'user', 'password': 'pass'}}
         self.passwordManager.updatePassword('example.com', username='new_user', password='new_pass')
         self.assertEqual(self.passwordManager.data['example.com']['username'], 'new_user')
-        self.assertEqual(self.passwordManager.data['example.com']['password'], 'new_pass')
+        self.assertIsInstance(self.passwordManager.data['example.com']['password'], SealedSecret)  # Sealed as soon as it is written
+        self.assertEqual(self.passwordManager.getPassword('example.com')['password'], 'new_pass')
 
     def testSearchPassword(self):
         self.passwordManager.data = {
@@ -68,12 +102,18 @@ class TestPasswordManager(unittest.TestCase):
         self.assertIn('testsite.com', results)
         self.assertNotIn('example.com', results)
 
+    def testSearchPasswordWithoutUsername(self):
+        self.passwordManager.data = {'example.com': {'username': None, 'password': 'pass', 'notes': None, 'category': 'mail'}}
+        self.assertIn('example.com', self.passwordManager.searchPassword('mail'))
+        self.assertEqual(self.passwordManager.searchPassword('user'), {})
+
     def testCheckPasswordStrength(self):
         weakPassword = 'weak'
-        strongPassword = 'Str0ngPass!'
-        isStrong, reasons = self.passwordManager.checkPasswordStrength(weakPassword)
-        self.assertFalse(isStrong)
-        self.assertGreater(len(reasons), 0)
+        strongPassword = 'k8#Vq2!mZr4$'
+        for password in (weakPassword, 'Str0ngPass!', 'Password1!'):
+            isStrong, reasons = self.passwordManager.checkPasswordStrength(password)
+            self.assertFalse(isStrong)
+            self.assertGreater(len(reasons), 0)
 
         isStrong, reasons = self.passwordManager.checkPasswordStrength(strongPassword)
         self.assertTrue(isStrong)
@@ -93,8 +133,23 @@ class TestPasswordManager(unittest.TestCase):
         self.passwordManager.data = {'example.com': {'username': 'user', 'password': 'pass'}}
         self.assertTrue(self.passwordManager.checkReusedPassword('pass'))
         self.assertFalse(self.passwordManager.checkReusedPassword('different_pass'))
+        self.assertFalse(self.passwordManager.checkReusedPassword('pass', excludeSite='example.com'))
 
-    @patch('requests.get')
+    def testReuseGroups(self):
+        self.passwordManager.data = {
+            'a.com': {'username': 'user', 'password': 'shared'},
+            'b.com': {'username': 'user', 'password': 'unique'},
+            'c.com': {'username': 'user', 'password': 'shared'},
+            'd.com': {'username': 'user', 'password': None}
+        }
+        self.assertEqual(self.passwordManager.reuseGroups(), [['a.com', 'c.com']])
+        with patch.object(self.passwordManager, 'saveData'):
+            self.passwordManager.updatePassword('b.com', password='shared')
+            self.passwordManager.deletePassword('a.com')
+        self.assertEqual(self.passwordManager.reuseGroups(), [['b.com', 'c.com']])
+        self.assertNotIn('shared', self.passwordManager.reuseIndex.buckets)
+
+    @patch('requests.Session.get')
     def testCheckPwnedPassword(self, _mockGet):
         # 'password' SHA-1 hash is '5BAA61E4C9B93F3F0682250B6CF8331B7EE68FD8'
         # Prefix: '5BAA6', Suffix: '1E4C9B93F3F0682250B6CF8331B7EE68FD8'
@@ -0,0 +1,139 @@
+#pylint: disable=C)
+#pylint: disable=W)
+import threading
+import unittest
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import os
+import tempfile
+from source.pwnedClient import PwnedPasswordsClient
+from source.rangeCache import RangeCache
+
+
+class StandInRangeServer(ThreadingHTTPServer):
+    """
+    A local stand-in for the range API that serves a fixed set of pwned passwords.
+    """
+
+    def __init__(self, pwnedPasswords, failuresPerPrefix=0):
+        super().__init__(('127.0.0.1', 0), StandInRangeHandler)
+        self.ranges = {}
+        for password in pwnedPasswords:
+            prefix, suffix = PwnedPasswordsClient.splitHash(password)
+            self.ranges.setdefault(prefix, []).append(f'{suffix}:3')
+        self.failuresPerPrefix = failuresPerPrefix
+        self.requestCounts = Counter()
+        self.notModifiedCount = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/range/'
+
+
+class StandInRangeHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        prefix = self.path.rsplit('/', 1)[-1]
+        with self.server.lock:
+            self.server.requestCounts[prefix] += 1
+            count = self.server.requestCounts[prefix]
+        if count <= self.server.failuresPerPrefix:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        etag = f'"{prefix}-1"'
+        if self.headers.get('If-None-Match') == etag:
+            with self.server.lock:
+                self.server.notModifiedCount += 1
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        lines = self.server.ranges.get(prefix, []) + ['0000000000000000000000000000000000A:0']
+        body = '\r\n'.join(lines).encode()
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPwnedPasswordsClient(unittest.TestCase):
+
+    def startServer(self, pwnedPasswords, failuresPerPrefix=0):
+        server = StandInRangeServer(pwnedPasswords, failuresPerPrefix)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def testParseRangeSkipsPadding(self):
+        text = '1E4C9B93F3F0682250B6CF8331B7EE68FD8:5\r\n0000000000000000000000000000000000A:0'
+        self.assertEqual(PwnedPasswordsClient.parseRange(text), {'1E4C9B93F3F0682250B6CF8331B7EE68FD8'})
+
+    def testBatchFetchesEachPrefixOnce(self):
+        pwned = [f'pwned{index}' for index in range(50)]
+        safe = [f'safe{index}' for index in range(450)]
+        server = self.startServer(pwned)
+        client = PwnedPasswordsClient(baseUrl=server.url, maxWorkers=16)
+
+        results = client.checkPasswords(pwned + safe + pwned)
+
+        self.assertEqual(len(results), 500)
+        self.assertTrue(all(results[password] for password in pwned))
+        self.assertFalse(any(results[password] for password in safe))
+        prefixes = {PwnedPasswordsClient.splitHash(password)[0] for password in pwned + safe}
+        self.assertEqual(set(server.requestCounts), prefixes)
+        self.assertTrue(all(count == 1 for count in server.requestCounts.values()))
+
+    def testTransientFailuresAreRetried(self):
+        server = self.startServer(['password'], failuresPerPrefix=2)
+        client = PwnedPasswordsClient(baseUrl=server.url, retries=2, backoff=0.01)
+        self.assertEqual(client.checkPasswordBatch(['password']), ({'password': True}, set()))
+
+    def testExhaustedRetriesCountAsNotPwned(self):
+        server = self.startServer(['password'], failuresPerPrefix=5)
+        client = PwnedPasswordsClient(baseUrl=server.url, retries=1, backoff=0.01)
+        self.assertEqual(client.checkPasswordBatch(['password']), ({'password': False}, {'5BAA6'}))
+        server.failuresPerPrefix = 0
+        self.assertEqual(client.checkPasswordBatch(['password']), ({'password': True}, set()))  # Earlier failures are not reported again
+
+
+    def testCacheServesRepeatedAudits(self):
+        server = self.startServer(['password'])
+        with tempfile.TemporaryDirectory() as tempDir:
+            cache = RangeCache(os.path.join(tempDir, 'ranges.db'))
+            client = PwnedPasswordsClient(baseUrl=server.url, cache=cache)
+            self.assertEqual(client.checkPasswords(['password', 'other']), {'password': True, 'other': False})
+            self.assertEqual(client.checkPasswords(['password', 'other']), {'password': True, 'other': False})
+            self.assertEqual(sum(server.requestCounts.values()), 2)
+            self.assertEqual(cache.stats(), {'hits': 2, 'misses': 2, 'revalidations': 0, 'entries': 2})
+
+            reopened = RangeCache(os.path.join(tempDir, 'ranges.db'))
+            self.assertTrue(PwnedPasswordsClient(baseUrl=server.url, cache=reopened).checkPasswords(['password'])['password'])
+            self.assertEqual(sum(server.requestCounts.values()), 2)
+            cache.close()
+            reopened.close()
+
+    def testStaleEntriesAreRevalidatedWithEtag(self):
+        server = self.startServer(['password'])
+        with tempfile.TemporaryDirectory() as tempDir:
+            cache = RangeCache(os.path.join(tempDir, 'ranges.db'), ttl=0)
+            client = PwnedPasswordsClient(baseUrl=server.url, cache=cache)
+            client.checkPasswords(['password'])
+            self.assertTrue(client.checkPasswords(['password'])['password'])
+            self.assertEqual(server.notModifiedCount, 1)
+            self.assertEqual(cache.stats()['revalidations'], 1)
+            cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+#pylint: disable=C)
+import os
+import unittest
+from unittest.mock import patch
+from source.rangeCache import RangeCache, rangeCachePath
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestRangeCache(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = RangeCache(os.path.join(self.tempDir.name, 'ranges.db'), ttl=60, maxEntries=2)
+        self.addCleanup(self.cache.close)
+
+    def testPutAndGet(self):
+        self.assertIsNone(self.cache.get('AAAAA'))
+        self.cache.put('AAAAA', {'ABC', 'DEF'}, etag='"v1"')
+        cached = self.cache.get('AAAAA')
+        self.assertEqual(cached.suffixes, {'ABC', 'DEF'})
+        self.assertEqual(cached.etag, '"v1"')
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'revalidations': 0, 'entries': 1})
+
+    def testCacheIsPrivateAndNextToTheVault(self):
+        self.cache.put('AAAAA', set())
+        self.assertEqual(os.stat(self.cache.path).st_mode & 0o777, 0o600)
+        self.assertEqual(rangeCachePath(os.path.join('team', 'a.json')), os.path.join('team', 'pwnedRanges.db'))
+        self.assertEqual(rangeCachePath('passwords.json'), 'pwnedRanges.db')
+
+    def testExpiredEntriesCountAsMisses(self):
+        self.cache.put('AAAAA', set())
+        with patch('source.rangeCache.time.time', return_value=10 ** 12):
+            cached = self.cache.get('AAAAA')
+            self.assertFalse(cached.isFresh(self.cache.ttl))
+        self.assertEqual(self.cache.misses, 1)
+
+    def testLeastRecentlyUsedEntryIsEvicted(self):
+        with patch('source.rangeCache.time.time', side_effect=[1.0, 2.0, 3.0, 4.0, 5.0]):
+            self.cache.put('AAAAA', set())
+            self.cache.put('BBBBB', set())
+            self.cache.get('AAAAA')
+            self.cache.put('CCCCC', set())
+        self.assertIsNone(self.cache.get('BBBBB'))
+        self.assertIsNotNone(self.cache.get('AAAAA'))
+        self.assertEqual(self.cache.stats()['entries'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
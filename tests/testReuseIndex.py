@@ -0,0 +1,31 @@
+#pylint: disable=C)
+import unittest
+from source.reuseIndex import ReuseIndex
+
+
+class TestReuseIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ReuseIndex(b'index-key')
+        self.index.build({
+            'a.com': {'password': 'shared'},
+            'b.com': {'password': 'shared'},
+            'c.com': {'password': 'unique'}
+        })
+
+    def testFingerprintIsKeyed(self):
+        self.assertNotEqual(self.index.fingerprint('shared'), ReuseIndex(b'other-key').fingerprint('shared'))
+        self.assertNotIn('shared', self.index.buckets)
+
+    def testSitesUsing(self):
+        self.assertEqual(self.index.sitesUsing('shared'), {'a.com', 'b.com'})
+        self.assertEqual(self.index.sitesUsing('missing'), set())
+
+    def testGroupsOnlyContainDuplicates(self):
+        self.assertEqual(self.index.groups(), [['a.com', 'b.com']])
+        self.index.remove('a.com')
+        self.assertEqual(self.index.groups(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#pylint: disable=C)
+import unittest
+from source.passwordManager import PasswordManager
+from source.sealedSecrets import SealedSecret, SecretSealer
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestSealedSecrets(VaultTestCase):
+
+    def testSealAndOpenUseTheCache(self):
+        sealer = SecretSealer(b'key', cacheSize=1)
+        first, second = sealer.seal('one'), sealer.seal('two')
+        self.assertEqual(sealer.open(first), 'one')
+        self.assertEqual(sealer.open(first), 'one')
+        self.assertEqual(sealer.decryptions, 1)
+        self.assertEqual(sealer.open(second), 'two')
+        self.assertEqual(sealer.open(first), 'one')
+        self.assertEqual(sealer.decryptions, 3)
+        self.assertEqual(sealer.open('plain'), 'plain')
+
+    def testSealedSecretDoesNotRevealItsPlaintext(self):
+        secret = SecretSealer(b'key').seal('hunter2')
+        self.assertNotIn('hunter2', str(secret))
+        self.assertNotIn('hunter2', repr(secret))
+
+    def testLoadedSecretsStaySealedUntilRead(self):
+        pm = PasswordManager(self.masterPassword)
+        pm.addPassword('example.com', 'user', 'shared', 'private notes', 'Mail')
+        pm.addPassword('other.com', 'user', 'shared')
+
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData()
+        self.assertIsInstance(reloaded.data['example.com']['password'], SealedSecret)
+        self.assertIsInstance(reloaded.data['example.com']['notes'], SealedSecret)
+        self.assertEqual(reloaded.data['example.com']['username'], 'user')
+        self.assertEqual(reloaded.reuseGroups(), [['example.com', 'other.com']])
+        self.assertEqual(reloaded.secrets.decryptions, 0)
+
+        self.assertEqual(reloaded.getPassword('example.com')['notes'], 'private notes')
+        self.assertEqual(reloaded.secrets.decryptions, 2)
+
+    def testWrittenSecretsAreSealedRightAway(self):
+        pm = PasswordManager(self.masterPassword)
+        pm.loadData()
+        pm.addPassword('example.com', 'user', 'shared', 'private notes')
+        pm.addPassword('other.com', 'user', 'other')
+        pm.updatePassword('other.com', password='shared', notes='changed notes')
+        for entry in pm.searchPassword('.com').values():
+            self.assertIsInstance(entry['password'], SealedSecret)
+            self.assertIsInstance(entry['notes'], SealedSecret)
+        self.assertEqual(pm.reuseGroups(), [['example.com', 'other.com']])
+        self.assertEqual(pm.getPassword('other.com')['notes'], 'changed notes')
+
+
+if __name__ == '__main__':
+    unittest.main()
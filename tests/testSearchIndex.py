@@ -0,0 +1,57 @@
+#pylint: disable=C)
+import unittest
+from unittest.mock import patch
+from source.passwordManager import PasswordManager
+from source.searchIndex import SearchIndex
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.build({
+            'example.com': {'username': 'alice', 'notes': 'Work account', 'category': 'Mail'},
+            'github.com': {'username': 'Bob', 'notes': None, 'category': 'Development'},
+            'ab': {'username': None, 'notes': None, 'category': None},
+        })
+
+    def testSearchMatchesMetadataIgnoringCase(self):
+        self.assertEqual(self.index.search('EXAMPLE'), ['example.com'])
+        self.assertEqual(self.index.search('bob'), ['github.com'])
+        self.assertEqual(self.index.search('work acc'), [])  # Notes are sealed secrets and not indexed
+        self.assertEqual(self.index.search('develop'), ['github.com'])
+        self.assertEqual(self.index.search('.com'), ['example.com', 'github.com'])
+        self.assertEqual(self.index.search('missing'), [])
+
+    def testShortKeywordsFallBackToScan(self):
+        self.assertEqual(self.index.search('ab'), ['ab'])
+        self.assertEqual(self.index.search('b'), ['ab', 'github.com'])
+
+    def testKeywordDoesNotMatchAcrossFields(self):
+        self.assertEqual(self.index.search('comalice'), [])
+
+    def testIncrementalUpdates(self):
+        self.index.add('example.com', {'username': 'carol'})
+        self.assertEqual(self.index.search('alice'), [])
+        self.assertEqual(self.index.search('carol'), ['example.com'])
+        self.index.remove('example.com')
+        self.assertEqual(self.index.search('carol'), [])
+        self.assertNotIn('car', self.index.grams)
+
+    def testMemoryUsage(self):
+        self.assertGreater(self.index.memoryUsage(), 0)
+        self.assertLess(SearchIndex().memoryUsage(), self.index.memoryUsage())
+
+    @patch('source.passwordManager.PasswordManager.saveData')
+    def testManagerKeepsIndexCurrent(self, _mockSave):
+        pm = PasswordManager("SuperSecretMasterPassword")
+        pm.addPassword('example.com', 'alice', 'pass', 'notes', 'Mail')
+        pm.updatePassword('example.com', username='carol')
+        self.assertEqual(list(pm.searchPassword('carol')), ['example.com'])
+        self.assertEqual(pm.searchPassword('alice'), {})
+        pm.deletePassword('example.com')
+        self.assertEqual(pm.searchPassword('carol'), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#pylint: disable=C)
+import os
+import sqlite3
+import unittest
+from cryptography.fernet import InvalidToken
+from source.passwordManager import PasswordManager
+from source.sealedSecrets import SealedSecret
+from source.entryCodec import JsonCodec
+from source.storage import StorageBackend
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestSqliteStorage(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pm = self.openVault(self.masterPassword)
+
+    def openVault(self, masterPassword):
+        pm = PasswordManager(masterPassword, storage='sqlite')
+        pm.loadData()
+        self.addCleanup(pm.storage.close)
+        return pm
+
+    def testEntriesPersistRowByRow(self):
+        self.pm.addPassword('example.com', 'alice', 'first', 'notes', 'Mail')
+        self.pm.addPassword('github.com', 'bob', 'second', None, 'Development')
+        self.pm.updatePassword('example.com', password='changed')
+        self.pm.deletePassword('github.com')
+
+        reloaded = self.openVault(self.masterPassword)
+        self.assertEqual(list(reloaded.data), ['example.com'])
+        self.assertIsInstance(reloaded.data['example.com']['password'], SealedSecret)
+        self.assertEqual(reloaded.getPassword('example.com')['password'], 'changed')
+        self.assertEqual(reloaded.getPassword('example.com')['username'], 'alice')
+        self.assertIsNone(reloaded.getPassword('github.com'))
+
+    def testBackendsImplementTheInterface(self):
+        self.assertIsInstance(self.pm.storage, StorageBackend)
+        with self.assertRaises(TypeError):
+            StorageBackend('vault', b'key', self.pm.secrets, str, JsonCodec())  # pylint: disable=abstract-class-instantiated
+
+    def testRowsAreEncrypted(self):
+        self.pm.addPassword('example.com', 'alice', 'hunter22', 'secret notes', 'Mail')
+        self.pm.storage.close()
+        with open('passwords.db', 'rb') as file:
+            contents = file.read()
+        if os.path.exists('passwords.db-wal'):
+            with open('passwords.db-wal', 'rb') as file:
+                contents += file.read()
+        for plaintext in (b'example.com', b'alice', b'hunter22', b'secret notes', b'Mail'):
+            self.assertNotIn(plaintext, contents)
+
+    def testWrongMasterPasswordIsRejected(self):
+        self.pm.addPassword('example.com', 'alice', 'pass')
+        with self.assertRaises(InvalidToken):
+            PasswordManager("WrongPassword", storage='sqlite').loadData()
+
+    def testCategoryLookupUsesIndex(self):
+        self.pm.addPassword('example.com', 'alice', 'pass', None, 'Mail')
+        self.pm.addPassword('mail.com', 'bob', 'pass', None, 'Mail')
+        self.pm.addPassword('github.com', 'carol', 'pass', None, 'Development')
+        self.assertEqual(self.pm.getCategory('Mail'), ['example.com', 'mail.com'])
+        with sqlite3.connect('passwords.db') as connection:
+            plan = connection.execute("EXPLAIN QUERY PLAN SELECT site FROM entries WHERE categoryKey = ?", (b'',)).fetchall()
+        self.assertIn('entriesByCategory', str(plan))
+
+    def testTransactionRollsBackRows(self):
+        self.pm.addPassword('example.com', 'alice', 'pass')
+        with self.assertRaises(ValueError):
+            with self.pm.transaction():
+                self.pm.addPassword('new.com', 'bob', 'pass')
+                self.pm.deletePassword('example.com')
+                raise ValueError("abort")
+        self.assertEqual(list(self.pm.data), ['example.com'])
+        self.assertEqual(list(self.openVault(self.masterPassword).data), ['example.com'])
+
+    def testSearchAndReuseWorkOnRows(self):
+        self.pm.addPassword('example.com', 'alice', 'shared')
+        self.pm.addPassword('other.com', 'bob', 'shared')
+        reloaded = self.openVault(self.masterPassword)
+        self.assertEqual(list(reloaded.searchPassword('alice')), ['example.com'])
+        self.assertEqual(reloaded.reuseGroups(), [['example.com', 'other.com']])
+
+    def testUnknownStorageIsRejected(self):
+        with self.assertRaises(ValueError):
+            PasswordManager(self.masterPassword, storage='unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
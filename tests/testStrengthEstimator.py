@@ -0,0 +1,102 @@
+#pylint: disable=C)
+import os
+import math
+import tempfile
+import unittest
+from unittest.mock import patch
+from source.passwordManager import PasswordManager
+from source.strengthEstimator import WordlistIndex, estimateStrength, WORDLIST_PATH
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestStrengthEstimator(unittest.TestCase):
+
+    def testPatterns(self):
+        examples = {
+            'Password1!': 'common',
+            'Tr0mb0neHarbor': 'dictionary',
+            'xqzwertyuiop': 'keyboard',
+            'Zzzzzzzzzzzz': 'repeat',
+            'abcdefghij99': 'sequence',
+            'Xk!19.05.1987': 'date',
+        }
+        for password, pattern in examples.items():
+            with self.subTest(password=password):
+                estimate = estimateStrength(password)
+                self.assertIn(pattern, estimate.patterns)
+                self.assertFalse(estimate.strong)
+                self.assertTrue(any('too easy to guess' in reason for reason in estimate.reasons()))
+
+    def testRandomPasswordsAreStrong(self):
+        estimate = estimateStrength('k8#Vq2!mZr4$')
+        self.assertTrue(estimate.strong)
+        self.assertEqual(estimate.score, 4)
+        self.assertEqual(estimate.patterns, ())
+        self.assertEqual(estimate.reasons(), [])
+        self.assertGreater(estimateStrength('Password1!x').entropy, estimateStrength('Password1!').entropy)
+        self.assertIn("Password is too short (minimum 8 characters).", estimateStrength('k8#Vq2!').reasons())
+
+    def testWordlistIndex(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+            path = os.path.join(tempDir, 'words.txt')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('Dragon\nmonkey\nsky\nletmein\ndragon\n')
+            index = WordlistIndex(path, ranked=True)
+            self.assertFalse(index.compiled)
+            self.assertEqual((index.rank('dragon'), index.rank('monkey'), index.rank('letmein')), (0, 1, 3))
+            self.assertTrue(index.compiled)
+            self.assertIsNone(index.rank('sky'))  # Shorter than the shortest word that is looked up
+            self.assertIsNone(index.rank('donkey'))
+            self.assertEqual(index.size, 3)
+        dictionary = WordlistIndex(WORDLIST_PATH)
+        with open(WORDLIST_PATH, encoding='utf-8') as file:
+            words = [line.strip().lower() for line in file]
+        for rank, word in enumerate(words):
+            if len(word) >= 4 and words.index(word) == rank:
+                self.assertEqual(dictionary.rank(word), rank)
+                self.assertIsNone(dictionary.rank(word[:-1] + '~'))
+        self.assertEqual(sum(len(records) // length for length, records in dictionary.words.items()), dictionary.size)
+
+    def testCharacterClassesAreCountedSeparately(self):
+        self.assertAlmostEqual(estimateStrength('aB').entropy, 2 * math.log2(52), places=6)
+        self.assertEqual(round(estimateStrength('aB').entropy, 1), 11.4)
+        self.assertAlmostEqual(estimateStrength('k8#Vq2!mZr4$').entropy, 12 * math.log2(95), places=6)
+
+
+class TestScoreAll(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pm = PasswordManager(self.masterPassword)
+        self.pm.addPassword('example.com', 'alice', 'k8#Vq2!mZr4$')
+        self.pm.addPassword('github.com', 'bob', 'Password1!')
+        self.pm.addPassword('gitlab.com', 'bob', 'Password1!')
+        self.pm.addPassword('notes.com', 'carol')
+
+    def testScoresAreMemoizedByFingerprint(self):
+        with patch('source.passwordManager.estimateStrength', wraps=estimateStrength) as mockEstimate:
+            scores = self.pm.scoreAll()
+            self.assertEqual(mockEstimate.call_count, 2)  # The reused password is scored once
+            self.assertEqual(sorted(scores), ['example.com', 'github.com', 'gitlab.com'])
+            self.assertTrue(scores['example.com'].strong)
+            self.assertFalse(scores['github.com'].strong)
+
+            decryptions = self.pm.secrets.decryptions
+            self.pm.scoreAll()
+            self.assertEqual(mockEstimate.call_count, 2)
+            self.assertEqual(self.pm.secrets.decryptions, decryptions)
+
+            self.pm.updatePassword('github.com', password='Tr0mb0ne!Harbor#42x')
+            self.assertTrue(self.pm.scoreAll()['github.com'].strong)
+            self.assertEqual(mockEstimate.call_count, 3)
+            self.assertEqual(len(self.pm.strengthScores), 3)
+
+    def testCheckPasswordStrengthUsesTheSameCache(self):
+        self.pm.scoreAll()
+        with patch('source.passwordManager.estimateStrength') as mockEstimate:
+            self.assertEqual(self.pm.checkPasswordStrength('Password1!')[0], False)
+            mockEstimate.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
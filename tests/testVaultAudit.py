@@ -0,0 +1,112 @@
+#pylint: disable=C)
+import os
+import hashlib
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+from source.passwordManager import PasswordManager
+from source.vaultAudit import AuditCache
+from tests.vaultTestCase import VaultTestCase
+
+
+class FakeBackend:
+
+    def __init__(self, breached):
+        self.breached = set(breached)
+        self.failedPrefixes = set()
+        self.checked = []
+
+    def checkPasswords(self, passwords):
+        return self.checkPasswordBatch(passwords)[0]
+
+    def checkPasswordBatch(self, passwords):
+        passwords = set(passwords)
+        self.checked.append(passwords)
+        prefixes = {hashlib.sha1(password.encode()).hexdigest().upper()[:5] for password in passwords}
+        return {password: password in self.breached for password in passwords}, prefixes & self.failedPrefixes
+
+
+class TestVaultAudit(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        pm = PasswordManager(self.masterPassword)
+        pm.addPassword('example.com', 'alice', 'k8#Vq2!mZr4$')
+        pm.addPassword('github.com', 'bob', 'Password1!')
+        pm.addPassword('gitlab.com', 'bob', 'Password1!')
+        pm.addPassword('bank.com', 'carol', 'Xr9$mQ!2vLp#7w')
+        pm.addPassword('notes.com', 'dave')
+        self.backend = FakeBackend({'Password1!', 'Xr9$mQ!2vLp#7w'})
+        self.pm = self.openVault()
+
+    def openVault(self):
+        pm = PasswordManager(self.masterPassword)
+        pm.loadData()
+        pm.pwnedBackend = self.backend
+        return pm
+
+    def testReport(self):
+        report = self.pm.audit()
+        self.assertEqual(sorted(report.weak), ['github.com', 'gitlab.com'])
+        self.assertIn("Password contains a common password.", report.weak['github.com'])
+        self.assertEqual(report.reused, [['github.com', 'gitlab.com']])
+        self.assertEqual(report.pwned, ['bank.com', 'github.com', 'gitlab.com'])
+        self.assertEqual((report.evaluated, report.cached), (3, 1))  # The reused password is evaluated once
+        self.assertEqual(len(self.backend.checked), 1)
+        self.assertEqual(report.findings()[0].split('\t')[:2], ['weak', 'github.com'])
+        self.assertIn('reused\tgithub.com, gitlab.com', report.findings())
+        self.assertEqual(self.pm.audit(pwned=False).toDict()['pwned'], [])
+
+    def testLaterAuditsOnlyEvaluateChangedEntries(self):
+        self.pm.audit()
+        pm = self.openVault()
+        decryptions = pm.secrets.decryptions
+        report = pm.audit()
+        self.assertEqual((report.evaluated, report.cached), (0, 4))
+        self.assertEqual(pm.secrets.decryptions, decryptions)
+        self.assertEqual(len(self.backend.checked), 1)
+        self.assertEqual(report.pwned, ['bank.com', 'github.com', 'gitlab.com'])
+
+        pm.updatePassword('github.com', password='Tr0mb0ne!Harbor#42x')
+        self.assertIn('modifiedAt', pm.data['github.com'])
+        with patch.object(pm, 'passwordFingerprint', wraps=pm.passwordFingerprint) as mockFingerprint:
+            report = pm.audit()
+            mockFingerprint.assert_called_once()
+        self.assertEqual((report.evaluated, report.cached), (1, 3))
+        self.assertEqual(self.backend.checked[-1], {'Tr0mb0ne!Harbor#42x'})
+        self.assertEqual(sorted(report.weak), ['gitlab.com'])
+        self.assertEqual(report.reused, [])
+
+    def testUnansweredBreachChecksAreRepeated(self):
+        prefix = hashlib.sha1(b'Password1!').hexdigest().upper()[:5]
+        self.backend.failedPrefixes.add(prefix)
+        report = self.pm.audit()
+        self.assertEqual(report.unchecked, ['github.com', 'gitlab.com'])
+        self.assertNotIn('github.com', report.pwned)
+        self.backend.failedPrefixes.clear()
+        self.assertEqual(self.pm.audit().pwned, ['bank.com', 'github.com', 'gitlab.com'])
+        self.assertEqual(self.backend.checked[-1], {'Password1!'})
+
+        with patch('source.vaultAudit.PWNED_RESULT_TTL', timedelta(0)):
+            self.pm.audit()
+        self.assertEqual(len(self.backend.checked[-1]), 3)
+
+    def testResultsAreEncryptedWithTheVaultKey(self):
+        self.pm.audit()
+        with open('passwords.audit', 'rb') as file:
+            self.assertNotIn(b'strength', file.read())
+        cache = AuditCache('passwords.audit', b'another key')
+        cache.load()
+        self.assertEqual((cache.auditedAt, cache.results), (None, {}))
+
+    def testResultsAreReplacedThroughAPrivateTemporaryFile(self):
+        with patch('source.vaultAudit.os.replace', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.pm.audit()
+        self.assertFalse([name for name in os.listdir('.') if name.endswith('.tmp')])
+        self.pm.audit()
+        self.assertEqual(os.stat('passwords.audit').st_mode & 0o777, 0o600)
+
+
+if __name__ == '__main__':
+    unittest.main()
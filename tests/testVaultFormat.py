@@ -0,0 +1,176 @@
+#pylint: disable=C)
+import io
+import os
+import json
+import time
+import unittest
+from unittest.mock import patch
+from cryptography.fernet import Fernet, InvalidToken
+from source.passwordManager import PasswordManager
+from source.vaultFormat import (encodeHeader, verifyHeader, parseHeader, isHeaderLine, deriveHeaderKey, chunkStream, writeSegments, readSegments,
+                                compressStream, decompressStream)
+from source.entryCodec import CODECS
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestVaultFormat(VaultTestCase):
+
+    def testHeaderRoundTrip(self):
+        line = encodeHeader({'version': 2, 'body': 'fernet'}, b'k' * 32)
+        self.assertTrue(isHeaderLine(line))
+        self.assertTrue(line.endswith(b'\n'))
+        self.assertEqual(verifyHeader(line, b'k' * 32), {'version': 2, 'body': 'fernet'})
+        with self.assertRaises(InvalidToken):
+            verifyHeader(line, b'x' * 32)
+
+    def testTamperedHeaderIsRejected(self):
+        line = encodeHeader({'version': 2, 'body': 'fernet'}, b'k' * 32)
+        tampered = encodeHeader({'version': 2, 'body': 'other'}, b'k' * 32).split(b'.')[0] + b'.' + line.split(b'.')[1]
+        with self.assertRaises(InvalidToken):
+            verifyHeader(tampered, b'k' * 32)
+
+    def testWrongPasswordIsRejectedWithoutDecryptingTheBody(self):
+        pm = PasswordManager(self.masterPassword)
+        pm.addPassword('example.com', 'user', 'pass')
+        wrong = PasswordManager("WrongPassword")
+        with patch('cryptography.fernet.Fernet.decrypt') as mockDecrypt:
+            with self.assertRaises(InvalidToken):
+                wrong.loadData()
+            mockDecrypt.assert_not_called()
+
+    def testLegacyVaultIsLoadedAndMigrated(self):
+        pm = PasswordManager(self.masterPassword)
+        with open('passwords.json', 'wb') as file:
+            file.write(Fernet(pm.key).encrypt(json.dumps({'example.com': {'username': 'user', 'password': 'pass'}}).encode()))
+        pm.loadData()
+        self.assertEqual(pm.data['example.com']['password'], 'pass')
+        pm.saveData()
+        with open('passwords.json', 'rb') as file:
+            self.assertTrue(isHeaderLine(file.readline()))
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData()
+        self.assertEqual(reloaded.getPassword('example.com'), {'username': 'user', 'password': 'pass'})
+
+    def testBackgroundLoad(self):
+        pm = PasswordManager(self.masterPassword)
+        pm.addPassword('example.com', 'user', 'pass')
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData(background=True)
+        self.assertEqual(reloaded.data['example.com']['username'], 'user')
+        self.assertIn('example.com', reloaded.searchPassword('example'))
+
+    def testBackgroundLoadErrorIsRaisedOnAccess(self):
+        pm = PasswordManager(self.masterPassword)
+        pm.addPassword('example.com', 'user', 'pass')
+        with open('passwords.json', 'ab') as file:
+            file.write(b'garbage')
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData(background=True)
+        with self.assertRaises(InvalidToken):
+            _ = reloaded.data
+
+    def testLockWaitsForABackgroundLoad(self):
+        pm = PasswordManager(self.masterPassword)
+        pm.addPassword('example.com', 'user', 'pass')
+        reloaded = PasswordManager(self.masterPassword)
+        load = reloaded.storage.load
+
+        def slowLoad(handle):
+            time.sleep(0.2)
+            return load(handle)
+
+        with patch.object(reloaded.storage, 'load', side_effect=slowLoad):
+            reloaded.loadData(background=True)
+            reloaded.lock()
+            time.sleep(0.3)
+        self.assertEqual(vars(reloaded)['_data'], {})  # The decrypted entries did not come back after the lock
+        with self.assertRaises(PermissionError):
+            _ = reloaded.data
+
+    def testFernetBodyWithHeaderStillLoads(self):
+        pm = PasswordManager(self.masterPassword)
+        with open('passwords.json', 'wb') as file:
+            file.write(encodeHeader({'version': 2, 'body': 'fernet'}, deriveHeaderKey(pm.key)))
+            file.write(Fernet(pm.key).encrypt(json.dumps({'example.com': {'username': 'user'}}).encode()))
+        pm.loadData()
+        self.assertEqual(pm.data, {'example.com': {'username': 'user'}})
+
+    def testSegmentsRoundTripAcrossChunkBoundaries(self):
+        entries = [(f'site{index}.com', {'username': 'user\nname', 'password': 'p' * index}) for index in range(200)]
+        for codec in CODECS.values():
+            with self.subTest(codec=codec.name):
+                buffer = io.BytesIO()
+                writeSegments(buffer, chunkStream(codec.encodeEntries(entries), 100), b'k' * 32, 'file-id')
+                buffer.seek(0)
+                chunks = list(readSegments(buffer, b'k' * 32, 'file-id', 100))
+                self.assertGreater(len(chunks), 50)
+                self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+                self.assertEqual(list(codec.decodeEntries(chunks)), entries)
+
+    def testEmptyBodyRoundTrip(self):
+        for codec in CODECS.values():
+            with self.subTest(codec=codec.name):
+                buffer = io.BytesIO()
+                writeSegments(buffer, chunkStream(codec.encodeEntries([]), 100), b'k' * 32, 'file-id')
+                buffer.seek(0)
+                self.assertEqual(list(codec.decodeEntries(readSegments(buffer, b'k' * 32, 'file-id', 100))), [])
+
+    def segmentedBody(self):
+        buffer = io.BytesIO()
+        writeSegments(buffer, [b'first', b'second', b'third'], b'k' * 32, 'file-id')
+        return buffer.getvalue()
+
+    def testTruncatedBodyIsRejected(self):
+        body = self.segmentedBody()
+        lastSegmentStart = len(body) - (4 + 12 + len(b'third') + 16)
+        with self.assertRaises(InvalidToken):
+            list(readSegments(io.BytesIO(body[:lastSegmentStart]), b'k' * 32, 'file-id', 100))
+
+    def testReorderedOrForeignSegmentsAreRejected(self):
+        body = self.segmentedBody()
+        firstLength = 4 + 12 + len(b'first') + 16
+        secondLength = 4 + 12 + len(b'second') + 16
+        swapped = body[firstLength:firstLength + secondLength] + body[:firstLength] + body[firstLength + secondLength:]
+        with self.assertRaises(InvalidToken):
+            list(readSegments(io.BytesIO(swapped), b'k' * 32, 'file-id', 100))
+        with self.assertRaises(InvalidToken):
+            list(readSegments(io.BytesIO(body), b'k' * 32, 'other-file', 100))
+
+    def testLargeVaultRoundTrip(self):
+        pm = PasswordManager(self.masterPassword)
+        with pm.transaction():
+            for index in range(5000):
+                pm.addPassword(f'site{index}.com', f'user{index}', f'password{index}', 'notes', 'category')
+        reloaded = PasswordManager(self.masterPassword)
+        reloaded.loadData()
+        self.assertEqual({site: reloaded.getPassword(site) for site in reloaded.data}, {site: pm.getPassword(site) for site in pm.data})
+
+    def testCompressionRoundTripsAndShrinksTheVault(self):
+        sizes = {}
+        for compression in (None, 'zlib', 'lzma'):
+            with self.subTest(compression=compression):
+                pm = PasswordManager(self.masterPassword, compression=compression, compressionLevel=1)
+                with pm.transaction():
+                    for index in range(200):
+                        pm.addPassword(f'site{index}.example.com', 'user@example.com', f'password{index}', None, 'Work')
+                sizes[compression] = os.path.getsize('passwords.json')
+                with open('passwords.json', 'rb') as file:
+                    self.assertEqual(parseHeader(file.readline())['compression'], compression)
+                reloaded = PasswordManager(self.masterPassword)
+                reloaded.loadData()
+                self.assertEqual(reloaded.getPassword('site7.example.com')['password'], 'password7')
+                self.assertEqual(len(reloaded.data), 200)
+        self.assertLess(sizes['zlib'], sizes[None])
+        self.assertLess(sizes['lzma'], sizes[None])
+
+    def testIncompleteCompressedStreamIsRejected(self):
+        compressed = b''.join(compressStream([b'entry' * 100], 'zlib', 6))
+        self.assertEqual(b''.join(decompressStream([compressed[:5], compressed[5:]], 'zlib')), b'entry' * 100)
+        with self.assertRaises(ValueError):
+            list(decompressStream([compressed[:-4]], 'zlib'))
+        with self.assertRaises(ValueError):
+            PasswordManager(self.masterPassword, compression='brotli')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#pylint: disable=C)
+import os
+import time
+import unittest
+from unittest.mock import patch
+from cryptography.fernet import InvalidToken
+from source.passwordManager import PasswordManager
+from source.vaultPool import VaultPool, estimateMemory
+from tests.vaultTestCase import VaultTestCase, FAST_KDF
+
+
+class TestVaultPool(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.mkdir('team')
+        for name in ('a', 'b', 'c'):
+            pm = PasswordManager(self.masterPassword, kdf=FAST_KDF, path=f'team/{name}.json')
+            pm.loadData()
+            pm.addPassword(f'{name}.example.com', 'user', f'Password!{name}')
+
+    def testVaultPathIsConfigurable(self):
+        self.assertEqual(sorted(name for name in os.listdir('team') if name.endswith('.json')), ['a.json', 'b.json', 'c.json'])
+        self.assertFalse(os.path.exists('passwords.json'))
+        pm = PasswordManager(self.masterPassword, path='team/b.json')
+        pm.loadData()
+        self.assertEqual(list(pm.data), ['b.example.com'])
+        sqlite = PasswordManager(self.masterPassword, kdf=FAST_KDF, storage='sqlite', path='team/d.db')
+        sqlite.loadData()
+        sqlite.addPassword('d.example.com', 'user', 'Password!d')
+        self.assertTrue(os.path.exists('team/d.db'))
+
+    def testHotVaultIsReused(self):
+        pool = VaultPool(kdf=FAST_KDF)
+        self.addCleanup(pool.close)
+        with pool.open('team/a.json', self.masterPassword) as pm:
+            pm.addPassword('new.example.com', 'user', 'Password!new')
+        with pool.open('team/a.json', self.masterPassword) as again:
+            self.assertIs(again, pm)
+            self.assertIn('new.example.com', again.data)
+        metrics = pool.metrics()
+        self.assertEqual((metrics['vaults'], metrics['hits'], metrics['misses']), (1, 1, 1))
+        self.assertGreater(metrics['memory'], 0)
+
+    def testWrongMasterPasswordIsRejected(self):
+        pool = VaultPool(kdf=FAST_KDF)
+        self.addCleanup(pool.close)
+        with self.assertRaises(InvalidToken):
+            with pool.open('team/a.json', "WrongPassword"):
+                pass
+        self.assertEqual(pool.metrics()['vaults'], 0)
+        with pool.open('team/a.json', self.masterPassword):
+            pass
+        with self.assertRaises(InvalidToken):
+            with pool.open('team/a.json', "WrongPassword"):
+                pass
+        with pool.open('team/a.json', self.masterPassword) as pm:
+            self.assertEqual(pm.getPassword('a.example.com')['password'], 'Password!a')
+
+    def testLeastRecentlyUsedVaultIsLocked(self):
+        pool = VaultPool(maxVaults=2, kdf=FAST_KDF)
+        self.addCleanup(pool.close)
+        managers = {}
+        for name in ('a', 'b', 'a', 'c'):
+            with pool.open(f'team/{name}.json', self.masterPassword) as pm:
+                managers[name] = pm
+        self.assertEqual(pool.metrics()['evictions'], 1)
+        with self.assertRaises(PermissionError):
+            _ = managers['b'].data
+        self.assertEqual(managers['b'].masterPassword, '')
+        self.assertIn('a.example.com', managers['a'].data)
+
+    def testMemoryLimitKeepsOnlyTheRecentVault(self):
+        pool = VaultPool(maxMemory=1, kdf=FAST_KDF)
+        self.addCleanup(pool.close)
+        for name in ('a', 'b', 'c'):
+            with pool.open(f'team/{name}.json', self.masterPassword):
+                pass
+        self.assertEqual(pool.metrics()['vaults'], 1)  # The most recently used vault stays
+        self.assertEqual(pool.metrics()['evictions'], 2)
+
+    def testMemoryEstimateIsUpdatedWithoutWalkingTheRows(self):
+        pool = VaultPool(kdf=FAST_KDF, storage='sqlite')
+        self.addCleanup(pool.close)
+        with pool.open('team/d.db', self.masterPassword) as pm:
+            pm.addPassword('first.example.com', 'user', 'Password!first')
+        with patch('source.vaultPool.estimateMemory', side_effect=estimateMemory) as estimate:
+            for number in range(10):
+                with pool.open('team/d.db', self.masterPassword) as pm:
+                    pm.addPassword(f'site{number}.example.com', 'user', f'Password!{number}')
+            estimate.assert_not_called()
+        with pool.open('team/d.db', self.masterPassword) as pm:
+            walked = estimateMemory(pm)
+        self.assertLess(walked / 2, pool.metrics()['memory'])  # Within a factor of two of walking all entries
+        self.assertLess(pool.metrics()['memory'], walked * 2)
+
+    def testIdleVaultsAreLockedAndTheirChangesSaved(self):
+        pool = VaultPool(idleTimeout=0.05, kdf=FAST_KDF)
+        with pool.open('team/a.json', self.masterPassword) as pm:
+            pm.enableWriteBehind(window=60, maxDelay=60)
+            pm.addPassword('pending.example.com', 'user', 'Password!pending')
+        time.sleep(0.1)
+        self.assertEqual(pool.evictIdle(), 1)
+        self.assertEqual(pool.metrics()['vaults'], 0)
+        reloaded = PasswordManager(self.masterPassword, path='team/a.json')
+        reloaded.loadData()
+        self.assertIn('pending.example.com', reloaded.data)
+        pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
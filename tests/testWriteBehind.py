@@ -0,0 +1,145 @@
+#pylint: disable=C)
+import os
+import time
+import signal
+import threading
+import unittest
+from unittest.mock import patch
+from source.passwordManager import PasswordManager
+from source.writeBehind import WriteBehindSaver
+from tests.vaultTestCase import VaultTestCase
+
+
+class TestWriteBehindSaver(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = []
+        self.savedEvent = threading.Event()
+
+    def save(self, changes, snapshot):
+        self.saved.append((dict(changes), snapshot))
+        self.savedEvent.set()
+
+    def testMutationsAreCoalesced(self):
+        saver = WriteBehindSaver(self.save, window=0.05).start()
+        self.addCleanup(saver.close)
+        for number in range(20):
+            saver.markDirty(f'site{number % 5}.com')
+        saver.markDirty('site0.com', 'delete')
+        self.assertTrue(self.savedEvent.wait(2))
+        self.assertEqual(len(self.saved), 1)
+        changes, snapshot = self.saved[0]
+        self.assertEqual(len(changes), 5)
+        self.assertEqual(changes['site0.com'], 'delete')
+        self.assertFalse(snapshot)
+        metrics = saver.metrics()
+        self.assertEqual((metrics['saves'], metrics['coalesced'], metrics['pendingMutations']), (1, 21, 0))
+        self.assertGreaterEqual(metrics['lastDelay'], 0.05)
+
+    def testMaxDelayBoundsAContinuousStream(self):
+        saver = WriteBehindSaver(self.save, window=0.1, maxDelay=0.2).start()
+        self.addCleanup(saver.close)
+        start = time.monotonic()
+        while not self.savedEvent.is_set() and time.monotonic() - start < 2:
+            saver.markDirty('busy.com')
+            time.sleep(0.01)
+        self.assertTrue(self.savedEvent.is_set())
+        self.assertLess(time.monotonic() - start, 1)
+
+    def testFailedSavesStayPending(self):
+        failures = [OSError("disk full")]
+
+        def failingSave(changes, snapshot):
+            if failures:
+                raise failures.pop()
+            self.save(changes, snapshot)
+
+        saver = WriteBehindSaver(failingSave, window=60)
+        saver.markDirty('example.com')
+        with self.assertRaises(OSError):
+            saver.flush()
+        self.assertEqual(saver.metrics()['pendingSites'], 1)
+        self.assertIsInstance(saver.metrics()['lastError'], OSError)
+        saver.markDirty()
+        saver.flush()
+        self.assertEqual(self.saved, [({'example.com': 'put'}, True)])
+        self.assertIsNone(saver.metrics()['lastError'])
+
+    def testSignalsFlushAndReachThePreviousHandler(self):
+        received = []
+        previous = signal.signal(signal.SIGHUP, lambda number, frame: received.append(number))
+        self.addCleanup(signal.signal, signal.SIGHUP, previous)
+        saver = WriteBehindSaver(self.save, window=60).start()
+        saver.markDirty('example.com')
+        os.kill(os.getpid(), signal.SIGHUP)
+        self.assertEqual(received, [signal.SIGHUP])
+        self.assertEqual(len(self.saved), 1)
+        saver.close()
+        self.assertNotEqual(signal.getsignal(signal.SIGHUP), saver.handleSignal)
+
+    def testSignalDoesNotWaitForLocksOfTheInterruptedCode(self):
+        received = []
+        previous = signal.signal(signal.SIGHUP, lambda number, frame: received.append(number))
+        self.addCleanup(signal.signal, signal.SIGHUP, previous)
+        vaultLock = threading.Lock()
+
+        def lockedSave(changes, snapshot):
+            with vaultLock:
+                self.save(changes, snapshot)
+
+        saver = WriteBehindSaver(lockedSave, window=60).start()
+        saver.markDirty('example.com')
+        with patch('source.writeBehind.SIGNAL_FLUSH_TIMEOUT', 0.1), vaultLock:  # The signal arrives while the main thread holds the lock
+            os.kill(os.getpid(), signal.SIGHUP)
+            self.assertEqual(received, [signal.SIGHUP])
+        saver.close()
+        self.assertEqual(self.saved, [({'example.com': 'put'}, False)])
+
+
+class TestWriteBehindManager(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pm = PasswordManager(self.masterPassword)
+        self.pm.addPassword('example.com', 'alice', 'first')
+
+    def reload(self):
+        pm = PasswordManager(self.masterPassword)
+        pm.loadData()
+        return pm
+
+    def testMutationsAreSavedInTheBackground(self):
+        saver = self.pm.enableWriteBehind(window=0.05)
+        self.addCleanup(saver.close)
+        with patch.object(self.pm.storage, 'save', wraps=self.pm.storage.save) as mockSave:
+            for number in range(10):
+                self.pm.addPassword(f'site{number}.com', 'bob', f'password{number}')
+            self.pm.updatePassword('site3.com', password='changed')
+            self.pm.deletePassword('site4.com')
+            mockSave.assert_not_called()
+            deadline = time.monotonic() + 2
+            while saver.metrics()['saves'] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(mockSave.call_count, 1)
+        reloaded = self.reload()
+        self.assertEqual(len(reloaded.data), 10)
+        self.assertEqual(reloaded.getPassword('site3.com')['password'], 'changed')
+
+    def testFlushAndLockSavePendingMutations(self):
+        self.pm.enableWriteBehind(window=60)
+        self.pm.addPassword('github.com', 'bob', 'second')
+        self.assertNotIn('github.com', self.reload().data)
+        self.pm.flush()
+        self.assertIn('github.com', self.reload().data)
+
+        with self.pm.transaction():
+            self.pm.addPassword('gitlab.com', 'bob', 'third')
+            self.pm.deletePassword('example.com')
+        self.pm.lock()
+        self.assertIsNone(self.pm.writeBehind)
+        reloaded = self.reload()
+        self.assertEqual(sorted(reloaded.data), ['github.com', 'gitlab.com'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+#pylint: disable=C)
+import os
+import tempfile
+import unittest
+from source.keyDerivation import MIN_SCRYPT_COST
+
+MASTER_PASSWORD = "SuperSecretMasterPassword"
+FAST_KDF = {'name': 'scrypt', 'n': MIN_SCRYPT_COST, 'r': 8, 'p': 1}
+
+
+class VaultTestCase(unittest.TestCase):
+    """
+    Runs every test in its own temporary working directory, so the vaults it writes never end up in the repository.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tempDir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tempDir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tempDir.name)
+        self.masterPassword = MASTER_PASSWORD
+
+
+class AsyncVaultTestCase(VaultTestCase, unittest.IsolatedAsyncioTestCase):
+    """
+    A VaultTestCase whose tests are coroutines.
+    """